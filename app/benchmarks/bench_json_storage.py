@@ -0,0 +1,125 @@
+"""
+JSON document storage benchmark.
+
+Stores synthetic resumes (plus a snapshot-sized copy of each, as
+`resume_snapshots` keeps) in a throwaway SQLite file per storage format and
+reports the database file size, write latency and read latency:
+
+- `plain`: uncompressed JSON text (the pre-compression layout).
+- `zlib` / `zstd`: `database.CompressedJSON` (`zstd` only if `zstandard` is installed).
+
+    python benchmarks/bench_json_storage.py --rows 2000 --items 12
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+from sqlalchemy import JSON, Column, Integer, MetaData, Table, create_engine, insert, select, text
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from database import CompressedJSON  # noqa: E402
+from resume_schema import RESUME_SECTIONS, SINGLE_ENTRY_SECTION_KEYS  # noqa: E402
+
+
+def build_resume(seed: int, items: int) -> dict:
+    sections = []
+    for section in RESUME_SECTIONS:
+        count = 1 if section.key in SINGLE_ENTRY_SECTION_KEYS else items
+        sections.append(
+            {
+                "sectionKey": section.key,
+                "items": [
+                    {
+                        "id": f"{seed:08d}-{section.key}-{index}",
+                        "values": {
+                            field.key: (
+                                f"- Led {field.label.lower()} work for team {index}, "
+                                f"improving throughput by {(seed + index) % 40 + 5}%.\n"
+                                "- Partnered with product and design on quarterly planning."
+                                if field.key == "description"
+                                else f"{field.label} {seed % 97} {index}"
+                            )
+                            for field in section.fields
+                        },
+                    }
+                    for index in range(count)
+                ],
+            }
+        )
+    return {"sections": sections}
+
+
+def _codecs() -> list[str]:
+    codecs = ["plain", "zlib"]
+    try:
+        import zstandard  # type: ignore  # noqa: F401
+    except Exception:
+        pass
+    else:
+        codecs.append("zstd")
+    return codecs
+
+
+def _run(codec: str, documents: list[dict], directory: str) -> tuple[int, float, float]:
+    path = os.path.join(directory, f"{codec}.db")
+    engine = create_engine(f"sqlite:///{path}")
+    table = Table(
+        "documents",
+        MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("body", JSON() if codec == "plain" else CompressedJSON()),
+    )
+    table.metadata.create_all(engine)
+    os.environ["JSON_COMPRESSION"] = codec
+
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        for index, document in enumerate(documents):
+            conn.execute(insert(table).values(id=index, body=document))
+    write_ms = (time.perf_counter() - started) * 1000 / len(documents)
+
+    with engine.connect() as conn:
+        conn.execute(text("VACUUM"))
+    size = os.path.getsize(path)
+
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        for row in conn.execute(select(table.c.body)):
+            assert row.body["sections"]
+    read_ms = (time.perf_counter() - started) * 1000 / len(documents)
+    engine.dispose()
+    return size, write_ms, read_ms
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000, help="Resumes to store.")
+    parser.add_argument("--items", type=int, default=12, help="Items per multi-entry section.")
+    args = parser.parse_args()
+
+    resumes = [build_resume(seed, args.items) for seed in range(args.rows)]
+    # Each analyzed resume also has its content stored in resume_snapshots.
+    documents = resumes + resumes
+    print(f"{len(documents)} documents, {args.items} items per multi-entry section")
+    print(f"{'format':>7} {'db MiB':>8} {'ratio':>6} {'write ms':>9} {'read ms':>8}")
+
+    baseline: int | None = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for codec in _codecs():
+            size, write_ms, read_ms = _run(codec, documents, tmp)
+            baseline = baseline or size
+            print(
+                f"{codec:>7} {size / 1024 / 1024:>8.1f} {baseline / size:>5.1f}x "
+                f"{write_ms:>9.3f} {read_ms:>8.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+PDF extraction throughput benchmark.
+
+Runs many concurrent `extract_text_from_pdf` calls through the extraction
+process pool at increasing worker counts and reports PDFs/second, showing how
+import throughput scales with cores.
+
+    python benchmarks/bench_pdf_extraction.py --pages 8 --jobs 48
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+from pathlib import Path
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pdf_import  # noqa: E402
+from pdf_workers import ProcessWorkerPool  # noqa: E402
+
+
+def build_text_pdf(pages: int, lines_per_page: int = 45) -> bytes:
+    """Build an uncompressed multi-page text PDF without extra dependencies."""
+    objects: list[str] = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "",  # page tree, filled in below
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids: list[str] = []
+    for page_number in range(pages):
+        lines = " ".join(
+            f"(Page {page_number + 1} line {line}: Led migration of billing services, "
+            f"cut p99 latency by {line}%.) '"
+            for line in range(lines_per_page)
+        )
+        stream = f"BT /F1 10 Tf 40 760 Td 12 TL {lines} ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        content_ref = len(objects)
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_ref} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+
+    out = b"%PDF-1.4\n"
+    offsets: list[int] = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref_at = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref_at}\n%%EOF\n"
+    ).encode()
+    return out
+
+
+async def _run(pdf_bytes: bytes, jobs: int) -> float:
+    started = time.perf_counter()
+    await asyncio.gather(*(pdf_import.extract_text_from_pdf(pdf_bytes) for _ in range(jobs)))
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=8)
+    parser.add_argument("--jobs", type=int, default=48)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="*",
+        default=None,
+        help="Worker counts to compare (0 = thread, no process pool).",
+    )
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    worker_counts = args.workers or [0] + sorted({1, 2, 4, cpus} & set(range(1, cpus + 1)))
+    pdf_bytes = build_text_pdf(args.pages)
+    print(f"{args.jobs} PDFs x {args.pages} pages ({len(pdf_bytes) / 1024:.0f} KiB each), {cpus} CPUs")
+    print(f"{'workers':>8} {'seconds':>9} {'PDFs/s':>9} {'speedup':>8}")
+
+    baseline: float | None = None
+    for workers in worker_counts:
+        pool = ProcessWorkerPool(max_workers=workers, timeout_seconds=120, max_jobs_per_worker=0)
+        pdf_import.pdf_extraction_pool = pool
+        try:
+            # Warm up: spawn workers and import pypdf before timing.
+            asyncio.run(_run(pdf_bytes, max(workers, 1)))
+            elapsed = asyncio.run(_run(pdf_bytes, args.jobs))
+        finally:
+            pool.shutdown()
+        throughput = args.jobs / elapsed
+        baseline = baseline or throughput
+        print(f"{workers:>8} {elapsed:>9.2f} {throughput:>9.1f} {throughput / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
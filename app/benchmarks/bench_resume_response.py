@@ -0,0 +1,86 @@
+"""
+Stored resume response benchmark.
+
+Serializes one large stored resume the way `GET /resumes/{id}` used to
+(`ResumeImportResponse` built from the decoded document, then validated and
+serialized again for `response_model`) and the way it does now (the stored
+JSON text with `resume_id` spliced in), and reports p50/p99 latency and the
+peak memory allocated per response:
+
+- `model`: decode + `ResumeImportResponse` + FastAPI response validation + `JSONResponse`.
+- `stored-bytes`: `decompress_json_bytes` + `main._stored_resume_response`.
+
+    python benchmarks/bench_resume_response.py --items 1000 --runs 200
+"""
+
+from __future__ import annotations
+
+import argparse
+from functools import partial
+import json
+from pathlib import Path
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_resume_validation import build_resume  # noqa: E402
+from database import compress_json, decompress_json, decompress_json_bytes  # noqa: E402
+from main import _stored_resume_response  # noqa: E402
+from resume_models import ResumeImportResponse, canonical_json_hash, validate_resume_form_values  # noqa: E402
+
+RESUME_ID = "bench-resume"
+
+
+def _model_response(stored: bytes) -> bytes:
+    response = ResumeImportResponse(resume_id=RESUME_ID, **decompress_json(stored))
+    # What FastAPI's serialize_response does for a response_model.
+    validated = ResumeImportResponse.model_validate(response.model_dump())
+    return JSONResponse(content=jsonable_encoder(validated)).body
+
+
+def _stored_bytes_response(stored: bytes, content_hash: str) -> bytes:
+    return _stored_resume_response(RESUME_ID, decompress_json_bytes(stored), content_hash).body
+
+
+def _measure(render: Callable[[bytes], bytes], stored: bytes, runs: int) -> tuple[float, float, int]:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        render(stored)
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    render(stored)
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    percentiles = statistics.quantiles(timings, n=100)
+    return statistics.median(timings) * 1000, percentiles[98] * 1000, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=1000, help="Items across multi-entry sections.")
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    document = validate_resume_form_values(build_resume(args.items)).model_dump()
+    stored = compress_json(document)
+    # Stored alongside the document, so it is not part of the measured work.
+    stored_bytes_response = partial(_stored_bytes_response, content_hash=canonical_json_hash(document))
+    assert json.loads(_model_response(stored)) == json.loads(stored_bytes_response(stored))
+    print(f"{args.items} items, {len(decompress_json_bytes(stored)) / 1024:.0f} KiB of JSON, {args.runs} runs")
+    print(f"{'path':>13} {'p50 ms':>8} {'p99 ms':>8} {'peak KiB':>9}")
+    for name, render in (("model", _model_response), ("stored-bytes", stored_bytes_response)):
+        p50, p99, peak = _measure(render, stored, args.runs)
+        print(f"{name:>13} {p50:>8.3f} {p99:>8.3f} {peak / 1024:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
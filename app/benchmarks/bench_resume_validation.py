@@ -0,0 +1,89 @@
+"""
+Resume validation microbenchmark.
+
+Validates synthetic resumes with many items per section two ways and reports
+the median time per document:
+
+- `two-pass`: `upgrade_resume_form_values` followed by
+  `ResumeFormValues.model_validate` (how `validate_resume_form_values` used to work).
+- `single-pass`: `validate_resume_form_values`, which upgrades and validates
+  in one walk over precompiled section specs.
+
+    python benchmarks/bench_resume_validation.py --items 200 --runs 50
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import statistics
+import sys
+import time
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from resume_models import (  # noqa: E402
+    ResumeFormValues,
+    upgrade_resume_form_values,
+    validate_resume_form_values,
+)
+from resume_schema import RESUME_SECTIONS, SINGLE_ENTRY_SECTION_KEYS  # noqa: E402
+
+
+def build_resume(items: int) -> dict:
+    per_section = max(1, items // (len(RESUME_SECTIONS) - len(SINGLE_ENTRY_SECTION_KEYS)))
+    sections = []
+    for section in RESUME_SECTIONS:
+        count = 1 if section.key in SINGLE_ENTRY_SECTION_KEYS else per_section
+        sections.append(
+            {
+                "sectionKey": section.key,
+                "items": [
+                    {
+                        "id": f"{section.key}-{index}",
+                        "values": {
+                            field.key: (
+                                "github.com/example" if field.key in ("github", "url") else f"{field.label} {index}"
+                            )
+                            for field in section.fields
+                        },
+                    }
+                    for index in range(count)
+                ],
+            }
+        )
+    return {"sections": sections}
+
+
+def _two_pass(document: dict) -> Any:
+    return ResumeFormValues.model_validate(upgrade_resume_form_values(document))
+
+
+def _median_ms(validate: Callable[[dict], Any], document: dict, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        validate(document)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=200, help="Items across multi-entry sections.")
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    document = build_resume(args.items)
+    assert _two_pass(document).model_dump() == validate_resume_form_values(document).model_dump()
+
+    two_pass = _median_ms(_two_pass, document, args.runs)
+    single_pass = _median_ms(validate_resume_form_values, document, args.runs)
+    print(f"{args.items} items, median of {args.runs} runs")
+    print(f"{'two-pass':>12} {two_pass:>8.3f} ms")
+    print(f"{'single-pass':>12} {single_pass:>8.3f} ms  ({two_pass / single_pass:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
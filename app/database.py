@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import json
+import os
+from typing import Any
+import zlib
+
+from sqlalchemy import DateTime, LargeBinary, Text, cast, event, func, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.types import TypeDecorator
+
+DEFAULT_DATABASE_URL = "sqlite:///./app.db"
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+# Compressed values start with a NUL byte, which JSON text never does, followed
+# by a one-byte codec id. Anything else is a legacy uncompressed JSON value.
+COMPRESSED_JSON_MARKER = b"\x00"
+ZLIB_CODEC = b"z"
+ZSTD_CODEC = b"s"
+
+
+def _zstd() -> Any:
+    try:
+        import zstandard  # type: ignore
+    except Exception as exc:  # pragma: no cover
+        raise RuntimeError("zstd JSON compression requires `zstandard`.") from exc
+    return zstandard
+
+
+def compress_json(value: Any, codec: str = "zlib") -> bytes:
+    raw = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if codec == "zstd":
+        return COMPRESSED_JSON_MARKER + ZSTD_CODEC + _zstd().ZstdCompressor(level=6).compress(raw)
+    return COMPRESSED_JSON_MARKER + ZLIB_CODEC + zlib.compress(raw, 6)
+
+
+def decompress_json_bytes(stored: bytes | str) -> bytes:
+    """Return the stored value's UTF-8 JSON text without parsing it."""
+    if isinstance(stored, str):
+        return stored.encode("utf-8")
+    stored = bytes(stored)
+    if not stored.startswith(COMPRESSED_JSON_MARKER):
+        return stored
+    codec, payload = stored[1:2], stored[2:]
+    if codec == ZLIB_CODEC:
+        return zlib.decompress(payload)
+    if codec == ZSTD_CODEC:
+        return _zstd().ZstdDecompressor().decompress(payload)
+    raise ValueError(f"Unknown JSON compression codec: {codec!r}")
+
+
+def decompress_json(stored: bytes | str) -> Any:
+    return json.loads(decompress_json_bytes(stored))
+
+
+class CompressedJSON(TypeDecorator):
+    """
+    JSON document column stored as compressed bytes.
+
+    Values are written with `JSON_COMPRESSION` (`zlib`, the default, or
+    `zstd`) behind a format marker, and rows written before compression (plain
+    JSON text) still read. Python `None` is stored as SQL NULL. On Postgres the
+    column is plain JSONB, which TOAST already compresses.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect: Any) -> Any:
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(JSONB())
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value: Any, dialect: Any) -> Any:
+        if value is None or dialect.name == "postgresql":
+            return value
+        return compress_json(value, os.environ.get("JSON_COMPRESSION", "zlib"))
+
+    def process_result_value(self, value: Any, dialect: Any) -> Any:
+        if value is None or dialect.name == "postgresql":
+            return value
+        return decompress_json(value)
+
+
+def undecoded_json(column: Any, dialect_name: str) -> Any:
+    """
+    Select a `CompressedJSON` column without parsing it.
+
+    Pass the value to `decompress_json_bytes` to get its JSON text: SQLite
+    returns the stored bytes, and Postgres renders the JSONB as text itself.
+    """
+    if dialect_name == "postgresql":
+        return cast(column, Text)
+    return type_coerce(column, LargeBinary())
+
+
+class precise_now(FunctionElement):
+    """
+    `now()` as a server default that stores the same text SQLAlchemy binds.
+
+    SQLite's CURRENT_TIMESTAMP stores `2026-03-01 12:00:00`, while bound
+    datetimes are `2026-03-01 12:00:00.000000`. Text comparison of mixed
+    formats breaks keyset pagination, so on SQLite the default is rendered in
+    the bound format (millisecond precision). Other backends use `now()`.
+    """
+
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(precise_now)
+def _compile_precise_now(element: precise_now, compiler: Any, **kw: Any) -> str:
+    return compiler.process(func.now(), **kw)
+
+
+@compiles(precise_now, "sqlite")
+def _compile_precise_now_sqlite(element: precise_now, compiler: Any, **kw: Any) -> str:
+    return "(strftime('%Y-%m-%d %H:%M:%f', 'now') || '000')"
+
+
+def async_database_url(url: str) -> str:
+    """
+    Map a plain database URL onto its async driver.
+
+    `sqlite:///./app.db` becomes `sqlite+aiosqlite:///./app.db` and
+    `postgresql://...` becomes `postgresql+asyncpg://...`; URLs that already
+    name a driver are returned unchanged.
+    """
+    parsed = make_url(url)
+    if "+" in parsed.drivername:
+        return url
+    driver = ASYNC_DRIVERS.get(parsed.drivername)
+    if driver is None:
+        raise ValueError(f"Unsupported database backend: {parsed.drivername}")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+@dataclass(frozen=True)
+class SqliteSettings:
+    """
+    Connection pragmas applied to every new SQLite connection.
+
+    WAL lets readers proceed while a writer commits, and `busy_timeout` makes
+    concurrent writers wait for the lock instead of failing with
+    "database is locked". `synchronous=NORMAL` is durable under WAL except
+    for the last transactions before a power loss.
+    """
+
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    busy_timeout_ms: int = 5000
+    mmap_size: int = 256 * 1024 * 1024
+    # Negative values are KiB, per SQLite's cache_size convention.
+    cache_size: int = -64 * 1024
+    # SQLite only enforces foreign keys (and ON DELETE CASCADE) when asked to.
+    foreign_keys: bool = True
+
+    @classmethod
+    def from_env(cls) -> SqliteSettings:
+        return cls(
+            journal_mode=os.environ.get("SQLITE_JOURNAL_MODE", cls.journal_mode),
+            synchronous=os.environ.get("SQLITE_SYNCHRONOUS", cls.synchronous),
+            busy_timeout_ms=int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", cls.busy_timeout_ms)),
+            mmap_size=int(os.environ.get("SQLITE_MMAP_SIZE", cls.mmap_size)),
+            cache_size=int(os.environ.get("SQLITE_CACHE_SIZE", cls.cache_size)),
+        )
+
+    def pragmas(self, *, in_memory: bool = False) -> list[str]:
+        statements = [
+            f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}",
+            f"PRAGMA synchronous={self.synchronous}",
+            f"PRAGMA cache_size={int(self.cache_size)}",
+            f"PRAGMA mmap_size={int(self.mmap_size)}",
+            f"PRAGMA foreign_keys={'ON' if self.foreign_keys else 'OFF'}",
+        ]
+        if not in_memory:
+            # journal_mode is persistent per database file; in-memory databases ignore WAL.
+            statements.insert(0, f"PRAGMA journal_mode={self.journal_mode}")
+        return statements
+
+
+def install_sqlite_pragmas(engine: AsyncEngine, settings: SqliteSettings) -> None:
+    in_memory = engine.url.database in (None, "", ":memory:")
+    pragmas = settings.pragmas(in_memory=in_memory)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _apply_pragmas(dbapi_connection: Any, _connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def create_database_engine(
+    url: str | None = None,
+    *,
+    sqlite_settings: SqliteSettings | None = None,
+    **engine_kwargs: Any,
+) -> AsyncEngine:
+    """
+    Build the application's async engine from `DATABASE_URL` and friends.
+
+    - SQLite gets `SqliteSettings` pragmas on every connection.
+    - Postgres gets a sized, pre-pinged connection pool
+      (`DATABASE_POOL_SIZE`, `DATABASE_MAX_OVERFLOW`).
+    """
+    url = async_database_url(url or os.environ.get("DATABASE_URL", DEFAULT_DATABASE_URL))
+    backend = make_url(url).get_backend_name()
+    if backend == "postgresql":
+        engine_kwargs.setdefault("pool_size", int(os.environ.get("DATABASE_POOL_SIZE", "10")))
+        engine_kwargs.setdefault("max_overflow", int(os.environ.get("DATABASE_MAX_OVERFLOW", "10")))
+        engine_kwargs.setdefault("pool_pre_ping", True)
+
+    engine = create_async_engine(url, **engine_kwargs)
+    if backend == "sqlite":
+        install_sqlite_pragmas(engine, sqlite_settings or SqliteSettings.from_env())
+    return engine
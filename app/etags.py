@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any
+
+from fastapi import Response, status
+
+# Responses may be cached by the browser but must be revalidated every time,
+# which is what turns an unchanged poll into a 304.
+CACHE_CONTROL = "private, no-cache"
+
+
+def strong_etag(*parts: Any) -> str:
+    """Quoted ETag for a representation identified by `parts`."""
+    raw = "\x1f".join("" if part is None else str(part) for part in parts)
+    return f'"{hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Whether an `If-None-Match` header matches `etag`.
+
+    Uses the weak comparison RFC 9110 prescribes for `If-None-Match`, so a
+    `W/` prefix added by a proxy still matches.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(",")
+    )
+
+
+def set_etag(response: Response, etag: str) -> Response:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
+
+
+def not_modified(etag: str) -> Response:
+    return set_etag(Response(status_code=status.HTTP_304_NOT_MODIFIED), etag)
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+import hashlib
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from session_logic import IdempotencyKey
+
+IDEMPOTENCY_KEY_TTL_SECONDS = float(os.environ.get("IDEMPOTENCY_KEY_TTL_SECONDS", str(24 * 3600)))
+# How long a retry waits for the original request before giving up with 409.
+IDEMPOTENCY_WAIT_SECONDS = float(os.environ.get("IDEMPOTENCY_WAIT_SECONDS", "120"))
+# An in-progress claim older than this is treated as abandoned (crashed worker).
+IDEMPOTENCY_LOCK_SECONDS = float(os.environ.get("IDEMPOTENCY_LOCK_SECONDS", "600"))
+IDEMPOTENCY_POLL_SECONDS = 0.25
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+# Only these headers are worth replaying (e.g. a 202's Location).
+_REPLAYED_HEADERS = ("location", "retry-after")
+# Errors that depend only on the request itself, so a retry would get the same
+# answer. Anything else (404/409 until a resume exists or is ready, 422 from
+# nondeterministic LLM output, 429, 5xx) releases the key so a retry runs again.
+_REPLAYED_ERROR_STATUSES = frozenset({400, 413, 415})
+
+
+def _replayable(status_code: int) -> bool:
+    return 200 <= status_code < 300 or status_code in _REPLAYED_ERROR_STATUSES
+
+
+@dataclass
+class _Completion:
+    loop: asyncio.AbstractEventLoop
+    event: asyncio.Event
+
+
+# Same-process retries wake as soon as the original finishes instead of polling.
+_completions: dict[tuple[str, str], _Completion] = {}
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def request_fingerprint(*parts: str | bytes) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, bytes) else part.encode("utf-8")
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def _stored_response(result: Any) -> dict[str, Any]:
+    if isinstance(result, Response):
+        return {
+            "status_code": result.status_code,
+            "headers": {
+                name: value for name, value in result.headers.items() if name in _REPLAYED_HEADERS
+            },
+            "body": json.loads(result.body) if result.body else None,
+        }
+    return {"status_code": status.HTTP_200_OK, "headers": {}, "body": jsonable_encoder(result)}
+
+
+def _replay(stored: dict[str, Any]) -> JSONResponse:
+    return JSONResponse(
+        status_code=stored["status_code"],
+        content=stored["body"],
+        headers={**stored["headers"], "Idempotent-Replayed": "true"},
+    )
+
+
+async def _claim(bind: AsyncEngine, user_email: str, key: str, fingerprint: str) -> bool:
+    now = _utcnow()
+    try:
+        async with bind.begin() as conn:
+            await conn.execute(
+                insert(IdempotencyKey).values(
+                    user_email=user_email,
+                    key=key,
+                    fingerprint=fingerprint,
+                    status="in_progress",
+                    created_at=now,
+                    expires_at=now + timedelta(seconds=IDEMPOTENCY_KEY_TTL_SECONDS),
+                )
+            )
+    except IntegrityError:
+        return False
+    return True
+
+
+async def _load(bind: AsyncEngine, user_email: str, key: str) -> Any:
+    async with bind.connect() as conn:
+        return (
+            await conn.execute(
+                select(
+                    IdempotencyKey.fingerprint,
+                    IdempotencyKey.status,
+                    IdempotencyKey.response,
+                    IdempotencyKey.created_at,
+                    IdempotencyKey.expires_at,
+                ).where(IdempotencyKey.user_email == user_email, IdempotencyKey.key == key)
+            )
+        ).first()
+
+
+async def _release(bind: AsyncEngine, user_email: str, key: str, *criteria: Any) -> None:
+    async with bind.begin() as conn:
+        await conn.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.user_email == user_email, IdempotencyKey.key == key, *criteria
+            )
+        )
+
+
+async def _complete(bind: AsyncEngine, user_email: str, key: str, stored: dict[str, Any]) -> None:
+    async with bind.begin() as conn:
+        await conn.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.user_email == user_email, IdempotencyKey.key == key)
+            .values(status="completed", response=stored)
+        )
+
+
+async def _run_claimed(
+    bind: AsyncEngine, user_email: str, key: str, handler: Callable[[], Awaitable[Any]]
+) -> Any:
+    completion = _Completion(asyncio.get_running_loop(), asyncio.Event())
+    _completions[(user_email, key)] = completion
+    try:
+        try:
+            result = await handler()
+        except HTTPException as exc:
+            if not _replayable(exc.status_code):
+                await _release(bind, user_email, key)
+            else:
+                await _complete(
+                    bind,
+                    user_email,
+                    key,
+                    {
+                        "status_code": exc.status_code,
+                        "headers": dict(exc.headers or {}),
+                        "body": {"detail": jsonable_encoder(exc.detail)},
+                    },
+                )
+            raise
+        except BaseException:
+            await asyncio.shield(_release(bind, user_email, key))
+            raise
+        stored = _stored_response(result)
+        if _replayable(stored["status_code"]):
+            await _complete(bind, user_email, key, stored)
+        else:
+            await _release(bind, user_email, key)
+        return result
+    finally:
+        completion.event.set()
+        if _completions.get((user_email, key)) is completion:
+            del _completions[(user_email, key)]
+
+
+async def _wait_for_completion(user_email: str, key: str, timeout: float) -> None:
+    completion = _completions.get((user_email, key))
+    if completion is not None and completion.loop is asyncio.get_running_loop():
+        try:
+            await asyncio.wait_for(completion.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+    else:
+        await asyncio.sleep(min(IDEMPOTENCY_POLL_SECONDS, timeout))
+
+
+async def run_idempotent(
+    bind: AsyncEngine,
+    *,
+    user_email: str,
+    key: str | None,
+    fingerprint: str,
+    handler: Callable[[], Awaitable[Any]],
+) -> Any:
+    """
+    Run `handler` at most once per (user, `Idempotency-Key`) within the TTL.
+
+    - The first request claims the key, runs, and stores its response if it
+      is a success or an error that depends only on the request (400, 413,
+      415); any other failure releases the key so a retry runs again.
+    - A retry of a completed request gets the stored response replayed with
+      `Idempotent-Replayed: true`.
+    - A retry arriving while the original is still running waits for it
+      (up to IDEMPOTENCY_WAIT_SECONDS) instead of starting a second run.
+    - Reusing a key for a different request is a 422.
+    """
+    if key is None:
+        return await handler()
+    if not key or len(key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be 1-{MAX_IDEMPOTENCY_KEY_LENGTH} characters.",
+        )
+
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        if await _claim(bind, user_email, key, fingerprint):
+            return await _run_claimed(bind, user_email, key, handler)
+
+        record = await _load(bind, user_email, key)
+        if record is None:
+            # Released between our insert and read; claim it again.
+            continue
+        now = _utcnow()
+        if record.expires_at <= now or (
+            record.status == "in_progress"
+            and record.created_at <= now - timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS)
+        ):
+            await _release(bind, user_email, key, IdempotencyKey.created_at == record.created_at)
+            continue
+        if record.fingerprint != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail="Idempotency-Key was already used for a different request.",
+            )
+        if record.status == "completed":
+            return _replay(record.response)
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress.",
+                headers={"Retry-After": "1"},
+            )
+        await _wait_for_completion(user_email, key, remaining)
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+import logging
+import os
+from typing import Literal
+import uuid
+
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession as DBSession
+
+from pdf_import import import_resume_from_pdf_bytes
+from session_logic import ImportJob, Resume, new_resume_id, store_resume_document
+
+logger = logging.getLogger(__name__)
+
+ImportJobStatus = Literal["queued", "extracting", "llm", "validating", "done", "failed"]
+
+
+class ImportJobResponse(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    job_id: str
+    status: ImportJobStatus
+    resume_id: str | None = None
+    error: str | None = None
+
+
+def import_job_response(job: ImportJob) -> ImportJobResponse:
+    return ImportJobResponse(
+        job_id=job.id,
+        status=job.status,
+        resume_id=job.resume_id,
+        error=job.error,
+    )
+
+
+@dataclass(frozen=True)
+class PendingImportJob:
+    job_id: str
+    user_email: str
+    openai_key: str
+    pdf_bytes: bytes
+    bind: AsyncEngine | AsyncConnection
+
+
+class ImportQueueFull(Exception):
+    pass
+
+
+async def _update_job(bind: AsyncEngine | AsyncConnection, job_id: str, **values: object) -> None:
+    async with DBSession(bind=bind) as db:
+        job = await db.get(ImportJob, job_id)
+        if job is None:
+            return
+        for key, value in values.items():
+            setattr(job, key, value)
+        await db.commit()
+
+
+async def run_import_job(pending: PendingImportJob) -> None:
+    """Run one queued import to completion, recording each stage on the job row."""
+
+    async def on_stage(stage: str) -> None:
+        await _update_job(pending.bind, pending.job_id, status=stage)
+
+    try:
+        resume = await import_resume_from_pdf_bytes(
+            pending.pdf_bytes, pending.openai_key, on_stage=on_stage
+        )
+    except (ValueError, RuntimeError) as exc:
+        await _update_job(pending.bind, pending.job_id, status="failed", error=str(exc))
+        return
+    except Exception:
+        logger.exception("PDF import job %s crashed", pending.job_id)
+        await _update_job(
+            pending.bind,
+            pending.job_id,
+            status="failed",
+            error="Import failed unexpectedly. Please try again.",
+        )
+        return
+
+    resume_id = new_resume_id()
+    async with DBSession(bind=pending.bind) as db:
+        row = Resume(id=resume_id, user_email=pending.user_email)
+        store_resume_document(row, resume.model_dump())
+        db.add(row)
+        job = await db.get(ImportJob, pending.job_id)
+        if job is not None:
+            job.status = "done"
+            job.resume_id = resume_id
+        await db.commit()
+
+
+class ImportJobPool:
+    """
+    Bounded pool of asyncio workers draining a bounded queue of PDF imports.
+
+    `max_workers` caps concurrent imports (and therefore concurrent LLM calls);
+    `max_pending` caps buffered uploads so memory stays bounded under load.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int) -> None:
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._queue: asyncio.Queue[PendingImportJob] | None = None
+        self._workers: list[asyncio.Task[None]] = []
+
+    @property
+    def started(self) -> bool:
+        return bool(self._workers)
+
+    def start(self) -> None:
+        if self.started:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"pdf-import-worker-{index}")
+            for index in range(self.max_workers)
+        ]
+
+    async def stop(self) -> None:
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._queue = None
+
+    def submit(self, pending: PendingImportJob) -> None:
+        self.start()
+        assert self._queue is not None
+        try:
+            self._queue.put_nowait(pending)
+        except asyncio.QueueFull as exc:
+            raise ImportQueueFull() from exc
+
+    async def _worker(self) -> None:
+        assert self._queue is not None
+        queue = self._queue
+        while True:
+            pending = await queue.get()
+            try:
+                await run_import_job(pending)
+            finally:
+                queue.task_done()
+
+
+import_job_pool = ImportJobPool(
+    max_workers=int(os.environ.get("IMPORT_JOB_WORKERS", "4")),
+    max_pending=int(os.environ.get("IMPORT_JOB_MAX_PENDING", "64")),
+)
+
+
+async def create_import_job(db: DBSession, user_email: str) -> ImportJob:
+    job = ImportJob(id=str(uuid.uuid4()), user_email=user_email, status="queued")
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return job
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+import json
+import os
+from typing import Any, AsyncIterator
+
+import httpx
+
+OPENAI_API_BASE_URL = "https://api.openai.com"
+OPENAI_CHAT_COMPLETIONS_PATH = "/v1/chat/completions"
+OPENAI_MODELS_PATH = "/v1/models"
+
+_client: httpx.AsyncClient | None = None
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.environ.get(name)
+    if raw is None or not raw.strip():
+        return default
+    return int(raw)
+
+
+def create_llm_client() -> httpx.AsyncClient:
+    """
+    Build the shared OpenAI HTTP client.
+
+    One pooled HTTP/2 client is reused for every request so calls share
+    TLS sessions and keep-alive connections instead of paying a handshake
+    each time. Per-call timeouts are passed at request time.
+    """
+    limits = httpx.Limits(
+        max_connections=_env_int("OPENAI_MAX_CONNECTIONS", 100),
+        max_keepalive_connections=_env_int("OPENAI_MAX_KEEPALIVE_CONNECTIONS", 20),
+        keepalive_expiry=30.0,
+    )
+    return httpx.AsyncClient(
+        base_url=os.environ.get("OPENAI_API_BASE_URL", OPENAI_API_BASE_URL),
+        http2=True,
+        limits=limits,
+        timeout=httpx.Timeout(60.0, connect=10.0),
+    )
+
+
+def get_llm_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it lazily outside of the app lifespan."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_llm_client()
+    return _client
+
+
+async def close_llm_client() -> None:
+    global _client
+    client, _client = _client, None
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
+@asynccontextmanager
+async def llm_client_lifespan() -> AsyncIterator[httpx.AsyncClient]:
+    """Open the shared client for the lifetime of the application."""
+    client = get_llm_client()
+    try:
+        yield client
+    finally:
+        await close_llm_client()
+
+
+def _error_details(response: httpx.Response) -> str:
+    details = response.text
+    if len(details) > 500:
+        details = details[:500] + "…"
+    return details
+
+
+async def list_models(openai_api_key: str, *, timeout: float = 5.0) -> httpx.Response:
+    return await get_llm_client().get(
+        OPENAI_MODELS_PATH,
+        headers={"Authorization": f"Bearer {openai_api_key}"},
+        timeout=timeout,
+    )
+
+
+async def stream_chat_completion(
+    openai_api_key: str, payload: dict[str, Any], *, timeout: float
+) -> AsyncIterator[str]:
+    """
+    POST a streaming chat completion and yield message content deltas as they arrive.
+
+    Mirrors `request_chat_completion_json`: a 400 with `response_format` set is
+    retried once without it.
+    """
+    client = get_llm_client()
+    headers = {"Authorization": f"Bearer {openai_api_key}"}
+    payload = {**payload, "stream": True}
+    try:
+        for attempt in range(2):
+            async with client.stream(
+                "POST",
+                OPENAI_CHAT_COMPLETIONS_PATH,
+                json=payload,
+                headers=headers,
+                timeout=timeout,
+            ) as response:
+                if (
+                    response.status_code == 400
+                    and attempt == 0
+                    and "response_format" in payload
+                ):
+                    payload = {k: v for k, v in payload.items() if k != "response_format"}
+                    continue
+                if response.status_code != 200:
+                    await response.aread()
+                    raise RuntimeError(
+                        f"OpenAI request failed with status {response.status_code}: "
+                        f"{_error_details(response)}"
+                    )
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        return
+                    try:
+                        chunk = json.loads(data)
+                    except json.JSONDecodeError:
+                        continue
+                    choices = chunk.get("choices") or [{}]
+                    delta = choices[0].get("delta") or {}
+                    content = delta.get("content")
+                    if isinstance(content, str) and content:
+                        yield content
+                return
+    except httpx.HTTPError as exc:
+        raise RuntimeError(f"OpenAI request failed: {exc}") from exc
+
+
+async def request_chat_completion_json(
+    openai_api_key: str, payload: dict[str, Any], *, timeout: float
+) -> dict[str, Any]:
+    """
+    POST a chat completion and return the message content parsed as a JSON object.
+
+    If the request is rejected with a 400 while `response_format` is set, it is
+    retried once without it (some models/accounts do not support it).
+    """
+    client = get_llm_client()
+    headers = {"Authorization": f"Bearer {openai_api_key}"}
+    try:
+        response = await client.post(
+            OPENAI_CHAT_COMPLETIONS_PATH, json=payload, headers=headers, timeout=timeout
+        )
+
+        if response.status_code == 400 and "response_format" in payload:
+            payload = {k: v for k, v in payload.items() if k != "response_format"}
+            response = await client.post(
+                OPENAI_CHAT_COMPLETIONS_PATH, json=payload, headers=headers, timeout=timeout
+            )
+    except httpx.HTTPError as exc:
+        raise RuntimeError(f"OpenAI request failed: {exc}") from exc
+
+    if response.status_code != 200:
+        raise RuntimeError(
+            f"OpenAI request failed with status {response.status_code}: {_error_details(response)}"
+        )
+
+    data = response.json()
+    content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+    if not isinstance(content, str) or not content.strip():
+        raise RuntimeError("OpenAI returned empty content")
+
+    try:
+        parsed = json.loads(content)
+    except json.JSONDecodeError as exc:
+        raise ValueError("LLM output was not valid JSON") from exc
+
+    if not isinstance(parsed, dict):
+        raise ValueError("LLM output must be a JSON object")
+    return parsed
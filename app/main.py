@@ -1,37 +1,101 @@
+from contextlib import asynccontextmanager
+import json
+from typing import Literal
 import uuid
 
-from fastapi import Depends, FastAPI, File, Header, HTTPException, UploadFile, status
+from fastapi import Depends, FastAPI, File, Header, HTTPException, Query, UploadFile, status
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session as DBSession
-
-from pdf_import import MAX_PDF_BYTES, import_resume_from_pdf_bytes
-from resume_analysis import ResumeAnalysisResponse, analyze_resume_snapshot, openai_analysis_model
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic_core import to_json
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession as DBSession
+
+from database import decompress_json_bytes, undecoded_json
+from etags import etag_matches, not_modified, set_etag, strong_etag
+from idempotency import request_fingerprint, run_idempotent
+from import_jobs import (
+    ImportJobResponse,
+    ImportQueueFull,
+    PendingImportJob,
+    create_import_job,
+    import_job_pool,
+    import_job_response,
+)
+from llm_client import llm_client_lifespan
+from maintenance import maintenance_scheduler
+from pagination import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT, encode_cursor, newest_first_after
+from pdf_import import (
+    MAX_PDF_BYTES,
+    import_resume_from_pdf_bytes,
+    pdf_extraction_pool,
+    pdf_extraction_stats,
+    pdf_import_cache,
+)
+from resume_analysis import (
+    PROMPT_VERSION as ANALYSIS_PROMPT_VERSION,
+    AnalysisIssueCounts,
+    ResumeAnalysisListResponse,
+    ResumeAnalysisResponse,
+    ResumeAnalysisResult,
+    ResumeAnalysisSummary,
+    ResumeSectionAnalysis,
+    analyze_resume_snapshot,
+    openai_analysis_model,
+    stream_resume_analysis,
+)
 from resume_models import (
     ResumeFormValues,
     ResumeFormValuesInput,
     ResumeImportResponse,
     ResumeListItem,
     ResumeListResponse,
+    ResumePatchInput,
+    ResumePatchResponse,
     ResumeSchemaResponse,
+    apply_resume_patch,
+    canonical_json_hash,
     upgrade_resume_form_values,
     validate_resume_form_values,
 )
-from resume_schema import resume_schema_for_client
+from resume_schema import (
+    RESUME_CLIENT_SCHEMA_VERSION,
+    RESUME_SCHEMA_VERSION,
+    resume_schema_for_client,
+)
 from session_logic import (
+    AuthenticatedSession,
+    ImportJob,
     Resume,
     ResumeAnalysis,
     SessionCreate,
     SessionResponse,
-    UserSession,
     UserResponse,
     create_session as create_session_logic,
+    engine,
     get_db,
     logout_session,
     new_resume_id,
+    openai_key_validation_cache,
     require_session_token,
+    session_token_cache,
+    store_resume_document,
 )
+from snapshots import retain_snapshot
 
-app = FastAPI(title="Zepp.ai Backend")
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    async with llm_client_lifespan():
+        import_job_pool.start()
+        maintenance_scheduler.start(engine)
+        try:
+            yield
+        finally:
+            await maintenance_scheduler.stop()
+            await import_job_pool.stop()
+            pdf_extraction_pool.shutdown()
+
+
+app = FastAPI(title="Zepp.ai Backend", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -54,26 +118,40 @@ async def root():
     return {"status": "success", "message": "Zepp.ai API is running"}
 
 
+@app.get("/metrics")
+async def metrics():
+    return {
+        "pdf_import_cache": pdf_import_cache.stats(),
+        "pdf_extraction": pdf_extraction_stats.stats(),
+        "session_token_cache": session_token_cache.stats(),
+        "openai_key_validation_cache": openai_key_validation_cache.stats(),
+        "maintenance": maintenance_scheduler.last_report,
+    }
+
+
 @app.get("/user", response_model=UserResponse)
-async def get_user(session: UserSession = Depends(require_session_token)):
+async def get_user(session: AuthenticatedSession = Depends(require_session_token)):
     """Return the active session user's email."""
     return UserResponse(email=session.email)
 
 @app.get("/session-status-check")
-async def session_status_check(_session: UserSession = Depends(require_session_token)):
+async def session_status_check(_session: AuthenticatedSession = Depends(require_session_token)):
     return {"status": "success", "message": "ok"}
 
 
+RESUME_SCHEMA_ETAG = strong_etag(RESUME_CLIENT_SCHEMA_VERSION)
+
+
 @app.get("/resume/schema", response_model=ResumeSchemaResponse)
-async def get_resume_schema():
+async def get_resume_schema(
+    response: Response, if_none_match: str | None = Header(default=None)
+):
+    if etag_matches(if_none_match, RESUME_SCHEMA_ETAG):
+        return not_modified(RESUME_SCHEMA_ETAG)
+    set_etag(response, RESUME_SCHEMA_ETAG)
     return ResumeSchemaResponse(sections=resume_schema_for_client())
 
-@app.post("/resume/import/pdf", response_model=ResumeImportResponse)
-async def import_resume_pdf(
-    file: UploadFile = File(...),
-    session: UserSession = Depends(require_session_token),
-    db: DBSession = Depends(get_db),
-):
+async def _read_pdf_upload(file: UploadFile) -> bytes:
     filename = (file.filename or "").lower()
     is_pdf_name = filename.endswith(".pdf")
     is_pdf_type = file.content_type in ("application/pdf", "application/x-pdf")
@@ -96,14 +174,73 @@ async def import_resume_pdf(
                 detail="PDF file is too large (max 10 MB).",
             )
         chunks.append(chunk)
+    return b"".join(chunks)
+
+
+@app.post(
+    "/resume/import/pdf",
+    response_model=ResumeImportResponse,
+    responses={status.HTTP_202_ACCEPTED: {"model": ImportJobResponse}},
+)
+async def import_resume_pdf(
+    file: UploadFile = File(...),
+    mode: Literal["sync", "job"] = "sync",
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+    session: AuthenticatedSession = Depends(require_session_token),
+    db: DBSession = Depends(get_db),
+):
+    """
+    Import a PDF resume, synchronously or as a background job (`mode=job`).
+
+    Send an `Idempotency-Key` header to make retries safe: a retry replays the
+    first response instead of importing (and paying for the LLM call) again.
+    """
+    pdf_bytes = await _read_pdf_upload(file)
+    return await run_idempotent(
+        db.bind,
+        user_email=session.email,
+        key=idempotency_key,
+        fingerprint=request_fingerprint("POST /resume/import/pdf", mode, pdf_bytes),
+        handler=lambda: _import_resume_pdf(pdf_bytes, mode, session, db),
+    )
+
+
+async def _import_resume_pdf(
+    pdf_bytes: bytes, mode: str, session: AuthenticatedSession, db: DBSession
+):
+    if mode == "job":
+        job = await create_import_job(db, session.email)
+        try:
+            import_job_pool.submit(
+                PendingImportJob(
+                    job_id=job.id,
+                    user_email=session.email,
+                    openai_key=session.openai_key,
+                    pdf_bytes=pdf_bytes,
+                    bind=db.bind,
+                )
+            )
+        except ImportQueueFull as exc:
+            job.status = "failed"
+            job.error = "Import queue is full. Please try again shortly."
+            await db.commit()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=job.error,
+            ) from exc
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=import_job_response(job).model_dump(),
+            headers={"Location": f"/resume/import/jobs/{job.id}"},
+        )
 
     resume_id = new_resume_id()
     resume_entry = Resume(id=resume_id, user_email=session.email)
     db.add(resume_entry)
-    db.commit()
+    await db.commit()
 
     try:
-        resume = import_resume_from_pdf_bytes(b"".join(chunks), session.openai_key)
+        resume = await import_resume_from_pdf_bytes(pdf_bytes, session.openai_key)
     except ValueError as exc:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
@@ -115,100 +252,177 @@ async def import_resume_pdf(
             detail=str(exc),
         ) from exc
 
-    resume_entry.normalized_json = resume.model_dump()
+    store_resume_document(resume_entry, resume.model_dump())
     db.add(resume_entry)
-    db.commit()
+    await db.commit()
     return ResumeImportResponse(resume_id=resume_id, **resume.model_dump())
 
 
-def _resume_label(normalized_json: object | None, fallback_email: str) -> str:
-    if not isinstance(normalized_json, dict):
-        return fallback_email
-    sections = normalized_json.get("sections")
-    if not isinstance(sections, list) or not sections:
-        return fallback_email
-    personal = sections[0]
-    if not isinstance(personal, dict):
-        return fallback_email
-    items = personal.get("items")
-    if not isinstance(items, list) or not items:
-        return fallback_email
-    first_item = items[0]
-    if not isinstance(first_item, dict):
-        return fallback_email
-    values = first_item.get("values")
-    if not isinstance(values, dict):
-        return fallback_email
-    first = values.get("first-name")
-    last = values.get("last-name")
-    name = " ".join(part for part in [first, last] if isinstance(part, str) and part.strip()).strip()
-    return name or fallback_email
+@app.get("/resume/import/jobs/{job_id}", response_model=ImportJobResponse)
+async def get_import_job(
+    job_id: str,
+    session: AuthenticatedSession = Depends(require_session_token),
+    db: DBSession = Depends(get_db),
+):
+    job = await db.scalar(
+        select(ImportJob).where(ImportJob.id == job_id, ImportJob.user_email == session.email)
+    )
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import job not found.")
+    return import_job_response(job)
+
+
+async def _get_owned_resume(db: DBSession, resume_id: str, user_email: str) -> Resume | None:
+    return await db.scalar(
+        select(Resume).where(Resume.id == resume_id, Resume.user_email == user_email)
+    )
+
+
+def _keyset_page(query, created_at_column, id_column, cursor: str | None, limit: int):
+    if cursor is not None:
+        try:
+            query = query.where(newest_first_after(created_at_column, id_column, cursor))
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    # Fetch one extra row to learn whether another page exists.
+    return query.order_by(created_at_column.desc(), id_column.desc()).limit(limit + 1)
+
+
+def _next_cursor(rows: list, limit: int) -> str | None:
+    if len(rows) <= limit:
+        return None
+    last = rows[limit - 1]
+    return encode_cursor(last.created_at, last.id)
 
 
 @app.get("/resumes", response_model=ResumeListResponse)
 async def list_resumes(
-    session: UserSession = Depends(require_session_token),
+    response: Response,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    if_none_match: str | None = Header(default=None),
+    session: AuthenticatedSession = Depends(require_session_token),
     db: DBSession = Depends(get_db),
 ):
-    rows: list[Resume] = (
-        db.query(Resume)
-        .filter(Resume.user_email == session.email)
-        .order_by(Resume.created_at.desc())
-        .all()
+    """List the user's resumes newest first; pass `next_cursor` back as `cursor` for the next page."""
+    # Every insert and write stamps updated_at, and every delete lowers the
+    # count, so the pair changes whenever any listed row could have.
+    count, last_write = (
+        await db.execute(
+            select(func.count(), func.max(Resume.updated_at)).where(
+                Resume.user_email == session.email
+            )
+        )
+    ).one()
+    etag = strong_etag("resumes", count, last_write, cursor, limit)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    query = select(Resume.id, Resume.created_at, Resume.has_content, Resume.label).where(
+        Resume.user_email == session.email
     )
+    rows = (
+        await db.execute(_keyset_page(query, Resume.created_at, Resume.id, cursor, limit))
+    ).all()
     return ResumeListResponse(
         resumes=[
             ResumeListItem(
                 resume_id=row.id,
                 created_at=row.created_at,
-                has_content=row.normalized_json is not None,
-                label=_resume_label(row.normalized_json, session.email),
+                has_content=row.has_content,
+                label=row.label or session.email,
             )
-            for row in rows
-        ]
+            for row in rows[:limit]
+        ],
+        next_cursor=_next_cursor(rows, limit),
     )
 
 
+# Stored resumes are validated when written, so they are serialized straight
+# to JSON rather than rebuilt as ResumeImportResponse (whose validator would
+# run again) and re-checked against response_model by FastAPI. Field order
+# matches ResumeImportResponse: sections, then resume_id.
+
+
+def _resume_response(resume_id: str, document: dict, content_hash: str | None) -> Response:
+    response = Response(
+        content=to_json({"sections": document["sections"], "resume_id": resume_id}),
+        media_type="application/json",
+    )
+    if content_hash is None:
+        return response
+    return set_etag(response, strong_etag(content_hash))
+
+
+def _stored_resume_response(resume_id: str, document_json: bytes, content_hash: str) -> Response:
+    # document_json is a stored canonical document, i.e. {"sections": [...]}.
+    body = document_json.rstrip()
+    response = Response(
+        content=b"".join((body[:-1], b',"resume_id":', to_json(resume_id), b"}")),
+        media_type="application/json",
+    )
+    return set_etag(response, strong_etag(content_hash))
+
+
 @app.get("/resumes/{resume_id}", response_model=ResumeImportResponse)
 async def get_resume(
     resume_id: str,
-    session: UserSession = Depends(require_session_token),
+    if_none_match: str | None = Header(default=None),
+    session: AuthenticatedSession = Depends(require_session_token),
     db: DBSession = Depends(get_db),
 ):
-    row = (
-        db.query(Resume)
-        .filter(Resume.id == resume_id, Resume.user_email == session.email)
-        .first()
-    )
-    if row is None:
+    owned = (Resume.id == resume_id, Resume.user_email == session.email)
+    if if_none_match:
+        # Revalidation reads only the hash, never the document.
+        current = (
+            await db.execute(select(Resume.schema_version, Resume.content_hash).where(*owned))
+        ).first()
+        if (
+            current is not None
+            and current.content_hash is not None
+            and current.schema_version == RESUME_SCHEMA_VERSION
+            and etag_matches(if_none_match, strong_etag(current.content_hash))
+        ):
+            return not_modified(strong_etag(current.content_hash))
+
+    stored = (
+        await db.execute(
+            select(
+                Resume.schema_version,
+                Resume.content_hash,
+                undecoded_json(Resume.normalized_json, db.bind.dialect.name).label("document_json"),
+            ).where(*owned)
+        )
+    ).first()
+    if stored is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Resume not found.")
-    if row.normalized_json is None:
+    if stored.document_json is None:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Resume is not ready yet. Please re-import.",
         )
+    if stored.schema_version == RESUME_SCHEMA_VERSION and stored.content_hash is not None:
+        return _stored_resume_response(
+            resume_id, decompress_json_bytes(stored.document_json), stored.content_hash
+        )
 
-    upgraded = upgrade_resume_form_values(row.normalized_json)
-    if upgraded != row.normalized_json:
-        row.normalized_json = upgraded
-        db.add(row)
-        db.commit()
-
-    return ResumeImportResponse(resume_id=row.id, **upgraded)
+    row = await _get_owned_resume(db, resume_id, session.email)
+    document = upgrade_resume_form_values(row.normalized_json, resume_id=row.id)
+    store_resume_document(row, document)
+    db.add(row)
+    await db.commit()
+    return _resume_response(row.id, document, row.content_hash)
 
 
 @app.put("/resumes/{resume_id}", response_model=ResumeImportResponse)
 async def save_resume(
     resume_id: str,
     payload: ResumeFormValuesInput,
-    session: UserSession = Depends(require_session_token),
+    session: AuthenticatedSession = Depends(require_session_token),
     db: DBSession = Depends(get_db),
 ):
-    row = (
-        db.query(Resume)
-        .filter(Resume.id == resume_id, Resume.user_email == session.email)
-        .first()
-    )
+    row = await _get_owned_resume(db, resume_id, session.email)
     if row is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Resume not found.")
 
@@ -219,23 +433,27 @@ async def save_resume(
             status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
             detail=str(exc),
         ) from exc
-    row.normalized_json = validated.model_dump()
+    store_resume_document(row, validated.model_dump())
     db.add(row)
-    db.commit()
-    return ResumeImportResponse(resume_id=row.id, **row.normalized_json)
+    await db.commit()
+    return _resume_response(row.id, row.normalized_json, row.content_hash)
 
 
-@app.post("/resumes/{resume_id}/analysis", response_model=ResumeAnalysisResponse)
-async def analyze_resume(
+@app.patch("/resumes/{resume_id}", response_model=ResumePatchResponse)
+async def patch_resume(
     resume_id: str,
-    session: UserSession = Depends(require_session_token),
+    payload: ResumePatchInput,
+    session: AuthenticatedSession = Depends(require_session_token),
     db: DBSession = Depends(get_db),
 ):
-    row = (
-        db.query(Resume)
-        .filter(Resume.id == resume_id, Resume.user_email == session.email)
-        .first()
-    )
+    """
+    Apply item-level edits (`replace`, `insert`, `delete`, `move`) in order.
+
+    Only the touched sections are validated and returned, so an autosave of
+    one field costs about as much as that item. The operations apply
+    atomically: if any fails, nothing is stored.
+    """
+    row = await _get_owned_resume(db, resume_id, session.email)
     if row is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Resume not found.")
     if row.normalized_json is None:
@@ -244,22 +462,136 @@ async def analyze_resume(
             detail="Resume is not ready yet. Please re-import.",
         )
 
-    snapshot = upgrade_resume_form_values(row.normalized_json)
+    document = row.normalized_json
+    if row.schema_version != RESUME_SCHEMA_VERSION:
+        document = upgrade_resume_form_values(document, resume_id=row.id)
+    try:
+        document, sections = apply_resume_patch(document, payload.operations)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=str(exc),
+        ) from exc
+    store_resume_document(row, document)
+    db.add(row)
+    await db.commit()
+    return ResumePatchResponse(resume_id=row.id, sections=sections)
+
+
+async def _load_analysis_snapshot(db: DBSession, resume_id: str, session: AuthenticatedSession) -> dict:
+    row = await _get_owned_resume(db, resume_id, session.email)
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Resume not found.")
+    if row.normalized_json is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Resume is not ready yet. Please re-import.",
+        )
+    if row.schema_version == RESUME_SCHEMA_VERSION:
+        return row.normalized_json
+    return upgrade_resume_form_values(row.normalized_json, resume_id=row.id)
+
+
+async def _find_reusable_analysis(
+    db: DBSession, resume_id: str, session: AuthenticatedSession, snapshot_hash: str
+) -> ResumeAnalysis | None:
+    row = await db.scalar(
+        select(ResumeAnalysis)
+        .where(
+            ResumeAnalysis.resume_id == resume_id,
+            ResumeAnalysis.user_email == session.email,
+            ResumeAnalysis.snapshot_hash == snapshot_hash,
+            ResumeAnalysis.model == openai_analysis_model(),
+            ResumeAnalysis.prompt_version == ANALYSIS_PROMPT_VERSION,
+            ResumeAnalysis.error_count.isnot(None),
+        )
+        .order_by(ResumeAnalysis.created_at.desc())
+        .limit(1)
+    )
+    if row is None or not isinstance(row.analysis_json, dict):
+        return None
+    return row
+
+
+async def _start_resume_analysis(
+    db: DBSession, resume_id: str, session: AuthenticatedSession, snapshot: dict, snapshot_hash: str
+) -> ResumeAnalysis:
     analysis_id = str(uuid.uuid4())
+    await retain_snapshot(db, snapshot_hash, snapshot)
     analysis_entry = ResumeAnalysis(
         id=analysis_id,
-        resume_id=row.id,
+        resume_id=resume_id,
         user_email=session.email,
-        source_json=snapshot,
         analysis_json=None,
         model=openai_analysis_model(),
+        snapshot_hash=snapshot_hash,
+        prompt_version=ANALYSIS_PROMPT_VERSION,
     )
     db.add(analysis_entry)
-    db.commit()
-    db.refresh(analysis_entry)
+    await db.commit()
+    await db.refresh(analysis_entry)
+    return analysis_entry
+
+
+def _analysis_response(row: ResumeAnalysis) -> ResumeAnalysisResponse:
+    return ResumeAnalysisResponse(
+        analysis_id=row.id,
+        created_at=row.created_at,
+        model=row.model,
+        **row.analysis_json,
+    )
+
+
+async def _finish_resume_analysis(
+    db: DBSession, analysis_entry: ResumeAnalysis, analysis: ResumeAnalysisResult
+) -> ResumeAnalysisResponse:
+    analysis_entry.analysis_json = analysis.model_dump()
+    analysis_entry.model = openai_analysis_model()
+    db.add(analysis_entry)
+    await db.commit()
+    await db.refresh(analysis_entry)
+    return _analysis_response(analysis_entry)
+
+
+@app.post("/resumes/{resume_id}/analysis", response_model=ResumeAnalysisResponse)
+async def analyze_resume(
+    resume_id: str,
+    force: bool = False,
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+    session: AuthenticatedSession = Depends(require_session_token),
+    db: DBSession = Depends(get_db),
+):
+    """
+    Analyze the resume's current content.
+
+    If this exact snapshot was already analyzed with the current model and
+    prompt, the stored analysis is returned without an LLM call unless
+    `force=true` is passed. Retries sent with the same `Idempotency-Key`
+    replay the first response, waiting for it if it is still running.
+    """
+    return await run_idempotent(
+        db.bind,
+        user_email=session.email,
+        key=idempotency_key,
+        fingerprint=request_fingerprint(f"POST /resumes/{resume_id}/analysis", str(force)),
+        handler=lambda: _analyze_resume(resume_id, force, session, db),
+    )
+
+
+async def _analyze_resume(
+    resume_id: str, force: bool, session: AuthenticatedSession, db: DBSession
+) -> ResumeAnalysisResponse:
+    snapshot = await _load_analysis_snapshot(db, resume_id, session)
+    snapshot_hash = canonical_json_hash(snapshot)
+    if not force:
+        existing = await _find_reusable_analysis(db, resume_id, session, snapshot_hash)
+        if existing is not None:
+            return _analysis_response(existing)
+
+    analysis_entry = await _start_resume_analysis(db, resume_id, session, snapshot, snapshot_hash)
 
     try:
-        analysis = analyze_resume_snapshot(session.openai_key, snapshot)
+        analysis = await analyze_resume_snapshot(session.openai_key, snapshot)
     except ValueError as exc:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
@@ -271,64 +603,163 @@ async def analyze_resume(
             detail=str(exc),
         ) from exc
 
-    analysis_entry.analysis_json = analysis.model_dump()
-    analysis_entry.model = openai_analysis_model()
-    db.add(analysis_entry)
-    db.commit()
-    db.refresh(analysis_entry)
+    return await _finish_resume_analysis(db, analysis_entry, analysis)
 
-    return ResumeAnalysisResponse(
-        analysis_id=analysis_entry.id,
-        created_at=analysis_entry.created_at,
-        model=analysis_entry.model,
-        **analysis.model_dump(),
+
+def _sse_event(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+@app.post("/resumes/{resume_id}/analysis/stream")
+async def stream_analyze_resume(
+    resume_id: str,
+    force: bool = False,
+    session: AuthenticatedSession = Depends(require_session_token),
+    db: DBSession = Depends(get_db),
+):
+    """
+    Server-Sent Events variant of `POST /resumes/{id}/analysis`.
+
+    Emits a `section` event per validated `ResumeSectionAnalysis` as soon as it
+    is generated, then `complete` with the persisted `ResumeAnalysisResponse`
+    (or `error` with a `detail` message). A reusable stored analysis is
+    replayed through the same events.
+    """
+    snapshot = await _load_analysis_snapshot(db, resume_id, session)
+    snapshot_hash = canonical_json_hash(snapshot)
+    existing = (
+        None if force else await _find_reusable_analysis(db, resume_id, session, snapshot_hash)
+    )
+
+    async def replay(response: ResumeAnalysisResponse):
+        for section in response.sections:
+            yield _sse_event("section", section.model_dump_json())
+        yield _sse_event("complete", response.model_dump_json())
+
+    if existing is not None:
+        return StreamingResponse(
+            replay(_analysis_response(existing)),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    analysis_entry = await _start_resume_analysis(db, resume_id, session, snapshot, snapshot_hash)
+
+    async def events():
+        try:
+            async for event in stream_resume_analysis(session.openai_key, snapshot):
+                if isinstance(event, ResumeSectionAnalysis):
+                    yield _sse_event("section", event.model_dump_json())
+                    continue
+                response = await _finish_resume_analysis(db, analysis_entry, event)
+                yield _sse_event("complete", response.model_dump_json())
+        except (ValueError, RuntimeError) as exc:
+            yield _sse_event("error", json.dumps({"detail": str(exc)}))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
 @app.get("/resumes/{resume_id}/analysis/latest", response_model=ResumeAnalysisResponse)
 async def get_latest_resume_analysis(
     resume_id: str,
-    session: UserSession = Depends(require_session_token),
+    response: Response,
+    if_none_match: str | None = Header(default=None),
+    session: AuthenticatedSession = Depends(require_session_token),
     db: DBSession = Depends(get_db),
 ):
-    row = (
-        db.query(ResumeAnalysis)
-        .filter(
+    latest = (
+        select(ResumeAnalysis)
+        .where(
             ResumeAnalysis.resume_id == resume_id,
             ResumeAnalysis.user_email == session.email,
-            ResumeAnalysis.analysis_json.isnot(None),
+            ResumeAnalysis.error_count.isnot(None),
         )
         .order_by(ResumeAnalysis.created_at.desc())
-        .first()
+        .limit(1)
     )
+    if if_none_match:
+        # Completed analyses never change, so the newest id identifies the
+        # response; it comes from the completed-analyses index alone.
+        analysis_id = await db.scalar(latest.with_only_columns(ResumeAnalysis.id))
+        if analysis_id is not None and etag_matches(if_none_match, strong_etag(analysis_id)):
+            return not_modified(strong_etag(analysis_id))
+
+    row = await db.scalar(latest)
     if row is None or not isinstance(row.analysis_json, dict):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No analysis found for this resume.",
         )
-    return ResumeAnalysisResponse(
-        analysis_id=row.id,
-        created_at=row.created_at,
-        model=row.model,
-        **row.analysis_json,
+    set_etag(response, strong_etag(row.id))
+    return _analysis_response(row)
+
+
+@app.get("/resumes/{resume_id}/analyses", response_model=ResumeAnalysisListResponse)
+async def list_resume_analyses(
+    resume_id: str,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    session: AuthenticatedSession = Depends(require_session_token),
+    db: DBSession = Depends(get_db),
+):
+    """Completed analyses of a resume, newest first, as light summaries."""
+    owned = await db.scalar(
+        select(Resume.id).where(Resume.id == resume_id, Resume.user_email == session.email)
+    )
+    if owned is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Resume not found.")
+
+    query = select(
+        ResumeAnalysis.id,
+        ResumeAnalysis.model,
+        ResumeAnalysis.created_at,
+        ResumeAnalysis.info_count,
+        ResumeAnalysis.warning_count,
+        ResumeAnalysis.error_count,
+    ).where(
+        ResumeAnalysis.resume_id == resume_id,
+        ResumeAnalysis.user_email == session.email,
+        ResumeAnalysis.error_count.isnot(None),
+    )
+    rows = (
+        await db.execute(
+            _keyset_page(query, ResumeAnalysis.created_at, ResumeAnalysis.id, cursor, limit)
+        )
+    ).all()
+    return ResumeAnalysisListResponse(
+        analyses=[
+            ResumeAnalysisSummary(
+                analysis_id=row.id,
+                model=row.model,
+                created_at=row.created_at,
+                issue_counts=AnalysisIssueCounts(
+                    info=row.info_count, warning=row.warning_count, error=row.error_count
+                ),
+            )
+            for row in rows[:limit]
+        ],
+        next_cursor=_next_cursor(rows, limit),
     )
 
 
 @app.delete("/resumes/{resume_id}")
 async def delete_resume(
     resume_id: str,
-    session: UserSession = Depends(require_session_token),
+    session: AuthenticatedSession = Depends(require_session_token),
     db: DBSession = Depends(get_db),
 ):
-    row = (
-        db.query(Resume)
-        .filter(Resume.id == resume_id, Resume.user_email == session.email)
-        .first()
+    # Analyses go with the resume via ON DELETE CASCADE; their snapshots are
+    # released by the next maintenance run.
+    result = await db.execute(
+        delete(Resume).where(Resume.id == resume_id, Resume.user_email == session.email)
     )
-    if row is None:
+    if not result.rowcount:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Resume not found.")
-    db.delete(row)
-    db.commit()
+    await db.commit()
     return {"status": "success", "message": "Resume deleted"}
 
 @app.post(
@@ -339,7 +770,7 @@ async def create_session(
     payload: SessionCreate,
     db: DBSession = Depends(get_db),
 ):
-    return create_session_logic(payload, db)
+    return await create_session_logic(payload, db)
 
 
 @app.delete("/logout")
@@ -347,4 +778,4 @@ async def logout(
     db: DBSession = Depends(get_db),
     session_token: str | None = Header(default=None, alias="X-Session-Token"),
 ):
-    return logout_session(session_token, db)
+    return await logout_session(session_token, db)
@@ -0,0 +1,347 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime, time as clock_time, timedelta, timezone
+import logging
+import os
+import time
+from typing import Any
+
+from sqlalchemy import delete, exists, or_, select, text, update
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from resume_models import upgrade_resume_form_values
+from resume_schema import RESUME_SCHEMA_VERSION
+from session_logic import (
+    IdempotencyKey,
+    ImportJob,
+    Resume,
+    ResumeAnalysis,
+    ResumeSnapshot,
+    UserSession,
+    resume_summary_values,
+    session_expiry_criteria,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+# Sync imports insert the resume row, and analyses their placeholder row,
+# before the LLM call; give them this long to finish before a row still
+# without a result counts as failed. Import jobs get as long between stages.
+FAILED_IMPORT_GRACE_SECONDS = float(os.environ.get("FAILED_IMPORT_GRACE_SECONDS", "3600"))
+IMPORT_JOB_RETENTION_SECONDS = float(os.environ.get("IMPORT_JOB_RETENTION_SECONDS", str(7 * 86400)))
+FINISHED_IMPORT_JOB_STATUSES = ("done", "failed")
+# Pages released per incremental VACUUM step (SQLite).
+VACUUM_MAX_PAGES = int(os.environ.get("VACUUM_MAX_PAGES", "10000"))
+
+
+async def upgrade_stale_resumes(engine: AsyncEngine, *, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Upgrade every resume whose `schema_version` is not current (or that has no
+    `content_hash` yet), in chunks.
+
+    Rows are read through a server-side cursor (`yield_per`) on one connection
+    and written back one chunk per transaction on another, so memory stays
+    bounded and readers are never blocked by one long transaction. A row saved
+    after it was read is left alone. Returns the number of rows upgraded.
+    """
+    needs_upgrade = or_(
+        Resume.schema_version.is_(None),
+        Resume.schema_version != RESUME_SCHEMA_VERSION,
+        Resume.content_hash.is_(None),
+    )
+    stale = (
+        select(Resume.id, Resume.normalized_json, Resume.updated_at)
+        .where(Resume.normalized_json.isnot(None), needs_upgrade)
+        .order_by(Resume.id)
+        .execution_options(yield_per=batch_size)
+    )
+    upgraded = 0
+    async with engine.connect() as reader, engine.connect() as writer:
+        result = await reader.stream(stale)
+        async for rows in result.partitions():
+            async with writer.begin():
+                for row in rows:
+                    document = upgrade_resume_form_values(row.normalized_json, resume_id=row.id)
+                    # Skip rows saved since they were read; writing the upgraded
+                    # old document back would lose that save.
+                    result = await writer.execute(
+                        update(Resume)
+                        .where(
+                            Resume.id == row.id,
+                            needs_upgrade,
+                            Resume.updated_at.is_not_distinct_from(row.updated_at),
+                        )
+                        .values(
+                            normalized_json=document,
+                            schema_version=RESUME_SCHEMA_VERSION,
+                            **resume_summary_values(document),
+                        )
+                    )
+                    upgraded += result.rowcount
+            logger.info("Upgraded %d resumes to schema %s", upgraded, RESUME_SCHEMA_VERSION)
+    return upgraded
+
+
+async def collect_unreferenced_snapshots(
+    engine: AsyncEngine, *, batch_size: int = DEFAULT_BATCH_SIZE
+) -> int:
+    """
+    Delete snapshots no analysis references, `batch_size` at a time.
+
+    References are found with an indexed NOT EXISTS on
+    `resume_analyses.snapshot_hash`, so analyses removed by cascades or by
+    hand need no bookkeeping. Each batch re-checks for references in the same
+    statement, so a snapshot retained by an analysis created meanwhile
+    survives. Returns the number of snapshots deleted.
+    """
+    unreferenced = (
+        select(ResumeSnapshot.hash)
+        .where(~exists().where(ResumeAnalysis.snapshot_hash == ResumeSnapshot.hash))
+        .limit(batch_size)
+    )
+    deleted = 0
+    while True:
+        async with engine.begin() as conn:
+            result = await conn.execute(
+                delete(ResumeSnapshot).where(ResumeSnapshot.hash.in_(unreferenced))
+            )
+        if not result.rowcount:
+            break
+        deleted += result.rowcount
+        logger.info("Deleted %d unreferenced snapshots", deleted)
+    return deleted
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+async def _delete_in_batches(engine: AsyncEngine, key_column: Any, *criteria: Any, batch_size: int) -> int:
+    doomed = select(key_column).where(*criteria).limit(batch_size)
+    deleted = 0
+    while True:
+        async with engine.begin() as conn:
+            result = await conn.execute(delete(key_column.table).where(key_column.in_(doomed)))
+        if not result.rowcount:
+            return deleted
+        deleted += result.rowcount
+
+
+async def purge_expired_sessions(engine: AsyncEngine, *, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Delete sessions past their idle timeout or maximum age, `batch_size` at a time.
+
+    Requests already reject expired sessions, so this only reclaims rows (and
+    their index entries); no cache invalidation is needed.
+    """
+    return await _delete_in_batches(
+        engine,
+        UserSession.id,
+        or_(*session_expiry_criteria(_utcnow())),
+        batch_size=batch_size,
+    )
+
+
+async def fail_stalled_import_jobs(
+    engine: AsyncEngine, *, grace_seconds: float = FAILED_IMPORT_GRACE_SECONDS
+) -> int:
+    """
+    Mark import jobs that have not advanced for `grace_seconds` as failed.
+
+    Queued uploads live only in the worker's memory, so a restart or crash
+    strands their jobs mid-way; failing them tells pollers to re-upload, and
+    they are then purged like any other finished job. Returns the number of
+    jobs failed.
+    """
+    async with engine.begin() as conn:
+        result = await conn.execute(
+            update(ImportJob)
+            .where(
+                ImportJob.status.not_in(FINISHED_IMPORT_JOB_STATUSES),
+                ImportJob.updated_at < _utcnow() - timedelta(seconds=grace_seconds),
+            )
+            .values(status="failed", error="Import was interrupted. Please try again.")
+        )
+    return result.rowcount
+
+
+async def purge_orphans(
+    engine: AsyncEngine,
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    failed_import_grace_seconds: float = FAILED_IMPORT_GRACE_SECONDS,
+    import_job_retention_seconds: float = IMPORT_JOB_RETENTION_SECONDS,
+) -> dict[str, int]:
+    """
+    Delete rows nothing can reach any more, in batches. Returns counts per kind.
+
+    - analyses whose resume is gone (rows from before cascading deletes),
+    - empty resumes left behind by failed sync imports,
+    - analysis placeholders left behind by failed or aborted analyses,
+    - finished import jobs past their retention (stalled jobs are failed
+      first, see `fail_stalled_import_jobs`),
+    - snapshots no analysis references,
+    - expired sessions and idempotency keys.
+    """
+    now = _utcnow()
+    purged = {
+        "orphan_analyses": await _delete_in_batches(
+            engine,
+            ResumeAnalysis.id,
+            ~exists().where(Resume.id == ResumeAnalysis.resume_id),
+            batch_size=batch_size,
+        ),
+        "failed_import_shells": await _delete_in_batches(
+            engine,
+            Resume.id,
+            Resume.has_content.is_(False),
+            Resume.created_at < now - timedelta(seconds=failed_import_grace_seconds),
+            batch_size=batch_size,
+        ),
+        "failed_analyses": await _delete_in_batches(
+            engine,
+            ResumeAnalysis.id,
+            ResumeAnalysis.error_count.is_(None),
+            ResumeAnalysis.created_at < now - timedelta(seconds=failed_import_grace_seconds),
+            batch_size=batch_size,
+        ),
+        "stalled_import_jobs": await fail_stalled_import_jobs(
+            engine, grace_seconds=failed_import_grace_seconds
+        ),
+        "finished_import_jobs": await _delete_in_batches(
+            engine,
+            ImportJob.id,
+            ImportJob.status.in_(FINISHED_IMPORT_JOB_STATUSES),
+            ImportJob.updated_at < now - timedelta(seconds=import_job_retention_seconds),
+            batch_size=batch_size,
+        ),
+    }
+    purged["unreferenced_snapshots"] = await collect_unreferenced_snapshots(engine, batch_size=batch_size)
+    purged["expired_sessions"] = await purge_expired_sessions(engine, batch_size=batch_size)
+    purged["expired_idempotency_keys"] = await _delete_in_batches(
+        engine,
+        IdempotencyKey.expires_at,
+        IdempotencyKey.expires_at < _utcnow(),
+        batch_size=batch_size,
+    )
+    return purged
+
+
+async def compact_database(engine: AsyncEngine, *, max_pages: int = VACUUM_MAX_PAGES) -> int:
+    """
+    Return free pages to the filesystem and refresh planner statistics.
+
+    SQLite: the first run switches the file to `auto_vacuum=INCREMENTAL` (a
+    one-off full VACUUM); later runs release at most `max_pages` free pages
+    with `PRAGMA incremental_vacuum`. Postgres: `VACUUM (ANALYZE)`, which
+    mostly makes space reusable rather than shrinking files. Returns the
+    number of bytes the database file shrank by.
+    """
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        if engine.dialect.name == "postgresql":
+            size_sql = text("SELECT pg_database_size(current_database())")
+            before = (await conn.execute(size_sql)).scalar_one()
+            await conn.execute(text("VACUUM (ANALYZE)"))
+            after = (await conn.execute(size_sql)).scalar_one()
+            return max(0, before - after)
+
+        page_size = (await conn.execute(text("PRAGMA page_size"))).scalar_one()
+        before = (await conn.execute(text("PRAGMA page_count"))).scalar_one()
+        if (await conn.execute(text("PRAGMA auto_vacuum"))).scalar_one() != 2:
+            await conn.execute(text("PRAGMA auto_vacuum=INCREMENTAL"))
+            await conn.execute(text("VACUUM"))
+        else:
+            (await conn.execute(text(f"PRAGMA incremental_vacuum({int(max_pages)})"))).fetchall()
+        await conn.execute(text("ANALYZE"))
+        after = (await conn.execute(text("PRAGMA page_count"))).scalar_one()
+        return max(0, before - after) * page_size
+
+
+@dataclass
+class MaintenanceReport:
+    started_at: datetime
+    duration_seconds: float
+    purged: dict[str, int] = field(default_factory=dict)
+    compacted: bool = False
+    bytes_reclaimed: int = 0
+
+
+async def run_maintenance(engine: AsyncEngine, *, compact: bool) -> MaintenanceReport:
+    started_at = _utcnow()
+    started = time.perf_counter()
+    purged = await purge_orphans(engine)
+    reclaimed = await compact_database(engine) if compact else 0
+    report = MaintenanceReport(
+        started_at=started_at,
+        duration_seconds=time.perf_counter() - started,
+        purged=purged,
+        compacted=compact,
+        bytes_reclaimed=reclaimed,
+    )
+    logger.info(
+        "Maintenance purged %s, reclaimed %d bytes in %.1fs",
+        purged,
+        reclaimed,
+        report.duration_seconds,
+    )
+    return report
+
+
+def _parse_window(window: str) -> tuple[clock_time, clock_time]:
+    start, end = (clock_time.fromisoformat(part.strip()) for part in window.split("-", 1))
+    return start, end
+
+
+def in_maintenance_window(now: datetime, window: str) -> bool:
+    """Whether `now` (UTC) falls in `window`, e.g. "02:00-05:00"; windows may wrap midnight."""
+    start, end = _parse_window(window)
+    current = now.time()
+    if start <= end:
+        return start <= current < end
+    return current >= start or current < end
+
+
+class MaintenanceScheduler:
+    """
+    Background task running `run_maintenance` every `interval_seconds`.
+
+    Purging runs on every tick; compaction only while the UTC clock is inside
+    the off-peak `window`. `interval_seconds <= 0` disables the task.
+    """
+
+    def __init__(self, interval_seconds: float, window: str) -> None:
+        self.interval_seconds = interval_seconds
+        self.window = window
+        self.last_report: MaintenanceReport | None = None
+        self._task: asyncio.Task[None] | None = None
+        _parse_window(window)
+
+    def start(self, engine: AsyncEngine) -> None:
+        if self._task is not None or self.interval_seconds <= 0:
+            return
+        self._task = asyncio.create_task(self._run(engine), name="maintenance")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _run(self, engine: AsyncEngine) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            compact = in_maintenance_window(_utcnow(), self.window)
+            try:
+                self.last_report = await run_maintenance(engine, compact=compact)
+            except Exception:
+                logger.exception("Maintenance run failed")
+
+
+maintenance_scheduler = MaintenanceScheduler(
+    interval_seconds=float(os.environ.get("MAINTENANCE_INTERVAL_SECONDS", "3600")),
+    window=os.environ.get("MAINTENANCE_WINDOW", "02:00-05:00"),
+)
@@ -0,0 +1,78 @@
+"""
+Offline maintenance commands.
+
+    python manage.py upgrade-resumes --batch-size 500
+    python manage.py gc-snapshots
+    python manage.py maintenance --compact
+
+Commands use the same `DATABASE_URL` settings as the app.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+
+from maintenance import (
+    DEFAULT_BATCH_SIZE,
+    collect_unreferenced_snapshots,
+    run_maintenance,
+    upgrade_stale_resumes,
+)
+from session_logic import engine
+
+
+async def _upgrade_resumes(args: argparse.Namespace) -> None:
+    try:
+        count = await upgrade_stale_resumes(engine, batch_size=args.batch_size)
+    finally:
+        await engine.dispose()
+    print(f"Upgraded {count} resume(s).")
+
+
+async def _gc_snapshots(args: argparse.Namespace) -> None:
+    try:
+        count = await collect_unreferenced_snapshots(engine, batch_size=args.batch_size)
+    finally:
+        await engine.dispose()
+    print(f"Deleted {count} unreferenced snapshot(s).")
+
+
+async def _maintenance(args: argparse.Namespace) -> None:
+    try:
+        report = await run_maintenance(engine, compact=args.compact)
+    finally:
+        await engine.dispose()
+    print(f"Purged {report.purged}; reclaimed {report.bytes_reclaimed} bytes.")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    upgrade = commands.add_parser(
+        "upgrade-resumes", help="Upgrade stored resumes to the current schema version."
+    )
+    upgrade.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    upgrade.set_defaults(handler=_upgrade_resumes)
+
+    gc = commands.add_parser("gc-snapshots", help="Delete resume snapshots no analysis references.")
+    gc.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    gc.set_defaults(handler=_gc_snapshots)
+
+    maintenance = commands.add_parser(
+        "maintenance", help="Purge orphaned rows and optionally compact the database."
+    )
+    maintenance.add_argument(
+        "--compact", action="store_true", help="Also run incremental VACUUM and ANALYZE."
+    )
+    maintenance.set_defaults(handler=_maintenance)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,9 @@
+import asyncio
 from logging.config import fileConfig
+import os
 from pathlib import Path
 import sys
 
-from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 
 from alembic import context
@@ -21,10 +22,16 @@ ROOT_PATH = Path(__file__).resolve().parents[1]
 if str(ROOT_PATH) not in sys.path:
     sys.path.append(str(ROOT_PATH))
 
+from database import SqliteSettings, async_database_url, create_database_engine  # noqa: E402
 from session_logic import Base  # noqa: E402
 
 target_metadata = Base.metadata
 
+# DATABASE_URL, when set, wins over the ini file so the app and its
+# migrations always point at the same database.
+if os.environ.get("DATABASE_URL"):
+    config.set_main_option("sqlalchemy.url", os.environ["DATABASE_URL"])
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -55,6 +62,29 @@ def run_migrations_offline() -> None:
         context.run_migrations()
 
 
+def do_run_migrations(connection) -> None:
+    context.configure(connection=connection, target_metadata=target_metadata)
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    """Run migrations through the app's engine factory (same driver and pragmas)."""
+    connectable = create_database_engine(
+        async_database_url(config.get_main_option("sqlalchemy.url")),
+        # Batch migrations rebuild SQLite tables with DROP TABLE, which would
+        # fire ON DELETE CASCADE if foreign keys were enforced.
+        sqlite_settings=SqliteSettings(foreign_keys=False),
+        poolclass=pool.NullPool,
+    )
+
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+
+    await connectable.dispose()
+
+
 def run_migrations_online() -> None:
     """Run migrations in 'online' mode.
 
@@ -62,19 +92,7 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
-    connectable = engine_from_config(
-        config.get_section(config.config_ini_section, {}),
-        prefix="sqlalchemy.",
-        poolclass=pool.NullPool,
-    )
-
-    with connectable.connect() as connection:
-        context.configure(
-            connection=connection, target_metadata=target_metadata
-        )
-
-        with context.begin_transaction():
-            context.run_migrations()
+    asyncio.run(run_async_migrations())
 
 
 if context.is_offline_mode():
@@ -0,0 +1,35 @@
+"""add pending analyses index
+
+Revision ID: a2d6f9b4e8c1
+Revises: f3c8a1e5d7b9
+Create Date: 2026-03-16 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "a2d6f9b4e8c1"
+down_revision: Union[str, Sequence[str], None] = "f3c8a1e5d7b9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PENDING = sa.text("error_count IS NULL")
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_resume_analyses_pending_created_at",
+        "resume_analyses",
+        ["created_at"],
+        unique=False,
+        sqlite_where=PENDING,
+        postgresql_where=PENDING,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_resume_analyses_pending_created_at", table_name="resume_analyses")
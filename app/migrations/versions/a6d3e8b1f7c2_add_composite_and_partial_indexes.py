@@ -0,0 +1,51 @@
+"""add composite and partial indexes
+
+Revision ID: a6d3e8b1f7c2
+Revises: f4a1c8e2d6b9
+Create Date: 2026-02-26 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "a6d3e8b1f7c2"
+down_revision: Union[str, Sequence[str], None] = "f4a1c8e2d6b9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COMPLETED = sa.text("error_count IS NOT NULL")
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_resumes_user_email_created_at_id",
+        "resumes",
+        ["user_email", "created_at", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_resume_analyses_completed",
+        "resume_analyses",
+        ["resume_id", "user_email", "created_at", "id"],
+        unique=False,
+        sqlite_where=COMPLETED,
+        postgresql_where=COMPLETED,
+    )
+    op.create_index(
+        "ix_resume_analyses_completed_snapshot",
+        "resume_analyses",
+        ["snapshot_hash", "created_at"],
+        unique=False,
+        sqlite_where=COMPLETED,
+        postgresql_where=COMPLETED,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_resume_analyses_completed_snapshot", table_name="resume_analyses")
+    op.drop_index("ix_resume_analyses_completed", table_name="resume_analyses")
+    op.drop_index("ix_resumes_user_email_created_at_id", table_name="resumes")
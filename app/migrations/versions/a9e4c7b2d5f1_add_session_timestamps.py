@@ -0,0 +1,54 @@
+"""add session timestamps
+
+Revision ID: a9e4c7b2d5f1
+Revises: f8d2b6e1a4c9
+Create Date: 2026-03-10 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "a9e4c7b2d5f1"
+down_revision: Union[str, Sequence[str], None] = "f8d2b6e1a4c9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # SQLite cannot ADD COLUMN with a CURRENT_TIMESTAMP default, so add the
+    # columns nullable, stamp existing sessions as created now, then tighten.
+    with op.batch_alter_table("sessions") as batch_op:
+        batch_op.add_column(sa.Column("created_at", sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column("last_seen_at", sa.DateTime(), nullable=True))
+
+    sessions = sa.table(
+        "sessions",
+        sa.column("created_at", sa.DateTime),
+        sa.column("last_seen_at", sa.DateTime),
+    )
+    op.get_bind().execute(
+        sessions.update().values(created_at=sa.func.now(), last_seen_at=sa.func.now())
+    )
+
+    with op.batch_alter_table("sessions") as batch_op:
+        for column in ("created_at", "last_seen_at"):
+            batch_op.alter_column(
+                column,
+                existing_type=sa.DateTime(),
+                nullable=False,
+                server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            )
+        batch_op.create_index(batch_op.f("ix_sessions_created_at"), ["created_at"], unique=False)
+        batch_op.create_index(batch_op.f("ix_sessions_last_seen_at"), ["last_seen_at"], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("sessions") as batch_op:
+        batch_op.drop_index(batch_op.f("ix_sessions_last_seen_at"))
+        batch_op.drop_index(batch_op.f("ix_sessions_created_at"))
+        batch_op.drop_column("last_seen_at")
+        batch_op.drop_column("created_at")
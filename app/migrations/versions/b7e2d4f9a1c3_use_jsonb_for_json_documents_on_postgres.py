@@ -0,0 +1,54 @@
+"""use jsonb for json documents on postgres
+
+Revision ID: b7e2d4f9a1c3
+Revises: a6d3e8b1f7c2
+Create Date: 2026-02-27 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "b7e2d4f9a1c3"
+down_revision: Union[str, Sequence[str], None] = "a6d3e8b1f7c2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+JSON_DOCUMENT_COLUMNS = [
+    ("resumes", "normalized_json", True),
+    ("resume_analyses", "source_json", False),
+    ("resume_analyses", "analysis_json", True),
+]
+
+
+def upgrade() -> None:
+    # SQLite keeps JSON as text; only Postgres has a binary JSON type.
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table, column, nullable in JSON_DOCUMENT_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=postgresql.JSONB(),
+            existing_type=sa.JSON(),
+            existing_nullable=nullable,
+            postgresql_using=f"{column}::jsonb",
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table, column, nullable in JSON_DOCUMENT_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=sa.JSON(),
+            existing_type=postgresql.JSONB(),
+            existing_nullable=nullable,
+            postgresql_using=f"{column}::json",
+        )
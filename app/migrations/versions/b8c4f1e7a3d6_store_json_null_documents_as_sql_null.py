@@ -0,0 +1,45 @@
+"""store json null documents as sql null
+
+Revision ID: b8c4f1e7a3d6
+Revises: a2d6f9b4e8c1
+Create Date: 2026-03-17 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "b8c4f1e7a3d6"
+down_revision: Union[str, Sequence[str], None] = "a2d6f9b4e8c1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (("resumes", "normalized_json"), ("resume_analyses", "analysis_json"))
+
+
+def _json_null(column: sa.ColumnClause, dialect_name: str) -> sa.ColumnElement:
+    if dialect_name == "postgresql":
+        return sa.func.jsonb_typeof(column) == "null"
+    # Text from the JSON type, or bytes once the column became a BLOB.
+    return sa.cast(column, sa.Text) == "null"
+
+
+def upgrade() -> None:
+    # The JSON type stored Python None as 'null', and d3b8f1a6c9e2 (before it
+    # was fixed) and b7e2d4f9a1c3 carried that over. Failed-import shells must
+    # be SQL NULL, which is what the API and maintenance look for.
+    bind = op.get_bind()
+    for table_name, column_name in COLUMNS:
+        table = sa.table(table_name, sa.column(column_name))
+        column = table.c[column_name]
+        bind.execute(
+            table.update().where(_json_null(column, bind.dialect.name)).values({column_name: None})
+        )
+
+
+def downgrade() -> None:
+    # SQL NULL reads back as None under every earlier revision.
+    pass
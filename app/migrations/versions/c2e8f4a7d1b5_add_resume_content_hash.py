@@ -0,0 +1,38 @@
+"""add resume content hash
+
+Revision ID: c2e8f4a7d1b5
+Revises: b4f7d1e9c3a6
+Create Date: 2026-03-12 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "c2e8f4a7d1b5"
+down_revision: Union[str, Sequence[str], None] = "b4f7d1e9c3a6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows stay NULL, and are served without an ETag, until their
+    # next save, their first GET /resumes/{id} (store_resume_document fills
+    # the hash even when the upgrade leaves the document unchanged), or a bulk
+    # `python manage.py upgrade-resumes`.
+    op.add_column("resumes", sa.Column("content_hash", sa.String(), nullable=True))
+    op.create_index(
+        "ix_resumes_user_email_updated_at",
+        "resumes",
+        ["user_email", "updated_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_resumes_user_email_updated_at", table_name="resumes")
+    with op.batch_alter_table("resumes") as batch_op:
+        batch_op.drop_column("content_hash")
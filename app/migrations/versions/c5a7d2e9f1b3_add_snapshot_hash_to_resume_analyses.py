@@ -0,0 +1,71 @@
+"""add snapshot hash to resume analyses
+
+Revision ID: c5a7d2e9f1b3
+Revises: b3e1f0a2c7d4
+Create Date: 2026-02-21 00:00:00.000000
+
+"""
+
+import hashlib
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "c5a7d2e9f1b3"
+down_revision: Union[str, Sequence[str], None] = "b3e1f0a2c7d4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+
+def _canonical_json_hash(data: object) -> str:
+    # Must match resume_models.canonical_json_hash.
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def upgrade() -> None:
+    op.add_column("resume_analyses", sa.Column("snapshot_hash", sa.String(), nullable=True))
+    op.add_column("resume_analyses", sa.Column("prompt_version", sa.String(), nullable=True))
+    op.create_index(
+        op.f("ix_resume_analyses_snapshot_hash"), "resume_analyses", ["snapshot_hash"], unique=False
+    )
+
+    # Backfill hashes for existing snapshots. prompt_version stays NULL, so
+    # analyses from before this revision are never reused.
+    bind = op.get_bind()
+    analyses = sa.Table(
+        "resume_analyses",
+        sa.MetaData(),
+        sa.Column("id", sa.String, primary_key=True),
+        sa.Column("source_json", sa.JSON),
+        sa.Column("snapshot_hash", sa.String),
+    )
+    last_id = ""
+    while True:
+        rows = bind.execute(
+            sa.select(analyses.c.id, analyses.c.source_json)
+            .where(analyses.c.id > last_id)
+            .order_by(analyses.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        for row in rows:
+            bind.execute(
+                analyses.update()
+                .where(analyses.c.id == row.id)
+                .values(snapshot_hash=_canonical_json_hash(row.source_json))
+            )
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_resume_analyses_snapshot_hash"), table_name="resume_analyses")
+    with op.batch_alter_table("resume_analyses") as batch_op:
+        batch_op.drop_column("prompt_version")
+        batch_op.drop_column("snapshot_hash")
@@ -0,0 +1,29 @@
+"""add schema version to resumes
+
+Revision ID: c9f5a2d7e4b8
+Revises: b7e2d4f9a1c3
+Create Date: 2026-02-28 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "c9f5a2d7e4b8"
+down_revision: Union[str, Sequence[str], None] = "b7e2d4f9a1c3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows stay NULL (stale): they are upgraded on first read or in
+    # bulk with `python manage.py upgrade-resumes`.
+    op.add_column("resumes", sa.Column("schema_version", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("resumes") as batch_op:
+        batch_op.drop_column("schema_version")
@@ -0,0 +1,97 @@
+"""compress json documents
+
+Revision ID: d3b8f1a6c9e2
+Revises: c9f5a2d7e4b8
+Create Date: 2026-03-01 00:00:00.000000
+
+"""
+
+import json
+from typing import Sequence, Union
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "d3b8f1a6c9e2"
+down_revision: Union[str, Sequence[str], None] = "c9f5a2d7e4b8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 200
+
+JSON_DOCUMENT_COLUMNS = [
+    ("resumes", "normalized_json"),
+    ("resume_analyses", "source_json"),
+    ("resume_analyses", "analysis_json"),
+]
+
+# Must match database.compress_json / decompress_json (zlib codec).
+MARKER = b"\x00"
+ZLIB_CODEC = b"z"
+
+
+def _compress(stored: object) -> object:
+    if isinstance(stored, (bytes, memoryview)) and bytes(stored).startswith(MARKER):
+        return None  # already compressed
+    text = stored.decode("utf-8") if isinstance(stored, (bytes, memoryview)) else str(stored)
+    value = json.loads(text)
+    if value is None:
+        # The JSON type stored Python None as the text 'null'; CompressedJSON
+        # stores it as SQL NULL, which is what "no document" checks look for.
+        return sa.null()
+    raw = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return MARKER + ZLIB_CODEC + zlib.compress(raw, 6)
+
+
+def _decompress(stored: object) -> str | None:
+    if not isinstance(stored, (bytes, memoryview)) or not bytes(stored).startswith(MARKER):
+        return None  # already plain JSON
+    stored = bytes(stored)
+    if stored[1:2] != ZLIB_CODEC:
+        raise RuntimeError("Only zlib-compressed documents can be downgraded.")
+    return zlib.decompress(stored[2:]).decode("utf-8")
+
+
+def _rewrite(convert) -> None:
+    bind = op.get_bind()
+    for table_name, column_name in JSON_DOCUMENT_COLUMNS:
+        # NullType columns pass stored text/bytes through untouched.
+        table = sa.Table(
+            table_name,
+            sa.MetaData(),
+            sa.Column("id", sa.String, primary_key=True),
+            sa.Column(column_name, sa.types.NullType()),
+        )
+        column = table.c[column_name]
+        last_id = ""
+        while True:
+            rows = bind.execute(
+                sa.select(table.c.id, column)
+                .where(table.c.id > last_id, column.isnot(None))
+                .order_by(table.c.id)
+                .limit(BATCH_SIZE)
+            ).fetchall()
+            if not rows:
+                break
+            for row in rows:
+                converted = convert(row[1])
+                if converted is not None:
+                    bind.execute(
+                        table.update().where(table.c.id == row.id).values({column_name: converted})
+                    )
+            last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    # Postgres keeps JSONB, which TOAST already compresses.
+    if op.get_bind().dialect.name == "postgresql":
+        return
+    _rewrite(_compress)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        return
+    _rewrite(_decompress)
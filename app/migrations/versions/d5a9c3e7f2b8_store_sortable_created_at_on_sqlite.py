@@ -0,0 +1,49 @@
+"""store sortable created_at on sqlite
+
+Revision ID: d5a9c3e7f2b8
+Revises: c2e8f4a7d1b5
+Create Date: 2026-03-13 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "d5a9c3e7f2b8"
+down_revision: Union[str, Sequence[str], None] = "c2e8f4a7d1b5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("resumes", "resume_analyses")
+# Must match database.precise_now on SQLite.
+SQLITE_PRECISE_NOW = sa.text("(strftime('%Y-%m-%d %H:%M:%f', 'now') || '000')")
+
+
+def upgrade() -> None:
+    # Postgres stores real timestamps; only SQLite compares them as text.
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(
+                "created_at", existing_type=sa.DateTime(), server_default=SQLITE_PRECISE_NOW
+            )
+        # Rewrite CURRENT_TIMESTAMP values (`YYYY-MM-DD HH:MM:SS`) in the
+        # format bound cursors use, so keyset comparisons see one format.
+        op.execute(
+            f"UPDATE {table} SET created_at = created_at || '.000000' "
+            "WHERE length(created_at) = 19"
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(
+                "created_at", existing_type=sa.DateTime(), server_default=sa.func.now()
+            )
@@ -0,0 +1,32 @@
+"""create session generation table
+
+Revision ID: d8b4c1f6a2e7
+Revises: c5a7d2e9f1b3
+Create Date: 2026-02-28 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "d8b4c1f6a2e7"
+down_revision: Union[str, Sequence[str], None] = "c5a7d2e9f1b3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    session_generation = op.create_table(
+        "session_generation",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("generation", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.bulk_insert(session_generation, [{"id": 1, "generation": 0}])
+
+
+def downgrade() -> None:
+    op.drop_table("session_generation")
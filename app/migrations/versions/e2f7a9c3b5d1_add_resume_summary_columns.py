@@ -0,0 +1,92 @@
+"""add resume summary columns
+
+Revision ID: e2f7a9c3b5d1
+Revises: d8b4c1f6a2e7
+Create Date: 2026-02-24 00:00:00.000000
+
+"""
+
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "e2f7a9c3b5d1"
+down_revision: Union[str, Sequence[str], None] = "d8b4c1f6a2e7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+
+def _resume_label(normalized_json: object) -> str:
+    # Must match resume_models.resume_label.
+    try:
+        values = normalized_json["sections"][0]["items"][0]["values"]  # type: ignore[index]
+    except (KeyError, IndexError, TypeError):
+        return ""
+    if not isinstance(values, dict):
+        return ""
+    first = values.get("first-name")
+    last = values.get("last-name")
+    return " ".join(part for part in [first, last] if isinstance(part, str) and part.strip()).strip()
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("resumes") as batch_op:
+        batch_op.add_column(sa.Column("label", sa.String(), nullable=False, server_default=""))
+        batch_op.add_column(
+            sa.Column("has_content", sa.Boolean(), nullable=False, server_default=sa.false())
+        )
+        batch_op.add_column(
+            sa.Column("content_size", sa.Integer(), nullable=False, server_default="0")
+        )
+        batch_op.add_column(sa.Column("updated_at", sa.DateTime(), nullable=True))
+
+    # Backfill in id order, one batch at a time, so large tables never load
+    # every document at once.
+    bind = op.get_bind()
+    resumes = sa.Table(
+        "resumes",
+        sa.MetaData(),
+        sa.Column("id", sa.String, primary_key=True),
+        sa.Column("normalized_json", sa.JSON),
+        sa.Column("created_at", sa.DateTime),
+        sa.Column("label", sa.String),
+        sa.Column("has_content", sa.Boolean),
+        sa.Column("content_size", sa.Integer),
+        sa.Column("updated_at", sa.DateTime),
+    )
+    last_id = ""
+    while True:
+        rows = bind.execute(
+            sa.select(resumes.c.id, resumes.c.normalized_json, resumes.c.created_at)
+            .where(resumes.c.id > last_id)
+            .order_by(resumes.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        for row in rows:
+            document = row.normalized_json
+            bind.execute(
+                resumes.update()
+                .where(resumes.c.id == row.id)
+                .values(
+                    label=_resume_label(document),
+                    has_content=document is not None,
+                    content_size=len(json.dumps(document).encode("utf-8")) if document is not None else 0,
+                    updated_at=row.created_at,
+                )
+            )
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("resumes") as batch_op:
+        batch_op.drop_column("updated_at")
+        batch_op.drop_column("content_size")
+        batch_op.drop_column("has_content")
+        batch_op.drop_column("label")
@@ -0,0 +1,150 @@
+"""create resume snapshots table
+
+Revision ID: e6c1a9d4b2f7
+Revises: d3b8f1a6c9e2
+Create Date: 2026-03-02 00:00:00.000000
+
+"""
+
+import hashlib
+import json
+from typing import Sequence, Union
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "e6c1a9d4b2f7"
+down_revision: Union[str, Sequence[str], None] = "d3b8f1a6c9e2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 200
+
+
+def _document_type() -> sa.types.TypeEngine:
+    if op.get_bind().dialect.name == "postgresql":
+        return postgresql.JSONB()
+    return sa.LargeBinary()
+
+
+def _decode(stored: object) -> object:
+    # Must match database.decompress_json (zlib codec) for SQLite; Postgres
+    # hands back the decoded JSONB value already.
+    if isinstance(stored, (bytes, memoryview)):
+        stored = bytes(stored)
+        if stored.startswith(b"\x00z"):
+            return json.loads(zlib.decompress(stored[2:]))
+        return json.loads(stored.decode("utf-8"))
+    if isinstance(stored, str):
+        return json.loads(stored)
+    return stored
+
+
+def _canonical_json_hash(data: object) -> str:
+    # Must match resume_models.canonical_json_hash.
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def upgrade() -> None:
+    op.create_table(
+        "resume_snapshots",
+        sa.Column("hash", sa.String(), nullable=False),
+        sa.Column("document", _document_type(), nullable=False),
+        sa.Column("ref_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.text("(CURRENT_TIMESTAMP)"), nullable=False),
+        sa.PrimaryKeyConstraint("hash"),
+    )
+
+    # Fold every analysis' source_json into one snapshot row per distinct hash.
+    bind = op.get_bind()
+    analyses = sa.Table(
+        "resume_analyses",
+        sa.MetaData(),
+        sa.Column("id", sa.String, primary_key=True),
+        sa.Column("source_json", sa.types.NullType()),
+        sa.Column("snapshot_hash", sa.String),
+    )
+    snapshots = sa.Table(
+        "resume_snapshots",
+        sa.MetaData(),
+        sa.Column("hash", sa.String, primary_key=True),
+        sa.Column("document", sa.types.NullType()),
+        sa.Column("ref_count", sa.Integer),
+    )
+    last_id = ""
+    while True:
+        rows = bind.execute(
+            sa.select(analyses.c.id, analyses.c.source_json, analyses.c.snapshot_hash)
+            .where(analyses.c.id > last_id)
+            .order_by(analyses.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        for row in rows:
+            snapshot_hash = row.snapshot_hash or _canonical_json_hash(_decode(row.source_json))
+            if row.snapshot_hash is None:
+                bind.execute(
+                    analyses.update().where(analyses.c.id == row.id).values(snapshot_hash=snapshot_hash)
+                )
+            exists = bind.execute(
+                sa.select(snapshots.c.hash).where(snapshots.c.hash == snapshot_hash)
+            ).first()
+            if exists is None:
+                # Stored bytes are copied as is: the column type reads both formats.
+                bind.execute(
+                    snapshots.insert().values(hash=snapshot_hash, document=row.source_json, ref_count=0)
+                )
+        last_id = rows[-1].id
+
+    references = (
+        sa.select(sa.func.count())
+        .select_from(analyses)
+        .where(analyses.c.snapshot_hash == snapshots.c.hash)
+        .scalar_subquery()
+    )
+    bind.execute(snapshots.update().values(ref_count=references))
+
+    with op.batch_alter_table("resume_analyses") as batch_op:
+        batch_op.drop_column("source_json")
+        batch_op.create_foreign_key(
+            "fk_resume_analyses_snapshot_hash_resume_snapshots",
+            "resume_snapshots",
+            ["snapshot_hash"],
+            ["hash"],
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("resume_analyses") as batch_op:
+        batch_op.drop_constraint(
+            "fk_resume_analyses_snapshot_hash_resume_snapshots", type_="foreignkey"
+        )
+        batch_op.add_column(sa.Column("source_json", _document_type(), nullable=True))
+
+    bind = op.get_bind()
+    analyses = sa.table(
+        "resume_analyses",
+        sa.column("snapshot_hash", sa.String),
+        sa.column("source_json", sa.types.NullType()),
+    )
+    snapshots = sa.table(
+        "resume_snapshots",
+        sa.column("hash", sa.String),
+        sa.column("document", sa.types.NullType()),
+    )
+    bind.execute(
+        analyses.update().values(
+            source_json=sa.select(snapshots.c.document)
+            .where(snapshots.c.hash == analyses.c.snapshot_hash)
+            .scalar_subquery()
+        )
+    )
+    with op.batch_alter_table("resume_analyses") as batch_op:
+        batch_op.alter_column("source_json", existing_type=_document_type(), nullable=False)
+
+    op.drop_table("resume_snapshots")
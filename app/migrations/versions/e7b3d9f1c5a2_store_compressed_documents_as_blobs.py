@@ -0,0 +1,40 @@
+"""store compressed documents as blobs
+
+Revision ID: e7b3d9f1c5a2
+Revises: d5a9c3e7f2b8
+Create Date: 2026-03-14 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "e7b3d9f1c5a2"
+down_revision: Union[str, Sequence[str], None] = "d5a9c3e7f2b8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Columns d3b8f1a6c9e2 started filling with CompressedJSON values while
+# leaving them declared JSON.
+COLUMNS = (("resumes", "normalized_json"), ("resume_analyses", "analysis_json"))
+
+
+def upgrade() -> None:
+    # On Postgres these are already JSONB (b7e2d4f9a1c3), which is what
+    # CompressedJSON uses there.
+    if op.get_bind().dialect.name == "postgresql":
+        return
+    for table, column in COLUMNS:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(column, existing_type=sa.JSON(), type_=sa.LargeBinary())
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        return
+    for table, column in COLUMNS:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(column, existing_type=sa.LargeBinary(), type_=sa.JSON())
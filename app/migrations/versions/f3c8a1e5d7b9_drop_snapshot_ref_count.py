@@ -0,0 +1,38 @@
+"""drop snapshot ref count
+
+Revision ID: f3c8a1e5d7b9
+Revises: e7b3d9f1c5a2
+Create Date: 2026-03-15 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "f3c8a1e5d7b9"
+down_revision: Union[str, Sequence[str], None] = "e7b3d9f1c5a2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Never decremented and never consulted: garbage collection checks
+    # resume_analyses directly. Dropping it also discards the counts
+    # e6c1a9d4b2f7 seeded from analyses f8d2b6e1a4c9 later removed as orphans.
+    with op.batch_alter_table("resume_snapshots") as batch_op:
+        batch_op.drop_column("ref_count")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("resume_snapshots") as batch_op:
+        batch_op.add_column(
+            sa.Column("ref_count", sa.Integer(), server_default="0", nullable=False)
+        )
+    op.execute(
+        "UPDATE resume_snapshots SET ref_count = ("
+        "SELECT count(*) FROM resume_analyses "
+        "WHERE resume_analyses.snapshot_hash = resume_snapshots.hash)"
+    )
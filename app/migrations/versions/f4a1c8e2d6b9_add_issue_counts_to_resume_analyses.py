@@ -0,0 +1,75 @@
+"""add issue counts to resume analyses
+
+Revision ID: f4a1c8e2d6b9
+Revises: e2f7a9c3b5d1
+Create Date: 2026-02-25 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "f4a1c8e2d6b9"
+down_revision: Union[str, Sequence[str], None] = "e2f7a9c3b5d1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+
+def _issue_counts(analysis_json: object) -> dict[str, int | None]:
+    # Must match session_logic.analysis_issue_counts.
+    if not isinstance(analysis_json, dict):
+        return {"info_count": None, "warning_count": None, "error_count": None}
+    counts = {"info": 0, "warning": 0, "error": 0}
+    for section in analysis_json.get("sections") or []:
+        if not isinstance(section, dict):
+            continue
+        for issue in section.get("issues") or []:
+            if isinstance(issue, dict) and issue.get("severity") in counts:
+                counts[issue["severity"]] += 1
+    return {f"{severity}_count": count for severity, count in counts.items()}
+
+
+def upgrade() -> None:
+    op.add_column("resume_analyses", sa.Column("info_count", sa.Integer(), nullable=True))
+    op.add_column("resume_analyses", sa.Column("warning_count", sa.Integer(), nullable=True))
+    op.add_column("resume_analyses", sa.Column("error_count", sa.Integer(), nullable=True))
+
+    bind = op.get_bind()
+    analyses = sa.Table(
+        "resume_analyses",
+        sa.MetaData(),
+        sa.Column("id", sa.String, primary_key=True),
+        sa.Column("analysis_json", sa.JSON),
+        sa.Column("info_count", sa.Integer),
+        sa.Column("warning_count", sa.Integer),
+        sa.Column("error_count", sa.Integer),
+    )
+    last_id = ""
+    while True:
+        rows = bind.execute(
+            sa.select(analyses.c.id, analyses.c.analysis_json)
+            .where(analyses.c.id > last_id)
+            .order_by(analyses.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        for row in rows:
+            bind.execute(
+                analyses.update()
+                .where(analyses.c.id == row.id)
+                .values(**_issue_counts(row.analysis_json))
+            )
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("resume_analyses") as batch_op:
+        batch_op.drop_column("error_count")
+        batch_op.drop_column("warning_count")
+        batch_op.drop_column("info_count")
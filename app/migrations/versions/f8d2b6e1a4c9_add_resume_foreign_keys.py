@@ -0,0 +1,64 @@
+"""add resume foreign keys
+
+Revision ID: f8d2b6e1a4c9
+Revises: e6c1a9d4b2f7
+Create Date: 2026-03-09 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "f8d2b6e1a4c9"
+down_revision: Union[str, Sequence[str], None] = "e6c1a9d4b2f7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Rows pointing at deleted resumes would violate the new constraints.
+    resumes = sa.table("resumes", sa.column("id", sa.String))
+    analyses = sa.table("resume_analyses", sa.column("resume_id", sa.String))
+    import_jobs = sa.table("import_jobs", sa.column("resume_id", sa.String))
+    bind = op.get_bind()
+    bind.execute(
+        analyses.delete().where(~sa.exists().where(resumes.c.id == analyses.c.resume_id))
+    )
+    bind.execute(
+        import_jobs.update()
+        .where(
+            import_jobs.c.resume_id.isnot(None),
+            ~sa.exists().where(resumes.c.id == import_jobs.c.resume_id),
+        )
+        .values(resume_id=None)
+    )
+
+    with op.batch_alter_table("resume_analyses") as batch_op:
+        batch_op.create_foreign_key(
+            "fk_resume_analyses_resume_id_resumes",
+            "resumes",
+            ["resume_id"],
+            ["id"],
+            ondelete="CASCADE",
+        )
+    with op.batch_alter_table("import_jobs") as batch_op:
+        batch_op.create_foreign_key(
+            "fk_import_jobs_resume_id_resumes",
+            "resumes",
+            ["resume_id"],
+            ["id"],
+            ondelete="SET NULL",
+        )
+    # Lets ON DELETE SET NULL find a resume's import jobs without a table scan.
+    op.create_index(op.f("ix_import_jobs_resume_id"), "import_jobs", ["resume_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_import_jobs_resume_id"), table_name="import_jobs")
+    with op.batch_alter_table("import_jobs") as batch_op:
+        batch_op.drop_constraint("fk_import_jobs_resume_id_resumes", type_="foreignkey")
+    with op.batch_alter_table("resume_analyses") as batch_op:
+        batch_op.drop_constraint("fk_resume_analyses_resume_id_resumes", type_="foreignkey")
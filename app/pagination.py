@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import base64
+from datetime import datetime
+import json
+from typing import Any
+
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_LIMIT = 50
+MAX_PAGE_LIMIT = 200
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    """Opaque cursor pointing just past the row with this `(created_at, id)`."""
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), str(row_id)
+    except Exception as exc:
+        raise ValueError("Invalid pagination cursor.") from exc
+
+
+def newest_first_after(created_at_column: Any, id_column: Any, cursor: str):
+    """
+    Keyset predicate for pages ordered by `(created_at DESC, id DESC)`.
+
+    Selects rows strictly after the cursor's row, so pages stay stable while
+    new rows are inserted at the head of the list.
+    """
+    created_at, row_id = decode_cursor(cursor)
+    return or_(
+        created_at_column < created_at,
+        and_(created_at_column == created_at, id_column < row_id),
+    )
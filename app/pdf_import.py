@@ -1,18 +1,28 @@
 from __future__ import annotations
 
+import asyncio
+from dataclasses import dataclass
+import hashlib
 import json
+import logging
 import os
-from typing import Any
+import threading
+import time
+from typing import Any, Awaitable, Callable
 
-import httpx
 from io import BytesIO
 
+from caching import BoundedCache, SingleFlight
+from llm_client import request_chat_completion_json
+from pdf_workers import WorkerCrashed, WorkerTimeout, deadline, pool_from_env
 from resume_models import ResumeFormValues, validate_resume_form_values
 from resume_schema import resume_schema_for_prompt
 
+logger = logging.getLogger(__name__)
+
 MAX_PDF_BYTES = 10 * 1024 * 1024
 MIN_EXTRACTED_TEXT_CHARS = 50
-OPENAI_CHAT_COMPLETIONS_URL = "https://api.openai.com/v1/chat/completions"
+UNREADABLE_PDF_MESSAGE = "Could not read this PDF. Please upload a valid, text-based PDF."
 
 
 SYSTEM_PROMPT = """\
@@ -43,7 +53,42 @@ Normalization guidance:
 """
 
 
-def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
+# Extraction limits. Pages past PDF_MAX_PAGES are never parsed, a page that
+# runs longer than PDF_PAGE_TIMEOUT_SECONDS is skipped, and no further pages
+# are read once PDF_TARGET_TEXT_CHARS of text (plenty for any resume) is in.
+PDF_MAX_PAGES = int(os.environ.get("PDF_MAX_PAGES", "20"))
+PDF_PAGE_TIMEOUT_SECONDS = float(os.environ.get("PDF_PAGE_TIMEOUT_SECONDS", "2"))
+PDF_TARGET_TEXT_CHARS = int(os.environ.get("PDF_TARGET_TEXT_CHARS", "30000"))
+# Pages per worker job: the first job covers typical one- and two-page
+# resumes alone; longer documents fan the remaining ranges out in parallel.
+PDF_PAGES_PER_JOB = int(os.environ.get("PDF_PAGES_PER_JOB", "4"))
+
+
+@dataclass(frozen=True)
+class PdfPageText:
+    index: int
+    text: str
+    seconds: float
+    # None, "timeout" (over the per-page budget), "error" or "worker_failed".
+    skipped: str | None = None
+
+
+@dataclass(frozen=True)
+class PdfPageRange:
+    page_count: int
+    pages: tuple[PdfPageText, ...]
+
+
+class _PageTimeout(Exception):
+    pass
+
+
+# The last PDF opened on this thread (in a pool worker: this process), so the
+# ranges of one document that land on the same worker share one parse.
+_open_pdfs = threading.local()
+
+
+def _open_pdf(pdf_bytes: bytes) -> tuple[Any, int]:
     try:
         from pypdf import PdfReader  # type: ignore
     except Exception as exc:  # pragma: no cover
@@ -51,13 +96,163 @@ def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
             "PDF parsing dependency missing. Install `pypdf`."
         ) from exc
 
-    reader = PdfReader(BytesIO(pdf_bytes))
-    texts: list[str] = []
-    for page in reader.pages:
-        page_text = page.extract_text() or ""
-        texts.append(page_text)
-    combined = "\n\n".join(t.strip() for t in texts if t.strip())
-    return combined.strip()
+    digest = hashlib.sha256(pdf_bytes).digest()
+    cached = getattr(_open_pdfs, "entry", None)
+    if cached is not None and cached[0] == digest:
+        return cached[1], cached[2]
+    try:
+        reader = PdfReader(BytesIO(pdf_bytes))
+        page_count = len(reader.pages)
+    except Exception as exc:
+        raise ValueError(UNREADABLE_PDF_MESSAGE) from exc
+    _open_pdfs.entry = (digest, reader, page_count)
+    return reader, page_count
+
+
+def extract_pdf_page_range(
+    pdf_bytes: bytes,
+    start: int,
+    stop: int,
+    page_timeout_seconds: float,
+    target_chars: int,
+) -> PdfPageRange:
+    """
+    Extract the text of pages `start..stop-1`, one `PdfPageText` per page read.
+
+    Runs in an extraction worker. A page that fails or exceeds its time budget
+    (enforced with `pdf_workers.deadline`, so only in a worker process) is
+    recorded as skipped rather than failing the document; reading stops early
+    once `target_chars` of text has been collected.
+    """
+    reader, page_count = _open_pdf(pdf_bytes)
+    pages: list[PdfPageText] = []
+    collected = 0
+    for index in range(start, min(stop, page_count)):
+        started = time.perf_counter()
+        text, skipped = "", None
+        try:
+            with deadline(page_timeout_seconds, _PageTimeout):
+                text = (reader.pages[index].extract_text() or "").strip()
+        except _PageTimeout:
+            skipped = "timeout"
+        except Exception:
+            skipped = "error"
+        pages.append(PdfPageText(index, text, time.perf_counter() - started, skipped))
+        collected += len(text)
+        if collected >= target_chars:
+            break
+    return PdfPageRange(page_count=page_count, pages=tuple(pages))
+
+
+def _pages_until_target(pages: list[PdfPageText], target_chars: int) -> list[PdfPageText]:
+    kept: list[PdfPageText] = []
+    collected = 0
+    for page in sorted(pages, key=lambda page: page.index):
+        if collected >= target_chars:
+            break
+        kept.append(page)
+        collected += len(page.text)
+    return kept
+
+
+class PdfExtractionStats:
+    """Running totals for `/metrics`: pages read, skipped (by reason) and time spent."""
+
+    def __init__(self) -> None:
+        self.documents = 0
+        self.pages = 0
+        self.page_seconds = 0.0
+        self.slowest_page_seconds = 0.0
+        self.skipped: dict[str, int] = {}
+
+    def record(self, pages: list[PdfPageText]) -> None:
+        self.documents += 1
+        for page in pages:
+            self.pages += 1
+            self.page_seconds += page.seconds
+            self.slowest_page_seconds = max(self.slowest_page_seconds, page.seconds)
+            if page.skipped is not None:
+                self.skipped[page.skipped] = self.skipped.get(page.skipped, 0) + 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "documents": self.documents,
+            "pages": self.pages,
+            "skipped_pages": dict(self.skipped),
+            "mean_page_seconds": self.page_seconds / self.pages if self.pages else 0.0,
+            "slowest_page_seconds": self.slowest_page_seconds,
+        }
+
+
+pdf_extraction_pool = pool_from_env("PDF_EXTRACT")
+pdf_extraction_stats = PdfExtractionStats()
+
+
+async def _extract_range(pdf_bytes: bytes, start: int, stop: int) -> PdfPageRange:
+    return await pdf_extraction_pool.run(
+        extract_pdf_page_range,
+        pdf_bytes,
+        start,
+        stop,
+        PDF_PAGE_TIMEOUT_SECONDS,
+        PDF_TARGET_TEXT_CHARS,
+    )
+
+
+async def extract_text_from_pdf(pdf_bytes: bytes) -> str:
+    """
+    Extract a PDF's text on the bounded extraction process pool.
+
+    The first `PDF_PAGES_PER_JOB` pages are read by one job, which also learns
+    the page count; if that is not enough text, the remaining ranges up to
+    `PDF_MAX_PAGES` are extracted in parallel. A range whose worker times out
+    or crashes is skipped, but a failure of the first job is reported as a
+    `ValueError`, so callers surface it as the usual 422 for unreadable PDFs.
+    """
+    started = time.perf_counter()
+    first_stop = min(PDF_PAGES_PER_JOB, PDF_MAX_PAGES)
+    try:
+        first = await _extract_range(pdf_bytes, 0, first_stop)
+    except WorkerTimeout as exc:
+        raise ValueError(
+            "This PDF took too long to process. Please upload a simpler, text-based PDF."
+        ) from exc
+    except WorkerCrashed as exc:
+        raise ValueError(UNREADABLE_PDF_MESSAGE) from exc
+
+    pages = list(first.pages)
+    last_page = min(first.page_count, PDF_MAX_PAGES)
+    if sum(len(page.text) for page in pages) < PDF_TARGET_TEXT_CHARS:
+        ranges = [
+            (start, min(start + PDF_PAGES_PER_JOB, last_page))
+            for start in range(first_stop, last_page, PDF_PAGES_PER_JOB)
+        ]
+        results = await asyncio.gather(
+            *(_extract_range(pdf_bytes, start, stop) for start, stop in ranges),
+            return_exceptions=True,
+        )
+        for (start, stop), result in zip(ranges, results):
+            if isinstance(result, (WorkerTimeout, WorkerCrashed)):
+                pages.extend(
+                    PdfPageText(index, "", 0.0, "worker_failed") for index in range(start, stop)
+                )
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                pages.extend(result.pages)
+
+    pages = _pages_until_target(pages, PDF_TARGET_TEXT_CHARS)
+    pdf_extraction_stats.record(pages)
+    skipped = [page.index for page in pages if page.skipped is not None]
+    logger.info(
+        "Extracted %d of %d PDF pages in %.2fs (slowest page %.2fs); skipped pages %s",
+        len(pages),
+        first.page_count,
+        time.perf_counter() - started,
+        max((page.seconds for page in pages), default=0.0),
+        skipped,
+    )
+    return "\n\n".join(page.text for page in pages if page.text)
 
 
 def _build_user_prompt(extracted_text: str) -> str:
@@ -74,7 +269,7 @@ def _openai_model() -> str:
     return os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
 
 
-def call_openai_for_resume_json(openai_api_key: str, extracted_text: str) -> dict[str, Any]:
+async def call_openai_for_resume_json(openai_api_key: str, extracted_text: str) -> dict[str, Any]:
     payload: dict[str, Any] = {
         "model": _openai_model(),
         "temperature": 0,
@@ -84,54 +279,102 @@ def call_openai_for_resume_json(openai_api_key: str, extracted_text: str) -> dic
         ],
         "response_format": {"type": "json_object"},
     }
+    return await request_chat_completion_json(openai_api_key, payload, timeout=60.0)
 
-    headers = {"Authorization": f"Bearer {openai_api_key}"}
-    with httpx.Client(timeout=60.0) as client:
-        response = client.post(OPENAI_CHAT_COMPLETIONS_URL, json=payload, headers=headers)
-
-    if response.status_code == 400:
-        # Some models/accounts may not support response_format; retry without it.
-        payload.pop("response_format", None)
-        with httpx.Client(timeout=60.0) as client:
-            response = client.post(
-                OPENAI_CHAT_COMPLETIONS_URL, json=payload, headers=headers
-            )
-
-    if response.status_code != 200:
-        details = response.text
-        if len(details) > 500:
-            details = details[:500] + "…"
-        raise RuntimeError(
-            f"OpenAI request failed with status {response.status_code}: {details}"
-        )
 
-    data = response.json()
-    content = (
-        data.get("choices", [{}])[0]
-        .get("message", {})
-        .get("content", "")
-    )
-    if not isinstance(content, str) or not content.strip():
-        raise RuntimeError("OpenAI returned empty content")
+ImportStageCallback = Callable[[str], Awaitable[None]]
+
+# Bump implicitly whenever the extraction prompt or the schema it embeds changes.
+PROMPT_VERSION = hashlib.sha256(
+    (SYSTEM_PROMPT + json.dumps(resume_schema_for_prompt(), sort_keys=True)).encode("utf-8")
+).hexdigest()[:16]
 
-    try:
-        parsed = json.loads(content)
-    except json.JSONDecodeError as exc:
-        raise ValueError("LLM output was not valid JSON") from exc
 
-    if not isinstance(parsed, dict):
-        raise ValueError("LLM output must be a JSON object")
-    return parsed
+@dataclass(frozen=True)
+class CachedPdfImport:
+    extracted_text: str
+    resume_values: dict[str, Any]
+    size: int
 
 
-def import_resume_from_pdf_bytes(pdf_bytes: bytes, openai_api_key: str) -> ResumeFormValues:
-    extracted_text = extract_text_from_pdf_bytes(pdf_bytes)
+pdf_import_cache: BoundedCache[str, CachedPdfImport] = BoundedCache(
+    max_entries=int(os.environ.get("PDF_IMPORT_CACHE_MAX_ENTRIES", "256")),
+    max_bytes=int(os.environ.get("PDF_IMPORT_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+    sizeof=lambda entry: entry.size,
+)
+_pdf_import_flights: SingleFlight[str, CachedPdfImport] = SingleFlight()
+
+
+def pdf_import_cache_key(pdf_bytes: bytes, openai_api_key: str) -> str:
+    # Scoped to the API key, so one user's upload is never billed to, or
+    # failed with the credentials of, another user importing the same file.
+    digest = hashlib.sha256(pdf_bytes).hexdigest()
+    key_digest = hashlib.sha256(openai_api_key.encode("utf-8")).hexdigest()[:16]
+    return f"{digest}:{key_digest}:{_openai_model()}:{PROMPT_VERSION}"
+
+
+def _with_fresh_item_ids(resume_values: dict[str, Any]) -> ResumeFormValues:
+    sections = [
+        {
+            "sectionKey": section["sectionKey"],
+            "items": [{"id": "", "values": item["values"]} for item in section["items"]],
+        }
+        for section in resume_values["sections"]
+    ]
+    return validate_resume_form_values({"sections": sections})
+
+
+async def _import_uncached(
+    pdf_bytes: bytes,
+    openai_api_key: str,
+    on_stage: ImportStageCallback | None,
+) -> CachedPdfImport:
+    if on_stage is not None:
+        await on_stage("extracting")
+    extracted_text = await extract_text_from_pdf(pdf_bytes)
     if len(extracted_text) < MIN_EXTRACTED_TEXT_CHARS:
         raise ValueError(
             "Could not extract readable text from this PDF. "
             "If this is a scanned image PDF, please upload a text-based PDF."
         )
 
-    llm_json = call_openai_for_resume_json(openai_api_key, extracted_text)
-    resume = validate_resume_form_values(llm_json)
-    return resume
+    if on_stage is not None:
+        await on_stage("llm")
+    llm_json = await call_openai_for_resume_json(openai_api_key, extracted_text)
+    if on_stage is not None:
+        await on_stage("validating")
+    resume_values = validate_resume_form_values(llm_json).model_dump()
+    return CachedPdfImport(
+        extracted_text=extracted_text,
+        resume_values=resume_values,
+        size=len(extracted_text) + len(json.dumps(resume_values)),
+    )
+
+
+async def import_resume_from_pdf_bytes(
+    pdf_bytes: bytes,
+    openai_api_key: str,
+    on_stage: ImportStageCallback | None = None,
+) -> ResumeFormValues:
+    """
+    Extract, LLM-normalize and validate a resume PDF.
+
+    `on_stage` is awaited with "extracting", "llm" and "validating" as each
+    stage starts, so background import jobs can report progress.
+
+    Results are cached by PDF content, API key, model and prompt version: a
+    repeat upload skips extraction and the LLM call, and concurrent uploads of
+    the same file with the same key share one in-flight import. Every caller
+    gets fresh item ids.
+    """
+    key = pdf_import_cache_key(pdf_bytes, openai_api_key)
+    cached = pdf_import_cache.get(key)
+    if cached is None:
+
+        async def load() -> CachedPdfImport:
+            entry = await _import_uncached(pdf_bytes, openai_api_key, on_stage)
+            pdf_import_cache.set(key, entry)
+            return entry
+
+        cached = await _pdf_import_flights.run(key, load)
+    return _with_fresh_item_ids(cached.resume_values)
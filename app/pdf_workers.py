@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from typing import Any, Callable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+# Extra time a job gets past its deadline before the pool gives up on it
+# cooperating and kills the workers.
+HARD_KILL_GRACE_SECONDS = 5.0
+
+
+class WorkerTimeout(Exception):
+    """A job exceeded its wall-clock budget."""
+
+
+class WorkerCrashed(Exception):
+    """A worker process died while running a job."""
+
+
+class _Expired(BaseException):
+    # BaseException so broad `except Exception` blocks in library code cannot
+    # swallow it on its way out to the `deadline` block that owns it.
+    def __init__(self, token: object) -> None:
+        super().__init__()
+        self.token = token
+
+
+# Active deadlines in this thread, outermost first: (monotonic time, token).
+_deadlines: list[tuple[float, object]] = []
+_previous_handler: Any = None
+
+
+def deadlines_supported() -> bool:
+    """Deadlines use SIGALRM, so they only work on the main thread of a POSIX process."""
+    return hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+
+
+def _arm() -> None:
+    if not _deadlines:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        return
+    remaining = min(at for at, _token in _deadlines) - time.monotonic()
+    signal.setitimer(signal.ITIMER_REAL, max(remaining, 0.001))
+
+
+def _on_alarm(_signum: int, _frame: object) -> None:
+    now = time.monotonic()
+    for at, token in _deadlines:
+        if at <= now:
+            raise _Expired(token)
+    _arm()
+
+
+@contextmanager
+def deadline(seconds: float, on_expiry: Callable[[], BaseException]) -> Iterator[None]:
+    """
+    Interrupt the block after `seconds` and raise `on_expiry()` in its place.
+
+    Deadlines nest: an inner block never extends an outer one, and when an
+    outer deadline passes the inner blocks are unwound to it. Where SIGALRM
+    is unavailable (see `deadlines_supported`) the block runs unbounded.
+    """
+    global _previous_handler
+    if seconds <= 0 or not deadlines_supported():
+        yield
+        return
+    token = object()
+    if not _deadlines:
+        _previous_handler = signal.signal(signal.SIGALRM, _on_alarm)
+    _deadlines.append((time.monotonic() + seconds, token))
+    _arm()
+    try:
+        yield
+    except _Expired as exc:
+        if exc.token is not token:
+            raise
+        raise on_expiry() from None
+    finally:
+        _deadlines.pop()
+        _arm()
+        if not _deadlines:
+            signal.signal(signal.SIGALRM, _previous_handler)
+
+
+def _run_with_deadline(fn: Callable[..., T], seconds: float, *args: Any) -> T:
+    # Runs in the worker: a job that overruns fails alone and the worker lives on.
+    with deadline(seconds, WorkerTimeout):
+        return fn(*args)
+
+
+def _default_workers() -> int:
+    return min(4, os.cpu_count() or 1)
+
+
+class ProcessWorkerPool:
+    """
+    Bounded process pool for CPU-bound work that must not hold the event loop's GIL.
+
+    - `max_workers` processes run at most `max_workers` jobs at once; further
+      jobs wait for a free slot (the wait does not count against the timeout).
+    - Each job gets `timeout_seconds` of wall-clock time, enforced inside its
+      worker, so an overrunning job fails with `WorkerTimeout` without
+      disturbing other jobs. Only a job that ignores its deadline (stuck in
+      C code) for another HARD_KILL_GRACE_SECONDS gets every worker killed
+      and the pool rebuilt, so a pathological input cannot keep a core pinned.
+    - Workers are recycled after `max_jobs_per_worker` jobs to cap memory growth.
+    - `max_workers <= 0` disables the pool and runs jobs on a thread instead.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        timeout_seconds: float,
+        max_jobs_per_worker: int,
+    ) -> None:
+        self.max_workers = max_workers
+        self.timeout_seconds = timeout_seconds
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._slots: threading.BoundedSemaphore | None = None
+
+    def _get_executor(self) -> tuple[ProcessPoolExecutor, threading.BoundedSemaphore]:
+        with self._lock:
+            if self._slots is None:
+                self._slots = threading.BoundedSemaphore(self.max_workers)
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    max_tasks_per_child=self.max_jobs_per_worker or None,
+                )
+            return self._executor, self._slots
+
+    def _discard(self, executor: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        terminate = getattr(executor, "terminate_workers", None)
+        if terminate is not None:
+            terminate()
+        else:
+            for process in list((getattr(executor, "_processes", None) or {}).values()):
+                process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run_blocking(self, fn: Callable[..., T], *args: Any) -> T:
+        for attempt in range(2):
+            executor, slots = self._get_executor()
+            with slots:
+                future = executor.submit(_run_with_deadline, fn, self.timeout_seconds, *args)
+                try:
+                    return future.result(timeout=self.timeout_seconds + HARD_KILL_GRACE_SECONDS)
+                except FuturesTimeoutError as exc:
+                    self._discard(executor)
+                    raise WorkerTimeout() from exc
+                except BrokenProcessPool as exc:
+                    with self._lock:
+                        killed_for_other_job = self._executor is not executor
+                    if killed_for_other_job and attempt == 0:
+                        # Another job's timeout recycled the pool under us; retry once.
+                        continue
+                    self._discard(executor)
+                    raise WorkerCrashed() from exc
+        raise AssertionError("unreachable")
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run `fn(*args)` in a worker process without blocking the event loop."""
+        if self.max_workers <= 0:
+            return await asyncio.to_thread(fn, *args)
+        return await asyncio.to_thread(self._run_blocking, fn, *args)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def pool_from_env(prefix: str) -> ProcessWorkerPool:
+    """Build a pool configured by `<prefix>_WORKERS`, `_TIMEOUT_SECONDS` and `_MAX_JOBS_PER_WORKER`."""
+    workers = os.environ.get(f"{prefix}_WORKERS")
+    return ProcessWorkerPool(
+        max_workers=int(workers) if workers else _default_workers(),
+        timeout_seconds=float(os.environ.get(f"{prefix}_TIMEOUT_SECONDS", "20")),
+        max_jobs_per_worker=int(os.environ.get(f"{prefix}_MAX_JOBS_PER_WORKER", "50")),
+    )
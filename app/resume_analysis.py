@@ -1,18 +1,17 @@
 from __future__ import annotations
 
 from datetime import datetime
+import hashlib
 import json
 import os
-from typing import Any, Literal
+from typing import Any, AsyncIterator, Literal
 
-import httpx
 from pydantic import BaseModel, ConfigDict, ValidationError
 
+from llm_client import request_chat_completion_json, stream_chat_completion
 from resume_models import upgrade_resume_form_values
 from resume_schema import ALLOWED_SECTION_KEYS, SECTION_FIELD_KEYS, resume_schema_for_prompt
 
-OPENAI_CHAT_COMPLETIONS_URL = "https://api.openai.com/v1/chat/completions"
-
 
 AnalysisSeverity = Literal["info", "warning", "error"]
 AnalysisCategory = Literal[
@@ -70,6 +69,30 @@ class ResumeAnalysisResponse(ResumeAnalysisResult):
     model: str
 
 
+class AnalysisIssueCounts(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    info: int = 0
+    warning: int = 0
+    error: int = 0
+
+
+class ResumeAnalysisSummary(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    analysis_id: str
+    model: str
+    created_at: datetime
+    issue_counts: AnalysisIssueCounts
+
+
+class ResumeAnalysisListResponse(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    analyses: list[ResumeAnalysisSummary]
+    next_cursor: str | None = None
+
+
 SYSTEM_PROMPT = """\
 You are an expert technical recruiter and resume editor.
 
@@ -113,33 +136,45 @@ def _extract_designation(resume_values: dict[str, Any]) -> str:
     return designation.strip() if isinstance(designation, str) else ""
 
 
+ANALYSIS_OUTPUT_SCHEMA: dict[str, Any] = {
+    "designation": "string (echo input designation if present, else infer best-fit)",
+    "overall_summary": "string",
+    "recruiter_feedback": "string",
+    "strengths": ["string", "..."],
+    "risks": ["string", "..."],
+    "sections": [
+        {
+            "sectionKey": "string",
+            "summary": "string",
+            "issues": [
+                {
+                    "severity": "info|warning|error",
+                    "category": "typo|grammar|tone|clarity|format|consistency|impact|ats|other",
+                    "message": "string",
+                    "suggestion": "string",
+                    "sectionKey": "string",
+                    "itemId": "string|null",
+                    "fieldKey": "string|null",
+                    "replacement": "string|null",
+                }
+            ],
+        }
+    ],
+}
+
+# Changes whenever the prompt or either embedded schema changes, so stored
+# analyses produced by an older prompt are not reused.
+PROMPT_VERSION = hashlib.sha256(
+    (
+        SYSTEM_PROMPT
+        + json.dumps(resume_schema_for_prompt(), sort_keys=True)
+        + json.dumps(ANALYSIS_OUTPUT_SCHEMA, sort_keys=True)
+    ).encode("utf-8")
+).hexdigest()[:16]
+
+
 def _build_user_prompt(resume_values: dict[str, Any]) -> str:
     schema = resume_schema_for_prompt()
-    output_schema = {
-        "designation": "string (echo input designation if present, else infer best-fit)",
-        "overall_summary": "string",
-        "recruiter_feedback": "string",
-        "strengths": ["string", "..."],
-        "risks": ["string", "..."],
-        "sections": [
-            {
-                "sectionKey": "string",
-                "summary": "string",
-                "issues": [
-                    {
-                        "severity": "info|warning|error",
-                        "category": "typo|grammar|tone|clarity|format|consistency|impact|ats|other",
-                        "message": "string",
-                        "suggestion": "string",
-                        "sectionKey": "string",
-                        "itemId": "string|null",
-                        "fieldKey": "string|null",
-                        "replacement": "string|null",
-                    }
-                ],
-            }
-        ],
-    }
 
     designation = _extract_designation(resume_values)
     return (
@@ -153,11 +188,11 @@ def _build_user_prompt(resume_values: dict[str, Any]) -> str:
         + json.dumps(resume_values, ensure_ascii=False)
         + "\n\n"
         + "Output schema (you MUST match this exactly):\n"
-        + json.dumps(output_schema, ensure_ascii=False)
+        + json.dumps(ANALYSIS_OUTPUT_SCHEMA, ensure_ascii=False)
     )
 
 
-def call_openai_for_resume_analysis(
+async def call_openai_for_resume_analysis(
     openai_api_key: str, resume_values: dict[str, Any]
 ) -> dict[str, Any]:
     payload: dict[str, Any] = {
@@ -169,49 +204,10 @@ def call_openai_for_resume_analysis(
         ],
         "response_format": {"type": "json_object"},
     }
+    return await request_chat_completion_json(openai_api_key, payload, timeout=90.0)
 
-    headers = {"Authorization": f"Bearer {openai_api_key}"}
-    with httpx.Client(timeout=90.0) as client:
-        response = client.post(OPENAI_CHAT_COMPLETIONS_URL, json=payload, headers=headers)
-
-    if response.status_code == 400:
-        payload.pop("response_format", None)
-        with httpx.Client(timeout=90.0) as client:
-            response = client.post(
-                OPENAI_CHAT_COMPLETIONS_URL, json=payload, headers=headers
-            )
-
-    if response.status_code != 200:
-        details = response.text
-        if len(details) > 500:
-            details = details[:500] + "…"
-        raise RuntimeError(
-            f"OpenAI request failed with status {response.status_code}: {details}"
-        )
-
-    data = response.json()
-    content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-    if not isinstance(content, str) or not content.strip():
-        raise RuntimeError("OpenAI returned empty content")
-
-    try:
-        parsed = json.loads(content)
-    except json.JSONDecodeError as exc:
-        raise ValueError("LLM output was not valid JSON") from exc
-
-    if not isinstance(parsed, dict):
-        raise ValueError("LLM output must be a JSON object")
-    return parsed
-
-
-def validate_resume_analysis_for_resume(
-    analysis_json: dict[str, Any], resume_values: dict[str, Any]
-) -> ResumeAnalysisResult:
-    try:
-        parsed = ResumeAnalysisResult.model_validate(analysis_json)
-    except ValidationError as exc:
-        raise ValueError("LLM output did not match analysis schema") from exc
 
+def _section_item_ids(resume_values: dict[str, Any]) -> dict[str, set[str]]:
     upgraded = upgrade_resume_form_values(resume_values)
     section_item_ids: dict[str, set[str]] = {}
     for section in upgraded.get("sections", []):
@@ -230,32 +226,175 @@ def validate_resume_analysis_for_resume(
                 if isinstance(item_id, str) and item_id.strip():
                     ids.add(item_id)
         section_item_ids[section_key] = ids
+    return section_item_ids
+
+
+def _sanitize_section_analysis(
+    section: ResumeSectionAnalysis, section_item_ids: dict[str, set[str]]
+) -> None:
+    if section.sectionKey not in ALLOWED_SECTION_KEYS:
+        raise ValueError(f"Unknown sectionKey in analysis: {section.sectionKey}")
+    allowed_fields = set(SECTION_FIELD_KEYS[section.sectionKey])
+    allowed_item_ids = section_item_ids.get(section.sectionKey, set())
+
+    for issue in section.issues:
+        if issue.sectionKey != section.sectionKey:
+            issue.sectionKey = section.sectionKey
+        if issue.fieldKey is not None and issue.fieldKey not in allowed_fields:
+            issue.fieldKey = None
+            issue.itemId = None
+        if (
+            issue.itemId is not None
+            and allowed_item_ids
+            and issue.itemId not in allowed_item_ids
+        ):
+            issue.itemId = None
+            issue.fieldKey = None
+
+
+def validate_resume_analysis_for_resume(
+    analysis_json: dict[str, Any], resume_values: dict[str, Any]
+) -> ResumeAnalysisResult:
+    try:
+        parsed = ResumeAnalysisResult.model_validate(analysis_json)
+    except ValidationError as exc:
+        raise ValueError("LLM output did not match analysis schema") from exc
 
+    section_item_ids = _section_item_ids(resume_values)
     for section in parsed.sections:
-        if section.sectionKey not in ALLOWED_SECTION_KEYS:
-            raise ValueError(f"Unknown sectionKey in analysis: {section.sectionKey}")
-        allowed_fields = set(SECTION_FIELD_KEYS[section.sectionKey])
-        allowed_item_ids = section_item_ids.get(section.sectionKey, set())
-
-        for issue in section.issues:
-            if issue.sectionKey != section.sectionKey:
-                issue.sectionKey = section.sectionKey
-            if issue.fieldKey is not None and issue.fieldKey not in allowed_fields:
-                issue.fieldKey = None
-                issue.itemId = None
-            if (
-                issue.itemId is not None
-                and allowed_item_ids
-                and issue.itemId not in allowed_item_ids
-            ):
-                issue.itemId = None
-                issue.fieldKey = None
+        _sanitize_section_analysis(section, section_item_ids)
 
     return parsed
 
 
-def analyze_resume_snapshot(
+def validate_section_analysis_for_resume(
+    section_json: Any, section_item_ids: dict[str, set[str]]
+) -> ResumeSectionAnalysis:
+    try:
+        section = ResumeSectionAnalysis.model_validate(section_json)
+    except ValidationError as exc:
+        raise ValueError("LLM output did not match section analysis schema") from exc
+    _sanitize_section_analysis(section, section_item_ids)
+    return section
+
+
+async def analyze_resume_snapshot(
     openai_api_key: str, resume_values: dict[str, Any]
 ) -> ResumeAnalysisResult:
-    analysis_json = call_openai_for_resume_analysis(openai_api_key, resume_values)
+    analysis_json = await call_openai_for_resume_analysis(openai_api_key, resume_values)
     return validate_resume_analysis_for_resume(analysis_json, resume_values)
+
+
+class IncrementalSectionParser:
+    """
+    Pull completed entries of the top-level "sections" array out of a JSON
+    document that is still being generated.
+
+    Chunks are scanned once; each time an object directly inside "sections"
+    closes, its text is decoded and returned from `feed`.
+    """
+
+    def __init__(self) -> None:
+        self.buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start = -1
+        self._last_top_level_string: str | None = None
+        self._after_colon = False
+        self._in_sections = False
+        self._section_start = -1
+
+    def feed(self, chunk: str) -> list[Any]:
+        self.buffer += chunk
+        completed: list[Any] = []
+        buffer = self.buffer
+        for index in range(self._pos, len(buffer)):
+            ch = buffer[index]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_top_level_string = buffer[self._string_start + 1 : index]
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = index
+            elif ch == ":":
+                self._after_colon = self._depth == 1
+                continue
+            elif ch in "{[":
+                if (
+                    ch == "["
+                    and self._depth == 1
+                    and self._after_colon
+                    and self._last_top_level_string == "sections"
+                ):
+                    self._in_sections = True
+                elif ch == "{" and self._depth == 2 and self._in_sections:
+                    self._section_start = index
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if ch == "}" and self._depth == 2 and self._section_start >= 0:
+                    try:
+                        completed.append(json.loads(buffer[self._section_start : index + 1]))
+                    except json.JSONDecodeError:
+                        pass
+                    self._section_start = -1
+                elif ch == "]" and self._depth == 1:
+                    self._in_sections = False
+            if not ch.isspace():
+                self._after_colon = False
+        self._pos = len(buffer)
+        return completed
+
+
+async def call_openai_for_resume_analysis_stream(
+    openai_api_key: str, resume_values: dict[str, Any]
+) -> AsyncIterator[str]:
+    payload: dict[str, Any] = {
+        "model": _openai_model(),
+        "temperature": 0.2,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": _build_user_prompt(resume_values)},
+        ],
+        "response_format": {"type": "json_object"},
+    }
+    async for delta in stream_chat_completion(openai_api_key, payload, timeout=90.0):
+        yield delta
+
+
+async def stream_resume_analysis(
+    openai_api_key: str, resume_values: dict[str, Any]
+) -> AsyncIterator[ResumeSectionAnalysis | ResumeAnalysisResult]:
+    """
+    Stream an analysis: yield each section as soon as it is complete and valid,
+    then the fully validated `ResumeAnalysisResult` last.
+    """
+    section_item_ids = _section_item_ids(resume_values)
+    parser = IncrementalSectionParser()
+    async for delta in call_openai_for_resume_analysis_stream(openai_api_key, resume_values):
+        for section_json in parser.feed(delta):
+            try:
+                yield validate_section_analysis_for_resume(section_json, section_item_ids)
+            except ValueError:
+                # The final validation below reports the error for the whole document.
+                continue
+
+    if not parser.buffer.strip():
+        raise RuntimeError("OpenAI returned empty content")
+    try:
+        analysis_json = json.loads(parser.buffer)
+    except json.JSONDecodeError as exc:
+        raise ValueError("LLM output was not valid JSON") from exc
+    if not isinstance(analysis_json, dict):
+        raise ValueError("LLM output must be a JSON object")
+    yield validate_resume_analysis_for_resume(analysis_json, resume_values)
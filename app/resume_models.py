@@ -1,27 +1,68 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Any
+import hashlib
+import json
+from typing import Annotated, Any, Literal, Union
 import re
 import uuid
 
-from pydantic import BaseModel, ConfigDict, ValidationError, model_validator
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, ValidationInfo, model_validator
 from urllib.parse import urlparse
 
 from resume_schema import (
-    ALLOWED_SECTION_KEYS,
-    RESUME_SECTIONS,
-    SECTION_FIELD_KEYS,
-    SINGLE_ENTRY_SECTION_KEYS,
-    EXTRA_URL_FIELD_KEYS,
-    URL_FIELD_KEYS,
+    COMPILED_SECTION_BY_KEY,
+    COMPILED_SECTIONS,
+    CompiledSectionSpec,
 )
 
 
+# Namespace for ids assigned while upgrading stored resumes (see derived_entry_id).
+RESUME_ITEM_ID_NAMESPACE = uuid.UUID("f90d10f7-856d-46ee-87f9-a2f0e9614cc9")
+
+
 def new_entry_id() -> str:
     return str(uuid.uuid4())
 
 
+def derived_entry_id(resume_id: str, section_key: str, position: int, attempt: int = 0) -> str:
+    """Stable id for the item at `position` of a stored resume's section."""
+    name = f"{resume_id}/{section_key}/{position}"
+    if attempt:
+        name += f"/{attempt}"
+    return str(uuid.uuid5(RESUME_ITEM_ID_NAMESPACE, name))
+
+
+def canonical_json_hash(data: Any) -> str:
+    """SHA-256 of `data` serialized with sorted keys and no insignificant whitespace."""
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def resume_label(normalized_json: object | None) -> str:
+    """Display name from the personal-information section, or "" if there is none."""
+    if not isinstance(normalized_json, dict):
+        return ""
+    sections = normalized_json.get("sections")
+    if not isinstance(sections, list) or not sections:
+        return ""
+    personal = sections[0]
+    if not isinstance(personal, dict):
+        return ""
+    items = personal.get("items")
+    if not isinstance(items, list) or not items:
+        return ""
+    first_item = items[0]
+    if not isinstance(first_item, dict):
+        return ""
+    values = first_item.get("values")
+    if not isinstance(values, dict):
+        return ""
+    first = values.get("first-name")
+    last = values.get("last-name")
+    return " ".join(part for part in [first, last] if isinstance(part, str) and part.strip()).strip()
+
+
 class ResumeItem(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
@@ -36,77 +77,88 @@ class ResumeSectionPayload(BaseModel):
     items: list[ResumeItem]
 
 
+def _validate_section(section: ResumeSectionPayload, seen_item_ids: set[str]) -> None:
+    """Check one section's items against the schema; URL fields are normalized in place."""
+    spec = COMPILED_SECTION_BY_KEY[section.sectionKey]
+    if spec.single_entry and len(section.items) > 1:
+        raise ValueError(
+            f"Section {section.sectionKey} allows at most 1 item"
+        )
+
+    for item in section.items:
+        if not item.id or not item.id.strip():
+            raise ValueError(f"Section {section.sectionKey} has an item with an empty id")
+        if item.id in seen_item_ids:
+            raise ValueError(f"Duplicate item id: {item.id}")
+        seen_item_ids.add(item.id)
+
+        values = item.values
+        if values.keys() != spec.field_set:
+            keys = set(values.keys())
+            extra_fields = keys - spec.field_set
+            if extra_fields:
+                raise ValueError(
+                    f"Section {section.sectionKey} has unknown field key(s): {sorted(extra_fields)}"
+                )
+            raise ValueError(
+                f"Section {section.sectionKey} is missing field key(s): {sorted(spec.field_set - keys)}"
+            )
+
+        for field_key, is_url in zip(spec.field_keys, spec.url_mask):
+            if not is_url:
+                continue
+            value = values[field_key].strip()
+            if value:
+                values[field_key] = _checked_url(section.sectionKey, field_key, value)
+
+
+# Validation context flag marking input that _canonicalize produced.
+_CANONICAL_CONTEXT_KEY = "canonical"
+
+
 class ResumeFormValues(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
     sections: list[ResumeSectionPayload]
 
     @model_validator(mode="after")
-    def validate_resume_schema(self) -> "ResumeFormValues":
+    def validate_resume_schema(self, info: ValidationInfo) -> "ResumeFormValues":
+        if info.context and info.context.get(_CANONICAL_CONTEXT_KEY):
+            # Produced by _canonicalize, which already enforces these rules.
+            return self
         seen_item_ids: set[str] = set()
 
         seen: list[str] = [section.sectionKey for section in self.sections]
-        missing = [s.key for s in RESUME_SECTIONS if s.key not in seen]
-        extra = [key for key in seen if key not in ALLOWED_SECTION_KEYS]
-
+        seen_set = set(seen)
+        extra = seen_set - COMPILED_SECTION_BY_KEY.keys()
         if extra:
-            raise ValueError(f"Unknown sectionKey(s): {sorted(set(extra))}")
+            raise ValueError(f"Unknown sectionKey(s): {sorted(extra)}")
+        missing = [spec.key for spec in COMPILED_SECTIONS if spec.key not in seen_set]
         if missing:
             raise ValueError(f"Missing sectionKey(s): {missing}")
-
-        duplicates = sorted({k for k in seen if seen.count(k) > 1})
-        if duplicates:
+        if len(seen) != len(seen_set):
+            counts: dict[str, int] = {}
+            for key in seen:
+                counts[key] = counts.get(key, 0) + 1
+            duplicates = sorted(key for key, count in counts.items() if count > 1)
             raise ValueError(f"Duplicate sectionKey(s): {duplicates}")
 
-        expected_order = [s.key for s in RESUME_SECTIONS]
-        if seen != expected_order:
+        if any(COMPILED_SECTION_BY_KEY[key].position != index for index, key in enumerate(seen)):
             raise ValueError(
                 "Sections must be in canonical order: "
-                + ", ".join(expected_order)
+                + ", ".join(spec.key for spec in COMPILED_SECTIONS)
             )
 
         for section in self.sections:
-            if section.sectionKey in SINGLE_ENTRY_SECTION_KEYS and len(section.items) > 1:
-                raise ValueError(
-                    f"Section {section.sectionKey} allows at most 1 item"
-                )
+            _validate_section(section, seen_item_ids)
 
-            allowed_fields = set(SECTION_FIELD_KEYS[section.sectionKey])
-            url_fields = set(URL_FIELD_KEYS.get(section.sectionKey, ())) | set(
-                EXTRA_URL_FIELD_KEYS.get(section.sectionKey, ())
-            )
-            for item in section.items:
-                if not item.id or not item.id.strip():
-                    raise ValueError(f"Section {section.sectionKey} has an item with an empty id")
-                if item.id in seen_item_ids:
-                    raise ValueError(f"Duplicate item id: {item.id}")
-                seen_item_ids.add(item.id)
-
-                keys = set(item.values.keys())
-                missing_fields = allowed_fields - keys
-                extra_fields = keys - allowed_fields
-                if extra_fields:
-                    raise ValueError(
-                        f"Section {section.sectionKey} has unknown field key(s): {sorted(extra_fields)}"
-                    )
-                if missing_fields:
-                    raise ValueError(
-                        f"Section {section.sectionKey} is missing field key(s): {sorted(missing_fields)}"
-                    )
+        return self
 
-                for url_field_key in url_fields:
-                    raw = item.values.get(url_field_key, "")
-                    value = raw.strip() if isinstance(raw, str) else ""
-                    if not value:
-                        continue
-                    normalized = _normalize_url_for_field(section.sectionKey, url_field_key, value)
-                    if not _is_valid_url(normalized):
-                        # Be forgiving: store invalid URL-like values as empty strings.
-                        item.values[url_field_key] = ""
-                        continue
-                    item.values[url_field_key] = normalized
 
-        return self
+def _checked_url(section_key: str, field_key: str, value: str) -> str:
+    normalized = _normalize_url_for_field(section_key, field_key, value)
+    # Be forgiving: store invalid URL-like values as empty strings.
+    return normalized if _is_valid_url(normalized) else ""
 
 
 def _is_valid_url(value: str) -> bool:
@@ -173,6 +225,7 @@ class ResumeListResponse(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
     resumes: list[ResumeListItem]
+    next_cursor: str | None = None
 
 
 class ResumeItemInput(BaseModel):
@@ -218,26 +271,29 @@ class ResumeSchemaResponse(BaseModel):
     sections: list[ResumeSchemaSection]
 
 
-def upgrade_resume_form_values(data: Any) -> dict[str, Any]:
+def upgrade_resume_form_values(data: Any, *, resume_id: str | None = None) -> dict[str, Any]:
     """
     Best-effort upgrade of stored resume JSON to the latest canonical schema.
 
     This avoids breaking older resumes when the schema changes (e.g. adding a
     new field). Unknown keys are ignored; missing keys are filled with "".
+
+    Items with a missing or duplicate id get a new one. With `resume_id` the
+    new id is derived from the resume, section and position, so upgrading the
+    same stored document always yields the same result; without it (fresh
+    documents that have no row yet) a random id is used.
     """
-    canonical_sections = [
-        {"sectionKey": section.key, "items": []}
-        for section in RESUME_SECTIONS
-    ]
-    if not isinstance(data, dict):
-        return {"sections": canonical_sections}
+    return _canonicalize(data, resume_id=resume_id, check_urls=False)
+
 
-    incoming_sections = data.get("sections")
-    if not isinstance(incoming_sections, list):
-        return {"sections": canonical_sections}
+def _canonicalize(data: Any, *, resume_id: str | None, check_urls: bool) -> dict[str, Any]:
+    # The output always satisfies ResumeFormValues' structural rules; with
+    # `check_urls` invalid URLs are also blanked as its validator would.
+    if not isinstance(data, dict) or not isinstance(data.get("sections"), list):
+        return {"sections": [{"sectionKey": spec.key, "items": []} for spec in COMPILED_SECTIONS]}
 
     incoming_by_key: dict[str, Any] = {}
-    for section in incoming_sections:
+    for section in data["sections"]:
         if not isinstance(section, dict):
             continue
         key = section.get("sectionKey")
@@ -246,12 +302,8 @@ def upgrade_resume_form_values(data: Any) -> dict[str, Any]:
 
     used_item_ids: set[str] = set()
     upgraded_sections: list[dict[str, Any]] = []
-    for section in RESUME_SECTIONS:
-        section_key = section.key
-        allowed_fields = set(SECTION_FIELD_KEYS[section_key])
-        url_fields = set(URL_FIELD_KEYS.get(section_key, ())) | set(
-            EXTRA_URL_FIELD_KEYS.get(section_key, ())
-        )
+    for spec in COMPILED_SECTIONS:
+        section_key = spec.key
         incoming_section = incoming_by_key.get(section_key, {})
         incoming_items = (
             incoming_section.get("items")
@@ -269,32 +321,27 @@ def upgrade_resume_form_values(data: Any) -> dict[str, Any]:
             raw_item_id = item.get("id")
             item_id = raw_item_id.strip() if isinstance(raw_item_id, str) else ""
             if not item_id or item_id in used_item_ids:
-                item_id = new_entry_id()
-                while item_id in used_item_ids:
-                    item_id = new_entry_id()
+                position = len(upgraded_items)
+                attempt = 0
+                while not item_id or item_id in used_item_ids:
+                    item_id = (
+                        derived_entry_id(resume_id, section_key, position, attempt)
+                        if resume_id is not None
+                        else new_entry_id()
+                    )
+                    attempt += 1
             used_item_ids.add(item_id)
 
             values = item.get("values")
             if not isinstance(values, dict):
                 values = {}
 
-            upgraded_values: dict[str, str] = {}
-            for field_key in SECTION_FIELD_KEYS[section_key]:
-                raw_value = values.get(field_key)
-                coerced = _coerce_scalar_to_string(raw_value)
-                if field_key in url_fields and coerced.strip():
-                    coerced = _normalize_url_for_field(section_key, field_key, coerced)
-                upgraded_values[field_key] = coerced
-
             # If the client/LLM sent unknown keys, we intentionally drop them.
-            unknown_keys = set(values.keys()) - allowed_fields
-            if unknown_keys:
-                # No-op: we already excluded them.
-                pass
-
-            upgraded_items.append({"id": item_id, "values": upgraded_values})
+            upgraded_items.append(
+                {"id": item_id, "values": _upgrade_item_values(spec, values, check_urls=check_urls)}
+            )
 
-            if section_key in SINGLE_ENTRY_SECTION_KEYS:
+            if spec.single_entry:
                 break
 
         upgraded_sections.append(
@@ -304,6 +351,35 @@ def upgrade_resume_form_values(data: Any) -> dict[str, Any]:
     return {"sections": upgraded_sections}
 
 
+def _upgrade_item_values(
+    spec: CompiledSectionSpec,
+    values: dict[str, Any],
+    *,
+    fill_missing: bool = True,
+    check_urls: bool = False,
+) -> dict[str, str]:
+    """
+    Coerce one item's values to the section's string fields.
+
+    Unknown keys are dropped; with `fill_missing` absent fields become "".
+    """
+    upgraded_values: dict[str, str] = {}
+    for field_key, is_url in zip(spec.field_keys, spec.url_mask):
+        if not fill_missing and field_key not in values:
+            continue
+        raw_value = values.get(field_key)
+        # Nearly every value is already a string; skip the call for those.
+        coerced = raw_value if isinstance(raw_value, str) else _coerce_scalar_to_string(raw_value)
+        if is_url and coerced.strip():
+            coerced = (
+                _checked_url(spec.key, field_key, coerced)
+                if check_urls
+                else _normalize_url_for_field(spec.key, field_key, coerced)
+            )
+        upgraded_values[field_key] = coerced
+    return upgraded_values
+
+
 def _coerce_scalar_to_string(value: Any) -> str:
     if value is None:
         return ""
@@ -325,8 +401,161 @@ def normalize_llm_resume_form_values(data: Any) -> Any:
 
 
 def validate_resume_form_values(data: Any) -> ResumeFormValues:
+    """
+    Upgrade and validate in one pass.
+
+    The canonical document `_canonicalize` returns already meets every rule
+    `ResumeFormValues` checks, so only the field types are validated when
+    building the models; the schema validator is skipped.
+    """
+    try:
+        normalized = _canonicalize(data, resume_id=None, check_urls=True)
+        return ResumeFormValues.model_validate(normalized, context={_CANONICAL_CONTEXT_KEY: True})
+    except (TypeError, ValidationError) as exc:
+        raise ValueError(str(exc)) from exc
+
+
+class ReplaceItemValuesOperation(BaseModel):
+    """Overwrite the given fields of one item; fields not sent are kept."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    op: Literal["replace"]
+    sectionKey: str
+    itemId: str
+    values: dict[str, Any]
+
+
+class InsertItemOperation(BaseModel):
+    """Insert an item at `index` (default: append). Missing fields become ""."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    op: Literal["insert"]
+    sectionKey: str
+    item: ResumeItemInput
+    index: int | None = None
+
+
+class DeleteItemOperation(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    op: Literal["delete"]
+    sectionKey: str
+    itemId: str
+
+
+class MoveItemOperation(BaseModel):
+    """Move an item to `index` within its section."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    op: Literal["move"]
+    sectionKey: str
+    itemId: str
+    index: int
+
+
+ResumePatchOperation = Annotated[
+    Union[ReplaceItemValuesOperation, InsertItemOperation, DeleteItemOperation, MoveItemOperation],
+    Field(discriminator="op"),
+]
+
+
+class ResumePatchInput(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    operations: list[ResumePatchOperation] = Field(min_length=1)
+
+
+class ResumePatchResponse(BaseModel):
+    """The sections the patch touched, as stored."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    resume_id: str
+    sections: list[ResumeSectionPayload]
+
+
+def _item_position(items: list[dict[str, Any]], section_key: str, item_id: str) -> int:
+    for position, item in enumerate(items):
+        if item.get("id") == item_id:
+            return position
+    raise ValueError(f"Section {section_key} has no item with id {item_id}")
+
+
+def _patched_item_values(
+    spec: CompiledSectionSpec, values: dict[str, Any], *, fill_missing: bool
+) -> dict[str, str]:
+    # Unlike upgrades of stored documents, client edits must not drop keys silently.
+    extra_fields = values.keys() - spec.field_set
+    if extra_fields:
+        raise ValueError(f"Section {spec.key} has unknown field key(s): {sorted(extra_fields)}")
     try:
-        normalized = normalize_llm_resume_form_values(data)
-        return ResumeFormValues.model_validate(normalized)
-    except ValidationError as exc:
+        return _upgrade_item_values(spec, values, fill_missing=fill_missing)
+    except TypeError as exc:
         raise ValueError(str(exc)) from exc
+
+
+def apply_resume_patch(
+    document: dict[str, Any], operations: list[ResumePatchOperation]
+) -> tuple[dict[str, Any], list[ResumeSectionPayload]]:
+    """
+    Apply `operations` to a canonical stored document.
+
+    Only the touched sections are copied, edited and validated; untouched
+    sections (and their items) are shared with `document`, which is left
+    unmodified. Returns the new document and the validated touched sections.
+    Raises ValueError for unknown sections or items and for invalid results.
+    """
+    sections: list[dict[str, Any]] = list(document["sections"])
+    position_by_key = {section["sectionKey"]: position for position, section in enumerate(sections)}
+    touched: dict[str, list[dict[str, Any]]] = {}
+
+    def items_for(section_key: str) -> list[dict[str, Any]]:
+        if section_key not in touched:
+            if section_key not in position_by_key:
+                raise ValueError(f"Unknown sectionKey(s): {[section_key]}")
+            touched[section_key] = list(sections[position_by_key[section_key]]["items"])
+        return touched[section_key]
+
+    for operation in operations:
+        items = items_for(operation.sectionKey)
+        if isinstance(operation, ReplaceItemValuesOperation):
+            position = _item_position(items, operation.sectionKey, operation.itemId)
+            spec = COMPILED_SECTION_BY_KEY[operation.sectionKey]
+            changes = _patched_item_values(spec, operation.values, fill_missing=False)
+            items[position] = {**items[position], "values": {**items[position]["values"], **changes}}
+        elif isinstance(operation, InsertItemOperation):
+            index = len(items) if operation.index is None else operation.index
+            if not 0 <= index <= len(items):
+                raise ValueError(f"Insert index {index} is out of range for section {operation.sectionKey}")
+            item_id = (operation.item.id or "").strip() or new_entry_id()
+            spec = COMPILED_SECTION_BY_KEY[operation.sectionKey]
+            values = _patched_item_values(spec, operation.item.values, fill_missing=True)
+            items.insert(index, {"id": item_id, "values": values})
+        elif isinstance(operation, DeleteItemOperation):
+            del items[_item_position(items, operation.sectionKey, operation.itemId)]
+        else:
+            if not 0 <= operation.index < len(items):
+                raise ValueError(f"Move index {operation.index} is out of range for section {operation.sectionKey}")
+            item = items.pop(_item_position(items, operation.sectionKey, operation.itemId))
+            items.insert(operation.index, item)
+
+    # Ids must stay unique document-wide: seed the check with untouched sections' ids.
+    seen_item_ids = {
+        item["id"]
+        for section in sections
+        if section["sectionKey"] not in touched
+        for item in section["items"]
+    }
+    validated: list[ResumeSectionPayload] = []
+    for section_key, items in sorted(touched.items(), key=lambda entry: position_by_key[entry[0]]):
+        try:
+            section = ResumeSectionPayload.model_validate({"sectionKey": section_key, "items": items})
+        except ValidationError as exc:
+            raise ValueError(str(exc)) from exc
+        _validate_section(section, seen_item_ids)
+        sections[position_by_key[section_key]] = section.model_dump()
+        validated.append(section)
+    return {**document, "sections": sections}, validated
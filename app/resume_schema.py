@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+import hashlib
+import json
 
 
 def to_key(value: str) -> str:
@@ -190,6 +192,59 @@ SINGLE_ENTRY_SECTION_KEYS: set[str] = {
 }
 
 
+@dataclass(frozen=True)
+class CompiledSectionSpec:
+    """Per-section lookups precomputed once for the upgrade/validation hot path."""
+
+    key: str
+    position: int
+    single_entry: bool
+    field_keys: tuple[str, ...]
+    field_set: frozenset[str]
+    # url_mask[i] is True when field_keys[i] holds a URL.
+    url_mask: tuple[bool, ...]
+
+
+def compile_section_specs() -> tuple[CompiledSectionSpec, ...]:
+    specs: list[CompiledSectionSpec] = []
+    for position, section in enumerate(RESUME_SECTIONS):
+        url_fields = set(URL_FIELD_KEYS[section.key]) | set(EXTRA_URL_FIELD_KEYS.get(section.key, ()))
+        field_keys = SECTION_FIELD_KEYS[section.key]
+        specs.append(
+            CompiledSectionSpec(
+                key=section.key,
+                position=position,
+                single_entry=section.key in SINGLE_ENTRY_SECTION_KEYS,
+                field_keys=field_keys,
+                field_set=frozenset(field_keys),
+                url_mask=tuple(key in url_fields for key in field_keys),
+            )
+        )
+    return tuple(specs)
+
+
+COMPILED_SECTIONS: tuple[CompiledSectionSpec, ...] = compile_section_specs()
+COMPILED_SECTION_BY_KEY: dict[str, CompiledSectionSpec] = {spec.key: spec for spec in COMPILED_SECTIONS}
+
+
+def _schema_fingerprint() -> str:
+    # Only what shapes stored documents: section keys/order/cardinality and
+    # field keys/types. Title and label edits do not invalidate stored resumes.
+    structure = {
+        "sections": [
+            [section.key, section.entry_type, [[f.key, f.field_type] for f in section.fields]]
+            for section in RESUME_SECTIONS
+        ],
+        "extra_url_fields": EXTRA_URL_FIELD_KEYS,
+    }
+    canonical = json.dumps(structure, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+# Stamped on stored resumes; documents at this version are already canonical.
+RESUME_SCHEMA_VERSION: str = _schema_fingerprint()
+
+
 def build_empty_values_for_section(section_key: str) -> dict[str, str]:
     schema = SECTION_BY_KEY.get(section_key)
     if schema is None:
@@ -241,3 +296,13 @@ def resume_schema_for_client() -> list[dict]:
         }
         for section in RESUME_SECTIONS
     ]
+
+
+def _client_schema_fingerprint() -> str:
+    canonical = json.dumps(resume_schema_for_client(), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+# Changes with anything the client sees, titles and labels included; the
+# `/resume/schema` ETag.
+RESUME_CLIENT_SCHEMA_VERSION: str = _client_schema_fingerprint()
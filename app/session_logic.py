@@ -1,20 +1,46 @@
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, timezone
+import hashlib
+import hmac
+import json
+import os
 import secrets
+import time
 import uuid
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 from fastapi import Depends, Header, HTTPException, status
 import httpx
 from pydantic import BaseModel
-from sqlalchemy import JSON, Column, DateTime, Integer, String, create_engine, func
-from sqlalchemy.orm import Session as DBSession, declarative_base, sessionmaker
 
-DATABASE_URL = "sqlite:///./app.db"
-OPENAI_VALIDATE_URL = "https://api.openai.com/v1/models"
-
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
+from caching import BoundedCache
+from database import CompressedJSON, create_database_engine, precise_now
+from llm_client import list_models
+from resume_models import canonical_json_hash, resume_label
+from resume_schema import RESUME_SCHEMA_VERSION
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    event,
+    false,
+    func,
+    insert,
+    inspect,
+    select,
+    text,
+    update,
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+from sqlalchemy.ext.asyncio import AsyncSession as DBSession, async_sessionmaker
+from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm.attributes import flag_modified
+
+engine = create_database_engine()
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
 
@@ -25,6 +51,10 @@ class UserSession(Base):
     email = Column(String, nullable=False, index=True)
     session_token = Column(String, nullable=False, unique=True, index=True)
     openai_key = Column(String, nullable=False, unique=True, index=True)
+    # Both reset when the token rotates; `last_seen_at` is refreshed lazily
+    # (see SESSION_TOUCH_INTERVAL_SECONDS), so it may lag by that much.
+    created_at = Column(DateTime, server_default=func.now(), nullable=False, index=True)
+    last_seen_at = Column(DateTime, server_default=func.now(), nullable=False, index=True)
 
 
 class Resume(Base):
@@ -32,7 +62,84 @@ class Resume(Base):
 
     id = Column(String, primary_key=True, index=True)
     user_email = Column(String, nullable=False, index=True)
-    normalized_json = Column(JSON, nullable=True)
+    normalized_json = Column(CompressedJSON, nullable=True)
+    # Keyset-paginated, so stored in the same text format as bound cursors.
+    created_at = Column(DateTime, server_default=precise_now(), nullable=False)
+    # Summary of normalized_json, kept in sync by the mapper events below so
+    # the listing never has to load the document itself.
+    label = Column(String, nullable=False, default="", server_default="")
+    has_content = Column(Boolean, nullable=False, default=False, server_default=false())
+    content_size = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime, nullable=True)
+    # RESUME_SCHEMA_VERSION the document was last upgraded/validated against;
+    # NULL or an older value means it still needs upgrade_resume_form_values.
+    schema_version = Column(String, nullable=True)
+    # canonical_json_hash of normalized_json, the resume's ETag. NULL for rows
+    # not rewritten since the column was added (see upgrade_stale_resumes).
+    content_hash = Column(String, nullable=True)
+
+    __table_args__ = (
+        # Newest-first listing per user, keyset-paginated on (created_at, id).
+        Index("ix_resumes_user_email_created_at_id", "user_email", "created_at", "id"),
+        # Latest write per user, for the listing's ETag.
+        Index("ix_resumes_user_email_updated_at", "user_email", "updated_at"),
+    )
+
+
+def resume_summary_values(document: object | None) -> dict[str, object]:
+    """Summary column values for a resume document."""
+    return {
+        "label": resume_label(document),
+        "has_content": document is not None,
+        "content_size": len(json.dumps(document).encode("utf-8")) if document is not None else 0,
+        "content_hash": canonical_json_hash(document) if document is not None else None,
+        "updated_at": datetime.now(timezone.utc).replace(tzinfo=None),
+    }
+
+
+def store_resume_document(row: Resume, document: dict) -> None:
+    """Store a canonical (validated or upgraded) document stamped with the current schema version."""
+    row.normalized_json = document
+    row.schema_version = RESUME_SCHEMA_VERSION
+    # Re-assigning the version a row already holds records no history; flag it
+    # so the update event can tell this write apart from a raw assignment.
+    flag_modified(row, "schema_version")
+    if row.content_hash is None and inspect(row).persistent:
+        # An upgrade can leave the document unchanged, so the update event
+        # would not sync it; rows from before content_hash need it filled.
+        _sync_resume_summary(row)
+
+
+def _sync_resume_summary(target: Resume) -> None:
+    for key, value in resume_summary_values(target.normalized_json).items():
+        setattr(target, key, value)
+
+
+@event.listens_for(Resume, "before_insert")
+def _resume_before_insert(_mapper, _connection, target: Resume) -> None:
+    _sync_resume_summary(target)
+
+
+@event.listens_for(Resume, "before_update")
+def _resume_before_update(_mapper, _connection, target: Resume) -> None:
+    """Keep the summary columns in step with every write of normalized_json."""
+    state = inspect(target).attrs
+    if state.normalized_json.history.has_changes():
+        _sync_resume_summary(target)
+        if not state.schema_version.history.has_changes():
+            # Written without store_resume_document: do not vouch for its shape.
+            target.schema_version = None
+
+
+class ResumeSnapshot(Base):
+    """Content-addressed resume snapshot shared by every analysis of identical content."""
+
+    __tablename__ = "resume_snapshots"
+
+    hash = Column(String, primary_key=True)
+    document = Column(CompressedJSON, nullable=False)
+    # Unreferenced once no resume_analyses row points here; deleted by
+    # maintenance.collect_unreferenced_snapshots.
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
 
 
@@ -40,12 +147,122 @@ class ResumeAnalysis(Base):
     __tablename__ = "resume_analyses"
 
     id = Column(String, primary_key=True, index=True)
-    resume_id = Column(String, nullable=False, index=True)
+    resume_id = Column(
+        String, ForeignKey("resumes.id", ondelete="CASCADE"), nullable=False, index=True
+    )
     user_email = Column(String, nullable=False, index=True)
-    source_json = Column(JSON, nullable=False)
-    analysis_json = Column(JSON, nullable=True)
+    analysis_json = Column(CompressedJSON, nullable=True)
     model = Column(String, nullable=False, default="")
+    # The analyzed resume content lives in resume_snapshots under this hash.
+    snapshot_hash = Column(String, ForeignKey("resume_snapshots.hash"), nullable=True, index=True)
+    prompt_version = Column(String, nullable=True)
+    created_at = Column(DateTime, server_default=precise_now(), nullable=False)
+    # Issue counts per severity, derived from analysis_json so history
+    # listings can skip the blob. NULL until the analysis has completed.
+    info_count = Column(Integer, nullable=True)
+    warning_count = Column(Integer, nullable=True)
+    error_count = Column(Integer, nullable=True)
+
+    __table_args__ = (
+        # Latest/history lookups only ever want completed analyses.
+        Index(
+            "ix_resume_analyses_completed",
+            "resume_id",
+            "user_email",
+            "created_at",
+            "id",
+            sqlite_where=text("error_count IS NOT NULL"),
+            postgresql_where=text("error_count IS NOT NULL"),
+        ),
+        # Reuse lookup: same snapshot, newest completed first.
+        Index(
+            "ix_resume_analyses_completed_snapshot",
+            "snapshot_hash",
+            "created_at",
+            sqlite_where=text("error_count IS NOT NULL"),
+            postgresql_where=text("error_count IS NOT NULL"),
+        ),
+        # Unfinished placeholders by age, for purging failed analyses.
+        Index(
+            "ix_resume_analyses_pending_created_at",
+            "created_at",
+            sqlite_where=text("error_count IS NULL"),
+            postgresql_where=text("error_count IS NULL"),
+        ),
+    )
+
+
+def analysis_issue_counts(analysis_json: object) -> dict[str, int] | None:
+    if not isinstance(analysis_json, dict):
+        return None
+    counts = {"info": 0, "warning": 0, "error": 0}
+    for section in analysis_json.get("sections") or []:
+        if not isinstance(section, dict):
+            continue
+        for issue in section.get("issues") or []:
+            if isinstance(issue, dict) and issue.get("severity") in counts:
+                counts[issue["severity"]] += 1
+    return counts
+
+
+def _sync_analysis_issue_counts(target: ResumeAnalysis) -> None:
+    counts = analysis_issue_counts(target.analysis_json) or {}
+    target.info_count = counts.get("info")
+    target.warning_count = counts.get("warning")
+    target.error_count = counts.get("error")
+
+
+@event.listens_for(ResumeAnalysis, "before_insert")
+def _analysis_before_insert(_mapper, _connection, target: ResumeAnalysis) -> None:
+    _sync_analysis_issue_counts(target)
+
+
+@event.listens_for(ResumeAnalysis, "before_update")
+def _analysis_before_update(_mapper, _connection, target: ResumeAnalysis) -> None:
+    if inspect(target).attrs.analysis_json.history.has_changes():
+        _sync_analysis_issue_counts(target)
+
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+
+    id = Column(String, primary_key=True, index=True)
+    user_email = Column(String, nullable=False, index=True)
+    status = Column(String, nullable=False, default="queued")
+    resume_id = Column(
+        String, ForeignKey("resumes.id", ondelete="SET NULL"), nullable=True, index=True
+    )
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(
+        DateTime, server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+
+class IdempotencyKey(Base):
+    """Outcome of a request sent with an `Idempotency-Key` header, replayed to retries."""
+
+    __tablename__ = "idempotency_keys"
+
+    user_email = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    # sha256 of what the request asked for; a reused key with a different
+    # request is rejected rather than replayed.
+    fingerprint = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="in_progress")
+    # {"status_code", "headers", "body"} once completed.
+    response = Column(CompressedJSON, nullable=True)
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class SessionGeneration(Base):
+    """Single-row counter bumped whenever a session token is revoked."""
+
+    __tablename__ = "session_generation"
+
+    id = Column(Integer, primary_key=True)
+    generation = Column(Integer, nullable=False, default=0)
 
 
 def new_resume_id() -> str:
@@ -67,40 +284,215 @@ class UserResponse(BaseModel):
     email: str
 
 
-def get_db() -> DBSession:
-    db = SessionLocal()
-    try:
+async def get_db() -> AsyncIterator[DBSession]:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
-def require_session_token(
+@dataclass(frozen=True)
+class AuthenticatedSession:
+    id: int
+    email: str
+    openai_key: str
+    created_at: datetime
+    last_seen_at: datetime
+
+
+SESSION_CACHE_TTL_SECONDS = float(os.environ.get("SESSION_CACHE_TTL_SECONDS", "60"))
+SESSION_GENERATION_CHECK_SECONDS = float(
+    os.environ.get("SESSION_GENERATION_CHECK_SECONDS", "1")
+)
+# Sessions expire after this long without a request, or this long after login.
+SESSION_IDLE_TIMEOUT_SECONDS = float(
+    os.environ.get("SESSION_IDLE_TIMEOUT_SECONDS", str(30 * 86400))
+)
+SESSION_MAX_AGE_SECONDS = float(os.environ.get("SESSION_MAX_AGE_SECONDS", str(90 * 86400)))
+# `last_seen_at` is written at most this often per session.
+SESSION_TOUCH_INTERVAL_SECONDS = float(os.environ.get("SESSION_TOUCH_INTERVAL_SECONDS", "300"))
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def session_expiry_criteria(now: datetime) -> list:
+    """SQL conditions matching expired sessions; any one of them expires a session."""
+    return [
+        UserSession.last_seen_at < now - timedelta(seconds=SESSION_IDLE_TIMEOUT_SECONDS),
+        UserSession.created_at < now - timedelta(seconds=SESSION_MAX_AGE_SECONDS),
+    ]
+
+
+def _session_expired(session: AuthenticatedSession, now: datetime) -> bool:
+    return (
+        now - session.last_seen_at > timedelta(seconds=SESSION_IDLE_TIMEOUT_SECONDS)
+        or now - session.created_at > timedelta(seconds=SESSION_MAX_AGE_SECONDS)
+    )
+
+
+async def _touch_session(db: DBSession, session: AuthenticatedSession, now: datetime) -> AuthenticatedSession:
+    """
+    Refresh `last_seen_at` if it is older than SESSION_TOUCH_INTERVAL_SECONDS.
+
+    Most requests return without writing. The UPDATE re-checks the age, so
+    concurrent requests and other workers coalesce onto a single write.
+    """
+    if now - session.last_seen_at < timedelta(seconds=SESSION_TOUCH_INTERVAL_SECONDS):
+        return session
+    await db.execute(
+        update(UserSession)
+        .where(
+            UserSession.id == session.id,
+            UserSession.last_seen_at < now - timedelta(seconds=SESSION_TOUCH_INTERVAL_SECONDS),
+        )
+        .values(last_seen_at=now)
+    )
+    await db.commit()
+    return replace(session, last_seen_at=now)
+
+session_token_cache: BoundedCache[str, AuthenticatedSession] = BoundedCache(
+    max_entries=int(os.environ.get("SESSION_CACHE_MAX_ENTRIES", "10000")),
+    ttl_seconds=SESSION_CACHE_TTL_SECONDS,
+)
+
+
+@dataclass
+class _GenerationState:
+    value: int | None = None
+    checked_at: float = float("-inf")
+
+
+_session_generation = _GenerationState()
+
+
+async def _sync_session_generation(db: DBSession) -> None:
+    """
+    Drop cached sessions if any worker revoked a token since we last looked.
+
+    Revocations bump `session_generation`; reading it at most once every
+    SESSION_GENERATION_CHECK_SECONDS keeps multi-worker deployments correct
+    without a per-request query.
+    """
+    now = time.monotonic()
+    if now - _session_generation.checked_at < SESSION_GENERATION_CHECK_SECONDS:
+        return
+    generation = await db.scalar(
+        select(SessionGeneration.generation).where(SessionGeneration.id == 1)
+    ) or 0
+    if generation != _session_generation.value:
+        session_token_cache.clear()
+        _session_generation.value = generation
+    _session_generation.checked_at = now
+
+
+async def _bump_session_generation(db: DBSession) -> None:
+    """Record a revocation for other workers; commits with the caller's transaction."""
+    result = await db.execute(
+        update(SessionGeneration)
+        .where(SessionGeneration.id == 1)
+        .values(generation=SessionGeneration.generation + 1)
+    )
+    if result.rowcount == 0:
+        await db.execute(insert(SessionGeneration).values(id=1, generation=1))
+
+
+def reset_session_cache() -> None:
+    session_token_cache.clear()
+    session_token_cache.reset_stats()
+    openai_key_validation_cache.clear()
+    openai_key_validation_cache.reset_stats()
+    _session_generation.value = None
+    _session_generation.checked_at = float("-inf")
+
+
+async def require_session_token(
     session_token: Optional[str] = Header(default=None, alias="X-Session-Token"),
     db: DBSession = Depends(get_db),
-) -> UserSession:
+) -> AuthenticatedSession:
     if session_token is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Session token missing",
         )
 
-    session = (
-        db.query(UserSession).filter(UserSession.session_token == session_token).first()
-    )
-    if session is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid session token",
+    await _sync_session_generation(db)
+    now = _utcnow()
+    cached = session_token_cache.get(session_token)
+    session = cached
+    if session is None or _session_expired(session, now):
+        # A cached entry may only look expired because another worker
+        # refreshed `last_seen_at`; the row decides.
+        row = (
+            await db.execute(
+                select(
+                    UserSession.id,
+                    UserSession.email,
+                    UserSession.openai_key,
+                    UserSession.created_at,
+                    UserSession.last_seen_at,
+                ).where(UserSession.session_token == session_token)
+            )
+        ).first()
+        if row is None:
+            session_token_cache.pop(session_token)
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid session token",
+            )
+        session = AuthenticatedSession(
+            id=row.id,
+            email=row.email,
+            openai_key=row.openai_key,
+            created_at=row.created_at,
+            last_seen_at=row.last_seen_at,
         )
-    return session
+        if _session_expired(session, now):
+            session_token_cache.pop(session_token)
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Session expired",
+            )
+
+    touched = await _touch_session(db, session, now)
+    if touched is not cached:
+        session_token_cache.set(session_token, touched)
+    return touched
 
 
 def generate_openai_key() -> str:
     return f"sk-{secrets.token_urlsafe(32)}"
 
 
-def validate_openai_key(openai_key: str) -> str:
+# Keys are never stored in the cache; entries are keyed by an HMAC so a memory
+# dump does not reveal them. A per-process random secret is fine because the
+# cache is per-process too.
+OPENAI_KEY_CACHE_SECRET = (
+    os.environ.get("OPENAI_KEY_CACHE_SECRET", "").encode("utf-8") or secrets.token_bytes(32)
+)
+OPENAI_KEY_VALIDATION_TTL_SECONDS = float(
+    os.environ.get("OPENAI_KEY_VALIDATION_TTL_SECONDS", "600")
+)
+OPENAI_KEY_REJECTION_TTL_SECONDS = float(
+    os.environ.get("OPENAI_KEY_REJECTION_TTL_SECONDS", "30")
+)
+
+
+@dataclass(frozen=True)
+class OpenAIKeyValidation:
+    valid: bool
+    validated_at: float
+
+
+openai_key_validation_cache: BoundedCache[str, OpenAIKeyValidation] = BoundedCache(
+    max_entries=int(os.environ.get("OPENAI_KEY_VALIDATION_CACHE_MAX_ENTRIES", "10000")),
+)
+
+
+def _openai_key_fingerprint(openai_key: str) -> str:
+    return hmac.new(OPENAI_KEY_CACHE_SECRET, openai_key.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+async def validate_openai_key(openai_key: str) -> str:
     """
     Validate the provided OpenAI key and return a normalized (trimmed) key.
 
@@ -117,12 +509,19 @@ def validate_openai_key(openai_key: str) -> str:
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid OpenAI key. Use a key that starts with 'sk-'.",
         )
+
+    fingerprint = _openai_key_fingerprint(normalized_key)
+    cached = openai_key_validation_cache.get(fingerprint)
+    if cached is not None and cached.valid:
+        return normalized_key
+    if cached is not None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="OpenAI key could not be validated. Check that the key is active.",
+        )
+
     try:
-        with httpx.Client(timeout=5.0) as client:
-            response = client.get(
-                OPENAI_VALIDATE_URL,
-                headers={"Authorization": f"Bearer {normalized_key}"},
-            )
+        response = await list_models(normalized_key, timeout=5.0)
     except httpx.HTTPError as exc:
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
@@ -130,8 +529,19 @@ def validate_openai_key(openai_key: str) -> str:
         ) from exc
 
     if response.status_code == 200:
+        openai_key_validation_cache.set(
+            fingerprint,
+            OpenAIKeyValidation(valid=True, validated_at=time.time()),
+            ttl_seconds=OPENAI_KEY_VALIDATION_TTL_SECONDS,
+        )
         return normalized_key
     if response.status_code in (401, 403):
+        # Briefly remember rejections to absorb client retry storms.
+        openai_key_validation_cache.set(
+            fingerprint,
+            OpenAIKeyValidation(valid=False, validated_at=time.time()),
+            ttl_seconds=OPENAI_KEY_REJECTION_TTL_SECONDS,
+        )
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="OpenAI key could not be validated. Check that the key is active.",
@@ -147,22 +557,22 @@ def validate_openai_key(openai_key: str) -> str:
     )
 
 
-def create_session(payload: SessionCreate, db: DBSession) -> SessionResponse:
+async def create_session(payload: SessionCreate, db: DBSession) -> SessionResponse:
     """
     Create (or rotate) a session token for the given OpenAI key.
     """
     
-    normalized_key = validate_openai_key(payload.openai_key)
+    normalized_key = await validate_openai_key(payload.openai_key)
     token = secrets.token_urlsafe(32)
 
     while (
-        db.query(UserSession).filter(UserSession.session_token == token).first()
+        await db.scalar(select(UserSession.id).where(UserSession.session_token == token))
         is not None
     ):
         token = secrets.token_urlsafe(32)
 
-    session_entry = (
-        db.query(UserSession).filter(UserSession.openai_key == normalized_key).first()
+    session_entry = await db.scalar(
+        select(UserSession).where(UserSession.openai_key == normalized_key)
     )
 
     if session_entry is None:
@@ -174,11 +584,14 @@ def create_session(payload: SessionCreate, db: DBSession) -> SessionResponse:
         db.add(session_entry)
     else:
         # Rotate session token for the existing key (invalidate the old token).
+        session_token_cache.pop(session_entry.session_token)
         session_entry.email = payload.email
         session_entry.session_token = token
+        session_entry.created_at = session_entry.last_seen_at = _utcnow()
+        await _bump_session_generation(db)
 
-    db.commit()
-    db.refresh(session_entry)
+    await db.commit()
+    await db.refresh(session_entry)
     return SessionResponse(
         email=session_entry.email,
         session_token=session_entry.session_token,
@@ -186,7 +599,7 @@ def create_session(payload: SessionCreate, db: DBSession) -> SessionResponse:
     )
 
 
-def logout_session(session_token: Optional[str], db: DBSession) -> dict[str, str]:
+async def logout_session(session_token: Optional[str], db: DBSession) -> dict[str, str]:
     """Invalidate the current session token."""
     if session_token is None:
         raise HTTPException(
@@ -194,10 +607,8 @@ def logout_session(session_token: Optional[str], db: DBSession) -> dict[str, str
             detail="Invalid session",
         )
 
-    session_entry = (
-        db.query(UserSession)
-        .filter(UserSession.session_token == session_token)
-        .first()
+    session_entry = await db.scalar(
+        select(UserSession).where(UserSession.session_token == session_token)
     )
     if session_entry is None:
         raise HTTPException(
@@ -205,6 +616,8 @@ def logout_session(session_token: Optional[str], db: DBSession) -> dict[str, str
             detail="Invalid session",
         )
 
-    db.delete(session_entry)
-    db.commit()
+    session_token_cache.pop(session_token)
+    await db.delete(session_entry)
+    await _bump_session_generation(db)
+    await db.commit()
     return {"status": "success", "message": "Logged out"}
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession as DBSession
+
+from session_logic import ResumeSnapshot
+
+_UPSERTS = {"sqlite": sqlite_insert, "postgresql": postgresql_insert}
+
+
+async def retain_snapshot(db: DBSession, snapshot_hash: str, document: dict) -> None:
+    """
+    Store `document` under its canonical hash unless it is already stored.
+
+    Runs as a single upsert in the caller's transaction, so concurrent
+    analyses of identical content share one row without racing on insert.
+    References are the resume_analyses rows themselves; nothing is counted.
+    """
+    upsert = _UPSERTS[db.bind.dialect.name]
+    table = ResumeSnapshot.__table__
+    statement = upsert(table).values(hash=snapshot_hash, document=document)
+    await db.execute(statement.on_conflict_do_nothing(index_elements=[table.c.hash]))
+
+
+async def load_snapshot(db: DBSession, snapshot_hash: str) -> dict | None:
+    return await db.scalar(select(ResumeSnapshot.document).where(ResumeSnapshot.hash == snapshot_hash))
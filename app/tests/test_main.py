@@ -1,3 +1,5 @@
+from contextlib import contextmanager
+from datetime import datetime
 import itertools
 import sys
 from pathlib import Path
@@ -6,12 +8,25 @@ import pytest
 import httpx
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
+import llm_client
+from database import create_database_engine
 from main import app
-from session_logic import Base, Resume, ResumeAnalysis, UserSession, get_db
+from pagination import encode_cursor
+from session_logic import (
+    Base,
+    Resume,
+    ResumeAnalysis,
+    ResumeSnapshot,
+    UserSession,
+    get_db,
+    reset_session_cache,
+)
 
 TEST_DATABASE_URL = "sqlite:///./test_app.db"
 
@@ -21,6 +36,30 @@ test_engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
 
+# TestClient may run requests on different event loops, so never reuse async connections.
+async_test_engine = create_database_engine(TEST_DATABASE_URL, poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(
+    bind=async_test_engine, autoflush=False, expire_on_commit=False
+)
+
+
+@contextmanager
+def recorded_statements(fragment: str):
+    """Collect SQL statements issued by the app that contain `fragment`."""
+    from sqlalchemy import event
+
+    statements: list[str] = []
+
+    def record(_conn, _cursor, statement, _parameters, _context, _executemany):
+        if fragment in statement:
+            statements.append(statement)
+
+    event.listen(async_test_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(async_test_engine.sync_engine, "before_cursor_execute", record)
+
 
 def insert_session(email: str, token: str, openai_key: str | None = None) -> None:
     generated_key = openai_key or f"sk-test-{email}"
@@ -34,12 +73,9 @@ def prepare_database():
     Base.metadata.drop_all(bind=test_engine)
     Base.metadata.create_all(bind=test_engine)
 
-    def override_get_db():
-        db = TestingSessionLocal()
-        try:
+    async def override_get_db():
+        async with AsyncTestingSessionLocal() as db:
             yield db
-        finally:
-            db.close()
 
     app.dependency_overrides[get_db] = override_get_db
     yield
@@ -47,26 +83,83 @@ def prepare_database():
     Base.metadata.drop_all(bind=test_engine)
 
 
+def install_openai_transport(monkeypatch, handler) -> None:
+    monkeypatch.setattr(
+        llm_client,
+        "create_llm_client",
+        lambda: httpx.AsyncClient(
+            base_url=llm_client.OPENAI_API_BASE_URL,
+            transport=httpx.MockTransport(handler),
+        ),
+    )
+    monkeypatch.setattr(llm_client, "_client", None)
+
+
 @pytest.fixture(autouse=True)
 def mock_openai_validation(monkeypatch):
-    class FakeResponse:
-        def __init__(self, status_code: int):
-            self.status_code = status_code
+    install_openai_transport(monkeypatch, lambda _request: httpx.Response(200, json={"data": []}))
+
+
+@pytest.fixture(autouse=True)
+def inline_pdf_extraction(monkeypatch):
+    # Monkeypatched extractors cannot be pickled into worker processes.
+    import pdf_import
+
+    monkeypatch.setattr(pdf_import.pdf_extraction_pool, "max_workers", 0)
 
-    class FakeClient:
-        def __init__(self, status_code: int = 200):
-            self._status_code = status_code
 
-        def __enter__(self):
-            return self
+@pytest.fixture(autouse=True)
+def clear_pdf_import_cache():
+    import pdf_import
 
-        def __exit__(self, exc_type, exc_value, traceback):
-            return False
+    pdf_import.pdf_import_cache.clear()
+    pdf_import.pdf_import_cache.reset_stats()
+    yield
+    pdf_import.pdf_import_cache.clear()
 
-        def get(self, _url, headers=None):
-            return FakeResponse(self._status_code)
 
-    monkeypatch.setattr(httpx, "Client", lambda *args, **kwargs: FakeClient())
+@pytest.fixture(autouse=True)
+def clear_session_cache():
+    reset_session_cache()
+    yield
+    reset_session_cache()
+
+
+def build_text_pdf(lines: list[str]) -> bytes:
+    stream = "BT /F1 12 Tf 72 720 Td 14 TL " + " ".join(
+        "(" + line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ") '"
+        for line in lines
+    ) + " ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        "/Resources << /Font << /F1 5 0 R >> >> /Contents 4 0 R >>",
+        f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref_at = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref_at}\n%%EOF\n"
+    ).encode()
+    return out
+
+
+def extracted_text(extract):
+    """Stand-in for `pdf_import.extract_text_from_pdf` returning `extract(pdf_bytes)`."""
+
+    async def fake_extract_text_from_pdf(pdf_bytes: bytes) -> str:
+        return extract(pdf_bytes)
+
+    return fake_extract_text_from_pdf
 
 
 @pytest.fixture()
@@ -156,21 +249,7 @@ def test_create_session_rejects_invalid_openai_key(client):
 
 
 def test_create_session_rejects_unverified_openai_key(client, monkeypatch):
-    class FakeResponse:
-        def __init__(self, status_code: int):
-            self.status_code = status_code
-
-    class FakeClient:
-        def __enter__(self):
-            return self
-
-        def __exit__(self, exc_type, exc_value, traceback):
-            return False
-
-        def get(self, _url, headers=None):
-            return FakeResponse(401)
-
-    monkeypatch.setattr(httpx, "Client", lambda *args, **kwargs: FakeClient())
+    install_openai_transport(monkeypatch, lambda _request: httpx.Response(401))
 
     response = client.post(
         "/sessions",
@@ -268,11 +347,13 @@ def test_import_resume_pdf_returns_parsed_resume(client, auth_headers, monkeypat
 
     monkeypatch.setattr(
         pdf_import,
-        "extract_text_from_pdf_bytes",
-        lambda _bytes: (
-            "Alice Smith\nalice@example.com\n"
-            "Experience: Example Corp - Engineer\n"
-            "Education: Example University\n"
+        "extract_text_from_pdf",
+        extracted_text(
+            lambda _bytes: (
+                "Alice Smith\nalice@example.com\n"
+                "Experience: Example Corp - Engineer\n"
+                "Education: Example University\n"
+            )
         ),
     )
 
@@ -289,10 +370,13 @@ def test_import_resume_pdf_returns_parsed_resume(client, auth_headers, monkeypat
     )
     llm_output["sections"][0]["items"] = [{"id": "", "values": personal_values}]
 
+    async def fake_call_openai(_key, _text):
+        return llm_output
+
     monkeypatch.setattr(
         pdf_import,
         "call_openai_for_resume_json",
-        lambda _key, _text: llm_output,
+        fake_call_openai,
     )
 
     response = client.post(
@@ -324,10 +408,12 @@ def test_import_resume_pdf_coerces_numeric_values_to_strings(client, auth_header
 
     monkeypatch.setattr(
         pdf_import,
-        "extract_text_from_pdf_bytes",
-        lambda _bytes: (
-            "Example University\nGPA 3.8\nExperience\n"
-            "Worked on backend systems and shipped features.\n"
+        "extract_text_from_pdf",
+        extracted_text(
+            lambda _bytes: (
+                "Example University\nGPA 3.8\nExperience\n"
+                "Worked on backend systems and shipped features.\n"
+            )
         ),
     )
 
@@ -341,10 +427,13 @@ def test_import_resume_pdf_coerces_numeric_values_to_strings(client, auth_header
     )
     llm_output["sections"][1]["items"] = [{"id": "", "values": education_values}]
 
+    async def fake_call_openai(_key, _text):
+        return llm_output
+
     monkeypatch.setattr(
         pdf_import,
         "call_openai_for_resume_json",
-        lambda _key, _text: llm_output,
+        fake_call_openai,
     )
 
     response = client.post(
@@ -379,6 +468,28 @@ def test_list_resumes_returns_only_user_resumes(client, auth_headers):
     assert [item["resume_id"] for item in body["resumes"]] == ["resume-1"]
 
 
+def test_list_resumes_reads_summary_columns_without_loading_json(client, auth_headers):
+    from resume_schema import build_empty_resume_form_values
+
+    named = build_empty_resume_form_values()
+    named["sections"][0]["items"] = [{"id": "", "values": {"first-name": "Alice", "last-name": "Smith"}}]
+    with TestingSessionLocal() as db:
+        db.add(Resume(id="resume-1", user_email="tester@example.com", normalized_json=named))
+        db.add(Resume(id="resume-2", user_email="tester@example.com", normalized_json=None))
+        db.commit()
+
+    with recorded_statements("FROM resumes") as statements:
+        response = client.get("/resumes", headers=auth_headers)
+
+    assert response.status_code == 200
+    items = {item["resume_id"]: item for item in response.json()["resumes"]}
+    assert items["resume-1"]["label"] == "Alice Smith"
+    assert items["resume-1"]["has_content"] is True
+    assert items["resume-2"]["label"] == "tester@example.com"
+    assert items["resume-2"]["has_content"] is False
+    assert statements and all("normalized_json" not in statement for statement in statements)
+
+
 def test_get_resume_returns_stored_json(client, auth_headers):
     from resume_schema import build_empty_resume_form_values
 
@@ -455,6 +566,10 @@ def test_save_resume_updates_stored_json(client, auth_headers):
         stored = db.query(Resume).filter_by(id="resume-1").one()
         uuid.UUID(stored.normalized_json["sections"][0]["items"][0]["id"])
         assert stored.normalized_json["sections"][0]["items"][0]["values"]["last-name"] == "Smith"
+        assert stored.label == "Alice Smith"
+        assert stored.has_content is True
+        assert stored.content_size > 0
+        assert stored.updated_at is not None
 
 
 def test_delete_resume_removes_row(client, auth_headers):
@@ -518,10 +633,13 @@ def test_analyze_resume_creates_analysis_row_and_returns_section_feedback(client
         ],
     }
 
+    async def fake_call_openai(_key, _resume_values):
+        return fake_analysis
+
     monkeypatch.setattr(
         resume_analysis,
         "call_openai_for_resume_analysis",
-        lambda _key, _resume_values: fake_analysis,
+        fake_call_openai,
     )
 
     response = client.post("/resumes/resume-1/analysis", headers=auth_headers)
@@ -537,8 +655,10 @@ def test_analyze_resume_creates_analysis_row_and_returns_section_feedback(client
         stored = db.query(ResumeAnalysis).filter_by(id=body["analysis_id"]).one()
         assert stored.resume_id == "resume-1"
         assert stored.user_email == "tester@example.com"
-        assert isinstance(stored.source_json, dict)
         assert isinstance(stored.analysis_json, dict)
+        snapshot = db.get(ResumeSnapshot, stored.snapshot_hash)
+        assert isinstance(snapshot.document, dict)
+        assert db.query(ResumeSnapshot).count() == 1
 
 
 def test_get_latest_resume_analysis_returns_analysis(client, auth_headers, monkeypatch):
@@ -550,17 +670,20 @@ def test_get_latest_resume_analysis_returns_analysis(client, auth_headers, monke
         db.add(Resume(id="resume-1", user_email="tester@example.com", normalized_json=stored_json))
         db.commit()
 
-    monkeypatch.setattr(
-        resume_analysis,
-        "call_openai_for_resume_analysis",
-        lambda _key, _resume_values: {
+    async def fake_call_openai(_key, _resume_values):
+        return {
             "designation": "",
             "overall_summary": "ok",
             "recruiter_feedback": "ok",
             "strengths": [],
             "risks": [],
             "sections": [],
-        },
+        }
+
+    monkeypatch.setattr(
+        resume_analysis,
+        "call_openai_for_resume_analysis",
+        fake_call_openai,
     )
 
     create = client.post("/resumes/resume-1/analysis", headers=auth_headers)
@@ -569,3 +692,1757 @@ def test_get_latest_resume_analysis_returns_analysis(client, auth_headers, monke
     latest = client.get("/resumes/resume-1/analysis/latest", headers=auth_headers)
     assert latest.status_code == 200
     assert latest.json()["analysis_id"] == create.json()["analysis_id"]
+
+
+def test_openai_requests_share_one_client_and_retry_without_response_format(
+    client, auth_headers, monkeypatch
+):
+    import json
+
+    import pdf_import
+    from resume_schema import build_empty_resume_form_values
+
+    monkeypatch.setattr(
+        pdf_import,
+        "extract_text_from_pdf",
+        extracted_text(lambda _bytes: "Alice Smith\nalice@example.com\nExperience: Example Corp - Engineer\n"),
+    )
+
+    created_clients = []
+    chat_payloads = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/v1/models":
+            return httpx.Response(200, json={"data": []})
+        payload = json.loads(request.content)
+        chat_payloads.append(payload)
+        if "response_format" in payload:
+            return httpx.Response(400, json={"error": "unsupported"})
+        content = json.dumps(build_empty_resume_form_values())
+        return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+    def create_client():
+        created = httpx.AsyncClient(
+            base_url=llm_client.OPENAI_API_BASE_URL,
+            transport=httpx.MockTransport(handler),
+        )
+        created_clients.append(created)
+        return created
+
+    monkeypatch.setattr(llm_client, "create_llm_client", create_client)
+    monkeypatch.setattr(llm_client, "_client", None)
+
+    with TestClient(app) as lifespan_client:
+        session = lifespan_client.post(
+            "/sessions", json={"email": "alice@example.com", "openai_key": "sk-test-alice"}
+        )
+        assert session.status_code == 200
+        response = lifespan_client.post(
+            "/resume/import/pdf",
+            headers={"X-Session-Token": session.json()["session_token"]},
+            files={"file": ("resume.pdf", b"%PDF-1.4", "application/pdf")},
+        )
+        assert response.status_code == 200
+
+    assert len(created_clients) == 1
+    assert created_clients[0].is_closed
+    assert len(chat_payloads) == 2
+    assert "response_format" in chat_payloads[0]
+    assert "response_format" not in chat_payloads[1]
+
+
+def _wait_for_import_job(client, job_id: str, headers: dict[str, str]) -> dict:
+    import time
+
+    deadline = time.monotonic() + 5
+    while True:
+        response = client.get(f"/resume/import/jobs/{job_id}", headers=headers)
+        assert response.status_code == 200
+        body = response.json()
+        if body["status"] in ("done", "failed") or time.monotonic() > deadline:
+            return body
+        time.sleep(0.01)
+
+
+def test_import_resume_pdf_job_mode_returns_202_and_completes(auth_headers, monkeypatch):
+    import pdf_import
+    from resume_schema import build_empty_resume_form_values, build_empty_values_for_section
+
+    monkeypatch.setattr(
+        pdf_import,
+        "extract_text_from_pdf",
+        extracted_text(lambda _bytes: "Alice Smith\nalice@example.com\nExperience: Example Corp - Engineer\n"),
+    )
+
+    llm_output = build_empty_resume_form_values()
+    personal_values = build_empty_values_for_section("personal-information")
+    personal_values.update({"first-name": "Alice", "last-name": "Smith"})
+    llm_output["sections"][0]["items"] = [{"id": "", "values": personal_values}]
+
+    async def fake_call_openai(_key, _text):
+        return llm_output
+
+    monkeypatch.setattr(pdf_import, "call_openai_for_resume_json", fake_call_openai)
+
+    with TestClient(app) as lifespan_client:
+        response = lifespan_client.post(
+            "/resume/import/pdf?mode=job",
+            headers=auth_headers,
+            files={"file": ("resume.pdf", b"%PDF-1.4", "application/pdf")},
+        )
+        assert response.status_code == 202
+        accepted = response.json()
+        assert accepted["status"] == "queued"
+        assert accepted["resume_id"] is None
+        assert response.headers["location"] == f"/resume/import/jobs/{accepted['job_id']}"
+
+        body = _wait_for_import_job(lifespan_client, accepted["job_id"], auth_headers)
+
+        other = lifespan_client.get(
+            f"/resume/import/jobs/{accepted['job_id']}",
+            headers={"X-Session-Token": "someone-else"},
+        )
+        assert other.status_code == 401
+
+    assert body["status"] == "done"
+    assert body["error"] is None
+    with TestingSessionLocal() as db:
+        stored = db.query(Resume).filter_by(id=body["resume_id"]).one()
+        assert stored.user_email == "tester@example.com"
+        assert stored.normalized_json["sections"][0]["items"][0]["values"]["first-name"] == "Alice"
+
+
+def test_import_resume_pdf_job_mode_reports_failure_without_creating_resume(
+    auth_headers, monkeypatch
+):
+    import pdf_import
+
+    monkeypatch.setattr(pdf_import, "extract_text_from_pdf", extracted_text(lambda _bytes: ""))
+
+    with TestClient(app) as lifespan_client:
+        response = lifespan_client.post(
+            "/resume/import/pdf?mode=job",
+            headers=auth_headers,
+            files={"file": ("resume.pdf", b"%PDF-1.4", "application/pdf")},
+        )
+        assert response.status_code == 202
+        body = _wait_for_import_job(lifespan_client, response.json()["job_id"], auth_headers)
+
+    assert body["status"] == "failed"
+    assert body["resume_id"] is None
+    assert "Could not extract readable text" in body["error"]
+    with TestingSessionLocal() as db:
+        assert db.query(Resume).count() == 0
+
+
+def _parse_sse(text: str) -> list[tuple[str, dict]]:
+    import json
+
+    events = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_stream_analysis_emits_sections_then_persists_result(client, auth_headers, monkeypatch):
+    import json
+
+    from resume_schema import build_empty_resume_form_values
+
+    with TestingSessionLocal() as db:
+        db.add(Resume(id="resume-1", user_email="tester@example.com", normalized_json=build_empty_resume_form_values()))
+        db.commit()
+
+    analysis = {
+        "designation": "Engineer",
+        "overall_summary": "ok",
+        "recruiter_feedback": "ok",
+        "strengths": [],
+        "risks": [],
+        "sections": [
+            {
+                "sectionKey": "personal-information",
+                "summary": "Looks fine.",
+                "issues": [
+                    {
+                        "severity": "info",
+                        "category": "format",
+                        "message": "m",
+                        "suggestion": "s",
+                        "sectionKey": "personal-information",
+                        "itemId": None,
+                        "fieldKey": "not-a-field",
+                        "replacement": None,
+                    }
+                ],
+            },
+            {"sectionKey": "education", "summary": "Add dates.", "issues": []},
+        ],
+    }
+    content = json.dumps(analysis)
+    stream_payloads = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        stream_payloads.append(json.loads(request.content))
+        lines = [
+            "data: " + json.dumps({"choices": [{"delta": {"content": content[i : i + 7]}}]})
+            for i in range(0, len(content), 7)
+        ]
+        body = "\n\n".join(lines + ["data: [DONE]"]) + "\n\n"
+        return httpx.Response(200, text=body, headers={"content-type": "text/event-stream"})
+
+    install_openai_transport(monkeypatch, handler)
+
+    response = client.post("/resumes/resume-1/analysis/stream", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert stream_payloads[0]["stream"] is True
+    events = _parse_sse(response.text)
+    assert [name for name, _ in events] == ["section", "section", "complete"]
+    assert events[0][1]["sectionKey"] == "personal-information"
+    assert events[0][1]["issues"][0]["fieldKey"] is None
+    assert events[1][1]["sectionKey"] == "education"
+    complete = events[2][1]
+    assert complete["designation"] == "Engineer"
+
+    with TestingSessionLocal() as db:
+        stored = db.query(ResumeAnalysis).filter_by(id=complete["analysis_id"]).one()
+        assert stored.analysis_json["sections"][1]["sectionKey"] == "education"
+
+
+def test_stream_analysis_reports_invalid_output_as_error_event(client, auth_headers, monkeypatch):
+    import resume_analysis
+    from resume_schema import build_empty_resume_form_values
+
+    with TestingSessionLocal() as db:
+        db.add(Resume(id="resume-1", user_email="tester@example.com", normalized_json=build_empty_resume_form_values()))
+        db.commit()
+
+    async def fake_stream(_key, _resume_values):
+        yield '{"designation": "x", "sections": [{"sectionKey": "unknown", '
+        yield '"summary": "", "issues": []}]}'
+
+    monkeypatch.setattr(resume_analysis, "call_openai_for_resume_analysis_stream", fake_stream)
+
+    response = client.post("/resumes/resume-1/analysis/stream", headers=auth_headers)
+
+    assert response.status_code == 200
+    events = _parse_sse(response.text)
+    assert [name for name, _ in events] == ["error"]
+    assert events[0][1]["detail"] == "LLM output did not match analysis schema"
+    with TestingSessionLocal() as db:
+        assert [row.analysis_json for row in db.query(ResumeAnalysis).all()] == [None]
+
+
+def test_extract_text_runs_in_worker_process_pool(monkeypatch):
+    import asyncio
+
+    import pdf_import
+    from pdf_workers import ProcessWorkerPool
+
+    pool = ProcessWorkerPool(max_workers=1, timeout_seconds=30, max_jobs_per_worker=1)
+    monkeypatch.setattr(pdf_import, "pdf_extraction_pool", pool)
+    pdf_bytes = build_text_pdf(["Alice Smith", "Senior Engineer at Example Corp"])
+
+    async def extract_twice():
+        return [
+            await pdf_import.extract_text_from_pdf(pdf_bytes),
+            await pdf_import.extract_text_from_pdf(pdf_bytes),
+        ]
+
+    try:
+        texts = asyncio.run(extract_twice())
+    finally:
+        pool.shutdown()
+
+    assert texts[0] == texts[1]
+    assert "Alice Smith" in texts[0]
+    assert "Example Corp" in texts[0]
+
+
+def test_worker_pool_timeout_kills_job_and_recovers():
+    import asyncio
+    import time
+
+    from pdf_workers import ProcessWorkerPool, WorkerTimeout
+
+    pool = ProcessWorkerPool(max_workers=1, timeout_seconds=0.5, max_jobs_per_worker=10)
+    try:
+        started = time.monotonic()
+        with pytest.raises(WorkerTimeout):
+            asyncio.run(pool.run(time.sleep, 30))
+        assert time.monotonic() - started < 10
+        assert asyncio.run(pool.run(abs, -3)) == 3
+    finally:
+        pool.shutdown()
+
+
+def test_worker_timeout_fails_only_its_own_job():
+    import asyncio
+    import time
+
+    from pdf_workers import ProcessWorkerPool, WorkerTimeout, deadline
+
+    pool = ProcessWorkerPool(max_workers=2, timeout_seconds=1.0, max_jobs_per_worker=10)
+
+    async def overrun_beside_a_normal_job():
+        return await asyncio.gather(
+            pool.run(time.sleep, 30), pool.run(time.sleep, 0.5), return_exceptions=True
+        )
+
+    try:
+        stuck, normal = asyncio.run(overrun_beside_a_normal_job())
+        assert isinstance(stuck, WorkerTimeout)
+        assert normal is None
+        # Enforced inside the worker: the pool was not torn down.
+        assert pool._executor is not None
+    finally:
+        pool.shutdown()
+
+    # An outer deadline is never extended by an inner one.
+    started = time.monotonic()
+    with pytest.raises(WorkerTimeout):
+        with deadline(0.2, WorkerTimeout):
+            with deadline(5, TimeoutError):
+                time.sleep(3)
+    assert time.monotonic() - started < 1
+
+
+def test_import_resume_pdf_rejects_unreadable_pdf(client, auth_headers):
+    response = client.post(
+        "/resume/import/pdf",
+        headers=auth_headers,
+        files={"file": ("resume.pdf", b"not really a pdf", "application/pdf")},
+    )
+    assert response.status_code == 422
+    assert response.json()["detail"] == "Could not read this PDF. Please upload a valid, text-based PDF."
+
+
+def _fake_llm_resume_output(first_name: str) -> dict:
+    from resume_schema import build_empty_resume_form_values, build_empty_values_for_section
+
+    llm_output = build_empty_resume_form_values()
+    personal_values = build_empty_values_for_section("personal-information")
+    personal_values.update({"first-name": first_name, "last-name": "Smith"})
+    llm_output["sections"][0]["items"] = [{"id": "", "values": personal_values}]
+    return llm_output
+
+
+def test_repeat_pdf_upload_is_served_from_cache_with_fresh_item_ids(
+    client, auth_headers, monkeypatch
+):
+    import pdf_import
+
+    extract_calls = []
+    llm_calls = []
+
+    def fake_extract(pdf_bytes):
+        extract_calls.append(pdf_bytes)
+        return "Alice Smith\nalice@example.com\nExperience: Example Corp - Engineer\n"
+
+    async def fake_call_openai(_key, _text):
+        llm_calls.append(_text)
+        return _fake_llm_resume_output("Alice")
+
+    monkeypatch.setattr(pdf_import, "extract_text_from_pdf", extracted_text(fake_extract))
+    monkeypatch.setattr(pdf_import, "call_openai_for_resume_json", fake_call_openai)
+
+    bodies = []
+    for _ in range(2):
+        response = client.post(
+            "/resume/import/pdf",
+            headers=auth_headers,
+            files={"file": ("resume.pdf", b"%PDF-1.4 same bytes", "application/pdf")},
+        )
+        assert response.status_code == 200
+        bodies.append(response.json())
+
+    assert len(extract_calls) == 1
+    assert len(llm_calls) == 1
+    first_item, second_item = (body["sections"][0]["items"][0] for body in bodies)
+    assert first_item["values"] == second_item["values"]
+    assert first_item["id"] != second_item["id"]
+    assert bodies[0]["resume_id"] != bodies[1]["resume_id"]
+
+    stats = client.get("/metrics").json()["pdf_import_cache"]
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+
+
+def test_concurrent_imports_of_same_pdf_share_one_llm_call(monkeypatch):
+    import asyncio
+
+    import pdf_import
+
+    llm_calls = []
+
+    async def fake_call_openai(_key, _text):
+        llm_calls.append(_text)
+        await asyncio.sleep(0.05)
+        return _fake_llm_resume_output("Alice")
+
+    monkeypatch.setattr(
+        pdf_import,
+        "extract_text_from_pdf",
+        extracted_text(lambda _bytes: "Alice Smith\nalice@example.com\nExperience: Example Corp - Engineer\n"),
+    )
+    monkeypatch.setattr(pdf_import, "call_openai_for_resume_json", fake_call_openai)
+
+    async def import_concurrently():
+        return await asyncio.gather(
+            *(pdf_import.import_resume_from_pdf_bytes(b"%PDF-1.4 shared", "sk-test") for _ in range(5))
+        )
+
+    results = asyncio.run(import_concurrently())
+
+    assert len(llm_calls) == 1
+    item_ids = {result.sections[0].items[0].id for result in results}
+    assert len(item_ids) == 5
+
+
+def test_concurrent_pdf_imports_are_scoped_by_key_and_survive_leader_cancellation(monkeypatch):
+    import asyncio
+
+    import pdf_import
+
+    llm_keys = []
+
+    async def fake_call_openai(key, _text):
+        llm_keys.append(key)
+        await asyncio.sleep(0.05)
+        return _fake_llm_resume_output("Alice")
+
+    monkeypatch.setattr(
+        pdf_import,
+        "extract_text_from_pdf",
+        extracted_text(lambda _bytes: "Alice Smith\nalice@example.com\nExperience: Example Corp - Engineer\n"),
+    )
+    monkeypatch.setattr(pdf_import, "call_openai_for_resume_json", fake_call_openai)
+
+    async def import_with_leader_cancelled():
+        leader = asyncio.create_task(pdf_import.import_resume_from_pdf_bytes(b"%PDF-1.4 shared", "sk-a"))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(pdf_import.import_resume_from_pdf_bytes(b"%PDF-1.4 shared", "sk-a"))
+        other_user = asyncio.create_task(pdf_import.import_resume_from_pdf_bytes(b"%PDF-1.4 shared", "sk-b"))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await asyncio.gather(follower, other_user)
+
+    results = asyncio.run(import_with_leader_cancelled())
+
+    assert sorted(llm_keys) == ["sk-a", "sk-b"]
+    assert [result.sections[0].items[0].values["first-name"] for result in results] == ["Alice", "Alice"]
+
+
+def test_pdf_import_cache_is_size_bounded_lru():
+    from caching import BoundedCache
+
+    cache: BoundedCache[str, str] = BoundedCache(max_entries=10, max_bytes=10, sizeof=len)
+    cache.set("a", "xxxx")
+    cache.set("b", "xxxx")
+    assert cache.get("a") == "xxxx"
+    cache.set("c", "xxxx")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "xxxx"
+    assert cache.get("c") == "xxxx"
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] == 8
+
+
+def test_analyze_resume_reuses_analysis_for_unchanged_snapshot(client, auth_headers, monkeypatch):
+    from collections import Counter
+
+    import resume_analysis
+    from resume_schema import build_empty_resume_form_values
+
+    with TestingSessionLocal() as db:
+        db.add(Resume(id="resume-1", user_email="tester@example.com", normalized_json=build_empty_resume_form_values()))
+        db.commit()
+
+    llm_calls = []
+
+    async def fake_call_openai(_key, resume_values):
+        llm_calls.append(resume_values)
+        return {
+            "designation": "",
+            "overall_summary": f"run {len(llm_calls)}",
+            "recruiter_feedback": "ok",
+            "strengths": [],
+            "risks": [],
+            "sections": [],
+        }
+
+    monkeypatch.setattr(resume_analysis, "call_openai_for_resume_analysis", fake_call_openai)
+
+    first = client.post("/resumes/resume-1/analysis", headers=auth_headers)
+    repeat = client.post("/resumes/resume-1/analysis", headers=auth_headers)
+    assert first.status_code == repeat.status_code == 200
+    assert repeat.json() == first.json()
+    assert len(llm_calls) == 1
+
+    forced = client.post("/resumes/resume-1/analysis?force=true", headers=auth_headers)
+    assert forced.status_code == 200
+    assert forced.json()["analysis_id"] != first.json()["analysis_id"]
+    assert forced.json()["overall_summary"] == "run 2"
+
+    edited = build_empty_resume_form_values()
+    edited["sections"][4]["items"] = [{"values": {"skill": "Python", "description": ""}}]
+    assert client.put("/resumes/resume-1", headers=auth_headers, json=edited).status_code == 200
+    after_edit = client.post("/resumes/resume-1/analysis", headers=auth_headers)
+    assert after_edit.json()["overall_summary"] == "run 3"
+    assert len(llm_calls) == 3
+
+    with TestingSessionLocal() as db:
+        rows = db.query(ResumeAnalysis).all()
+        assert len(rows) == 3
+        assert sorted(Counter(row.snapshot_hash for row in rows).values()) == [1, 2]
+        assert all(row.prompt_version == resume_analysis.PROMPT_VERSION for row in rows)
+
+
+@pytest.fixture()
+def session_queries():
+    from sqlalchemy import event
+
+    statements: list[str] = []
+
+    def record(_conn, _cursor, statement, _parameters, _context, _executemany):
+        if "FROM sessions" in statement:
+            statements.append(statement)
+
+    event.listen(async_test_engine.sync_engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(async_test_engine.sync_engine, "before_cursor_execute", record)
+
+
+def test_session_token_lookups_are_cached(client, auth_headers, session_queries):
+    for _ in range(5):
+        assert client.get("/user", headers=auth_headers).status_code == 200
+
+    assert len(session_queries) == 1
+    stats = client.get("/metrics").json()["session_token_cache"]
+    assert stats["hits"] == 4
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == pytest.approx(0.8)
+
+
+def test_logout_invalidates_cached_session(client, auth_headers):
+    assert client.get("/user", headers=auth_headers).status_code == 200
+
+    assert client.delete("/logout", headers=auth_headers).status_code == 200
+
+    assert client.get("/user", headers=auth_headers).status_code == 401
+
+
+def test_session_revoked_by_another_worker_is_dropped_after_generation_check(
+    client, auth_headers, monkeypatch
+):
+    import session_logic
+    from session_logic import SessionGeneration
+
+    monkeypatch.setattr(session_logic, "SESSION_GENERATION_CHECK_SECONDS", 0.0)
+    assert client.get("/user", headers=auth_headers).status_code == 200
+
+    # Simulate a logout handled by a different worker process.
+    with TestingSessionLocal() as db:
+        db.query(UserSession).filter_by(session_token="valid-token").delete()
+        db.add(SessionGeneration(id=1, generation=1))
+        db.commit()
+
+    assert client.get("/user", headers=auth_headers).status_code == 401
+
+
+def test_relogin_within_ttl_skips_openai_key_validation(client, monkeypatch):
+    validation_requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        validation_requests.append(request)
+        return httpx.Response(200, json={"data": []})
+
+    install_openai_transport(monkeypatch, handler)
+    payload = {"email": "alice@example.com", "openai_key": "sk-test-alice"}
+
+    first = client.post("/sessions", json=payload)
+    second = client.post("/sessions", json=payload)
+
+    assert first.status_code == second.status_code == 200
+    assert first.json()["session_token"] != second.json()["session_token"]
+    assert len(validation_requests) == 1
+
+
+def test_rejected_openai_key_is_negatively_cached(client, monkeypatch):
+    validation_requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        validation_requests.append(request)
+        return httpx.Response(401)
+
+    install_openai_transport(monkeypatch, handler)
+    payload = {"email": "alice@example.com", "openai_key": "sk-revoked"}
+
+    responses = [client.post("/sessions", json=payload) for _ in range(3)]
+
+    assert [response.status_code for response in responses] == [401, 401, 401]
+    assert len(validation_requests) == 1
+
+
+
+def test_list_resumes_paginates_by_created_at_and_id(client, auth_headers):
+    from datetime import datetime
+
+    with TestingSessionLocal() as db:
+        for index in range(5):
+            db.add(
+                Resume(
+                    id=f"resume-{index}",
+                    user_email="tester@example.com",
+                    normalized_json=None,
+                    # Two rows share a timestamp so the id tie-breaker matters.
+                    created_at=datetime(2026, 1, 1 + min(index, 3)),
+                )
+            )
+        db.commit()
+
+    seen: list[str] = []
+    cursor = None
+    for _ in range(3):
+        params = {"limit": 2} | ({"cursor": cursor} if cursor else {})
+        body = client.get("/resumes", headers=auth_headers, params=params).json()
+        seen.extend(item["resume_id"] for item in body["resumes"])
+        cursor = body["next_cursor"]
+
+    assert seen == ["resume-4", "resume-3", "resume-2", "resume-1", "resume-0"]
+    assert cursor is None
+    bad = client.get("/resumes", headers=auth_headers, params={"cursor": "not-a-cursor"})
+    assert bad.status_code == 400
+
+
+def test_keyset_pages_advance_over_server_default_timestamps(client, auth_headers):
+    with TestingSessionLocal() as db:
+        db.add(Resume(id="resume-1", user_email="tester@example.com", normalized_json=None))
+        db.flush()
+        for index in range(5):
+            # No created_at: rows get the server default, mostly within one second.
+            db.add(Resume(id=f"r{index}", user_email="tester@example.com", normalized_json=None))
+            db.add(
+                ResumeAnalysis(
+                    id=f"a{index}",
+                    resume_id="resume-1",
+                    user_email="tester@example.com",
+                    analysis_json={},
+                    info_count=0,
+                    warning_count=0,
+                    error_count=0,
+                )
+            )
+        db.commit()
+
+    def page_through(path: str, key: str, field: str) -> list[str]:
+        seen: list[str] = []
+        cursor = None
+        for _ in range(5):
+            params = {"limit": 2} | ({"cursor": cursor} if cursor else {})
+            body = client.get(path, headers=auth_headers, params=params).json()
+            seen.extend(item[field] for item in body[key])
+            cursor = body["next_cursor"]
+            if cursor is None:
+                break
+        return seen
+
+    resumes = page_through("/resumes", "resumes", "resume_id")
+    analyses = page_through("/resumes/resume-1/analyses", "analyses", "analysis_id")
+
+    assert sorted(resumes) == ["r0", "r1", "r2", "r3", "r4", "resume-1"]
+    assert len(resumes) == 6
+    assert sorted(analyses) == ["a0", "a1", "a2", "a3", "a4"]
+    assert len(analyses) == 5
+
+
+def test_list_resume_analyses_returns_issue_counts_without_loading_json(client, auth_headers):
+    from datetime import datetime
+
+    def issue(severity: str) -> dict:
+        return {"severity": severity, "category": "typo", "message": "m", "suggestion": "s", "sectionKey": "skills"}
+
+    with TestingSessionLocal() as db:
+        db.add(Resume(id="resume-1", user_email="tester@example.com", normalized_json=None))
+        for index, issues in enumerate([[issue("error"), issue("info")], [issue("warning")]]):
+            db.add(
+                ResumeAnalysis(
+                    id=f"analysis-{index}",
+                    resume_id="resume-1",
+                    user_email="tester@example.com",
+                    analysis_json={"sections": [{"sectionKey": "skills", "summary": "", "issues": issues}]},
+                    model="gpt-test",
+                    created_at=datetime(2026, 1, 1 + index),
+                )
+            )
+        db.add(
+            ResumeAnalysis(
+                id="analysis-pending",
+                resume_id="resume-1",
+                user_email="tester@example.com",
+                analysis_json=None,
+                model="gpt-test",
+            )
+        )
+        db.commit()
+
+    with recorded_statements("resume_analyses") as statements:
+        first = client.get("/resumes/resume-1/analyses", headers=auth_headers, params={"limit": 1}).json()
+        second = client.get(
+            "/resumes/resume-1/analyses",
+            headers=auth_headers,
+            params={"limit": 1, "cursor": first["next_cursor"]},
+        ).json()
+
+    assert [a["analysis_id"] for a in first["analyses"] + second["analyses"]] == ["analysis-1", "analysis-0"]
+    assert first["analyses"][0]["issue_counts"] == {"info": 0, "warning": 1, "error": 0}
+    assert second["analyses"][0]["issue_counts"] == {"info": 1, "warning": 0, "error": 1}
+    assert second["next_cursor"] is None
+    assert statements and all(
+        "analysis_json" not in statement and "resume_snapshots" not in statement for statement in statements
+    )
+    assert client.get("/resumes/missing/analyses", headers=auth_headers).status_code == 404
+
+
+LATEST_CURSOR = encode_cursor(datetime(2100, 1, 1), "~")
+
+
+@contextmanager
+def recorded_query_plans():
+    """Capture every SELECT the app issues, then yield their EXPLAIN QUERY PLAN details."""
+    from sqlalchemy import event
+
+    queries: list[tuple[str, object]] = []
+    plans: dict[str, list[str]] = {}
+
+    def record(_conn, _cursor, statement, parameters, _context, _executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            queries.append((statement, parameters))
+
+    event.listen(async_test_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield plans
+    finally:
+        event.remove(async_test_engine.sync_engine, "before_cursor_execute", record)
+    with test_engine.connect() as conn:
+        for statement, parameters in queries:
+            rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+            plans[statement] = [row[-1] for row in rows]
+
+
+def assert_plans_use_indexes(plans: dict[str, list[str]]) -> None:
+    assert plans
+    for statement, details in plans.items():
+        for detail in details:
+            assert not detail.startswith("SCAN"), f"table scan in {statement!r}: {details}"
+            assert "TEMP B-TREE" not in detail, f"temp sort in {statement!r}: {details}"
+
+
+def test_resume_endpoint_queries_use_indexes(client, auth_headers):
+    from resume_schema import build_empty_resume_form_values
+
+    with TestingSessionLocal() as db:
+        db.add(Resume(id="resume-1", user_email="tester@example.com", normalized_json=build_empty_resume_form_values()))
+        db.commit()
+
+    with recorded_query_plans() as plans:
+        client.get("/resumes", headers=auth_headers)
+        client.get("/resumes", headers=auth_headers, params={"cursor": LATEST_CURSOR})
+        client.get("/resumes/resume-1", headers=auth_headers)
+        client.get("/resumes/resume-1", headers={**auth_headers, "If-None-Match": '"stale"'})
+        client.put("/resumes/resume-1", headers=auth_headers, json=build_empty_resume_form_values())
+        client.get("/resumes/resume-1/analyses", headers=auth_headers)
+        client.get("/resumes/resume-1/analysis/latest", headers=auth_headers)
+        client.delete("/resumes/resume-1", headers=auth_headers)
+
+    assert_plans_use_indexes(plans)
+
+
+def test_analysis_endpoint_queries_use_indexes(client, auth_headers, monkeypatch):
+    import main
+    from resume_schema import build_empty_resume_form_values
+
+    async def fake_analysis(_key, _snapshot):
+        from resume_analysis import ResumeAnalysisResult
+
+        return ResumeAnalysisResult(
+            designation="", overall_summary="", recruiter_feedback="", strengths=[], risks=[], sections=[]
+        )
+
+    monkeypatch.setattr(main, "analyze_resume_snapshot", fake_analysis)
+    with TestingSessionLocal() as db:
+        db.add(Resume(id="resume-1", user_email="tester@example.com", normalized_json=build_empty_resume_form_values()))
+        db.commit()
+
+    with recorded_query_plans() as plans:
+        assert client.post("/resumes/resume-1/analysis", headers=auth_headers).status_code == 200
+        assert client.post("/resumes/resume-1/analysis", headers=auth_headers).status_code == 200
+        client.get("/resumes/resume-1/analyses", headers=auth_headers, params={"cursor": LATEST_CURSOR})
+        client.get("/resumes/resume-1/analysis/latest", headers=auth_headers)
+
+    assert_plans_use_indexes(plans)
+
+
+def test_sqlite_engine_applies_connection_pragmas(tmp_path):
+    import asyncio
+    from sqlalchemy import text
+    from database import SqliteSettings, create_database_engine
+
+    engine = create_database_engine(
+        f"sqlite:///{tmp_path / 'pragmas.db'}",
+        sqlite_settings=SqliteSettings(busy_timeout_ms=1234, cache_size=-2048),
+    )
+
+    async def read_pragmas() -> list:
+        async with engine.connect() as conn:
+            values = [
+                (await conn.execute(text(f"PRAGMA {name}"))).scalar()
+                for name in ("journal_mode", "synchronous", "busy_timeout", "cache_size")
+            ]
+        await engine.dispose()
+        return values
+
+    # synchronous=NORMAL reads back as 1.
+    assert asyncio.run(read_pragmas()) == ["wal", 1, 1234, -2048]
+
+
+def test_json_documents_are_jsonb_on_postgres():
+    from sqlalchemy.dialects import postgresql
+    from sqlalchemy.schema import CreateTable
+
+    resumes_ddl = str(CreateTable(Resume.__table__).compile(dialect=postgresql.dialect()))
+    analyses_ddl = str(CreateTable(ResumeAnalysis.__table__).compile(dialect=postgresql.dialect()))
+    snapshots_ddl = str(CreateTable(ResumeSnapshot.__table__).compile(dialect=postgresql.dialect()))
+
+    assert "normalized_json JSONB" in resumes_ddl
+    assert "analysis_json JSONB" in analyses_ddl
+    assert "document JSONB" in snapshots_ddl
+
+
+def test_get_resume_at_current_schema_version_skips_upgrade(client, auth_headers, monkeypatch):
+    import main
+    from resume_schema import RESUME_SCHEMA_VERSION, build_empty_resume_form_values
+
+    with TestingSessionLocal() as db:
+        db.add(
+            Resume(
+                id="resume-1",
+                user_email="tester@example.com",
+                normalized_json=build_empty_resume_form_values(),
+                schema_version=RESUME_SCHEMA_VERSION,
+            )
+        )
+        db.commit()
+
+    def fail_upgrade(_data):
+        raise AssertionError("current documents must not be upgraded")
+
+    monkeypatch.setattr(main, "upgrade_resume_form_values", fail_upgrade)
+    response = client.get("/resumes/resume-1", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json()["resume_id"] == "resume-1"
+
+
+def test_get_resume_stamps_schema_version_after_upgrading(client, auth_headers):
+    from resume_schema import RESUME_SCHEMA_VERSION
+
+    with TestingSessionLocal() as db:
+        db.add(Resume(id="resume-1", user_email="tester@example.com", normalized_json={"sections": []}))
+        db.commit()
+
+    assert client.get("/resumes/resume-1", headers=auth_headers).status_code == 200
+
+    with TestingSessionLocal() as db:
+        stored = db.query(Resume).filter_by(id="resume-1").one()
+        assert stored.schema_version == RESUME_SCHEMA_VERSION
+        assert len(stored.normalized_json["sections"]) > 1
+
+
+def test_upgrade_stale_resumes_rewrites_rows_in_batches(tmp_path):
+    import asyncio
+    from sqlalchemy import insert, select
+    from database import create_database_engine
+    from maintenance import upgrade_stale_resumes
+    from resume_models import canonical_json_hash
+    from resume_schema import RESUME_SCHEMA_VERSION, build_empty_resume_form_values
+
+    engine = create_database_engine(f"sqlite:///{tmp_path / 'upgrade.db'}")
+    personal = {"first-name": "Alice", "last-name": "Smith"}
+
+    async def run() -> tuple[int, list]:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(
+                insert(Resume),
+                [
+                    {
+                        "id": f"stale-{index}",
+                        "user_email": "tester@example.com",
+                        "normalized_json": {"sections": [{"sectionKey": "personal-information", "items": [{"values": personal}]}]},
+                    }
+                    for index in range(5)
+                ],
+            )
+            await conn.execute(
+                insert(Resume).values(
+                    id="current",
+                    user_email="tester@example.com",
+                    normalized_json=build_empty_resume_form_values(),
+                    schema_version=RESUME_SCHEMA_VERSION,
+                    content_hash=canonical_json_hash(build_empty_resume_form_values()),
+                )
+            )
+        count = await upgrade_stale_resumes(engine, batch_size=2)
+        async with engine.connect() as conn:
+            rows = (
+                await conn.execute(select(Resume.id, Resume.schema_version, Resume.label, Resume.normalized_json))
+            ).all()
+        await engine.dispose()
+        return count, rows
+
+    count, rows = asyncio.run(run())
+
+    assert count == 5
+    assert {row.schema_version for row in rows} == {RESUME_SCHEMA_VERSION}
+    stale = [row for row in rows if row.id.startswith("stale-")]
+    assert {row.label for row in stale} == {"Alice Smith"}
+    assert all(row.normalized_json["sections"][0]["items"][0]["id"] for row in stale)
+
+
+def test_upgrade_stale_resumes_leaves_rows_saved_meanwhile(tmp_path, monkeypatch):
+    import asyncio
+    from sqlalchemy import create_engine, insert, select
+    from sqlalchemy.orm import Session
+    from database import create_database_engine
+    import maintenance
+
+    url = f"sqlite:///{tmp_path / 'upgrade.db'}"
+    engine = create_database_engine(url)
+    saved = _patchable_resume()
+    upgrade = maintenance.upgrade_resume_form_values
+
+    def save_during_upgrade(document, *, resume_id):
+        if resume_id == "stale-0":
+            # Saved without store_resume_document, so the row is still stale
+            # and only the updated_at it was read with protects the save.
+            with Session(create_engine(url)) as db:
+                db.get(Resume, "stale-0").normalized_json = saved
+                db.commit()
+        return upgrade(document, resume_id=resume_id)
+
+    async def run() -> tuple[int, dict]:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(
+                insert(Resume),
+                [
+                    {"id": f"stale-{index}", "user_email": "tester@example.com", "normalized_json": {"sections": []}}
+                    for index in range(2)
+                ],
+            )
+        monkeypatch.setattr(maintenance, "upgrade_resume_form_values", save_during_upgrade)
+        count = await maintenance.upgrade_stale_resumes(engine, batch_size=10)
+        async with engine.connect() as conn:
+            rows = {row.id: row.normalized_json for row in await conn.execute(select(Resume.id, Resume.normalized_json))}
+        await engine.dispose()
+        return count, rows
+
+    count, rows = asyncio.run(run())
+
+    assert count == 1
+    assert rows["stale-0"] == saved
+    assert len(rows["stale-1"]["sections"]) > 1
+
+
+def test_repeated_gets_of_legacy_resume_converge_without_writes(client, auth_headers):
+    from resume_models import upgrade_resume_form_values
+
+    legacy = {
+        "sections": [
+            {
+                "sectionKey": "work-experience",
+                "items": [{"values": {"company": "Acme"}}, {"id": "dup", "values": {}}, {"id": "dup", "values": {}}],
+            }
+        ]
+    }
+    with TestingSessionLocal() as db:
+        db.add(Resume(id="resume-1", user_email="tester@example.com", normalized_json=legacy))
+        db.commit()
+
+    # Two readers upgrading the same stored document independently agree on ids.
+    assert upgrade_resume_form_values(legacy, resume_id="resume-1") == upgrade_resume_form_values(
+        legacy, resume_id="resume-1"
+    )
+
+    with recorded_statements("UPDATE resumes") as first_writes:
+        first = client.get("/resumes/resume-1", headers=auth_headers).json()
+    with recorded_statements("UPDATE resumes") as repeat_writes:
+        repeats = [client.get("/resumes/resume-1", headers=auth_headers).json() for _ in range(3)]
+
+    assert len(first_writes) == 1
+    assert repeat_writes == []
+    assert all(repeat == first for repeat in repeats)
+    assert first == {"resume_id": "resume-1", **upgrade_resume_form_values(legacy, resume_id="resume-1")}
+
+
+def test_saves_of_current_resume_keep_its_schema_version(client, auth_headers):
+    from resume_schema import RESUME_SCHEMA_VERSION
+
+    document = _patchable_resume()
+    with TestingSessionLocal() as db:
+        db.add(Resume(id="resume-1", user_email="tester@example.com", normalized_json=document))
+        db.commit()
+    assert client.put("/resumes/resume-1", headers=auth_headers, json=document).status_code == 200
+
+    def assert_current_and_revalidates() -> None:
+        with TestingSessionLocal() as db:
+            assert db.get(Resume, "resume-1").schema_version == RESUME_SCHEMA_VERSION
+        etag = client.get("/resumes/resume-1", headers=auth_headers).headers["etag"]
+        with recorded_statements("UPDATE resumes") as updates:
+            revalidated = client.get("/resumes/resume-1", headers={**auth_headers, "If-None-Match": etag})
+        assert revalidated.status_code == 304
+        assert updates == []
+
+    # Changed content on a row already at the current version, via PUT then PATCH.
+    document["sections"][0]["items"][0]["values"]["first-name"] = "Bob"
+    assert client.put("/resumes/resume-1", headers=auth_headers, json=document).status_code == 200
+    assert_current_and_revalidates()
+    patched = client.patch(
+        "/resumes/resume-1",
+        headers=auth_headers,
+        json={"operations": [{"op": "delete", "sectionKey": "work-experience", "itemId": "job-0"}]},
+    )
+    assert patched.status_code == 200
+    assert_current_and_revalidates()
+
+
+def test_json_documents_are_stored_compressed_and_legacy_text_still_reads(client, auth_headers):
+    import json
+    from sqlalchemy import text
+    from database import COMPRESSED_JSON_MARKER
+    from resume_schema import build_empty_resume_form_values
+
+    # Pre-compression row: plain JSON text, missing every section.
+    legacy = {"sections": []}
+    with test_engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO resumes (id, user_email, normalized_json, created_at, label, has_content, content_size) "
+                "VALUES ('legacy', 'tester@example.com', :doc, CURRENT_TIMESTAMP, '', 1, 0)"
+            ),
+            {"doc": json.dumps(legacy)},
+        )
+
+    response = client.get("/resumes/legacy", headers=auth_headers)
+
+    assert response.status_code == 200
+    expected = build_empty_resume_form_values()
+    assert [s["sectionKey"] for s in response.json()["sections"]] == [s["sectionKey"] for s in expected["sections"]]
+    with test_engine.connect() as conn:
+        stored = conn.execute(text("SELECT normalized_json FROM resumes WHERE id = 'legacy'")).scalar()
+    # The read-path upgrade rewrote the row in the compressed format.
+    assert isinstance(stored, bytes) and stored.startswith(COMPRESSED_JSON_MARKER)
+    assert len(stored) < len(json.dumps(expected))
+
+
+def test_identical_snapshots_are_stored_once_and_collected_when_unreferenced(
+    client, auth_headers, monkeypatch
+):
+    import asyncio
+    import resume_analysis
+    from maintenance import collect_unreferenced_snapshots
+    from resume_schema import build_empty_resume_form_values
+
+    async def fake_call_openai(_key, _resume_values):
+        return {
+            "designation": "",
+            "overall_summary": "",
+            "recruiter_feedback": "",
+            "strengths": [],
+            "risks": [],
+            "sections": [],
+        }
+
+    monkeypatch.setattr(resume_analysis, "call_openai_for_resume_analysis", fake_call_openai)
+    with TestingSessionLocal() as db:
+        db.add(Resume(id="resume-1", user_email="tester@example.com", normalized_json=build_empty_resume_form_values()))
+        db.add(ResumeSnapshot(hash="orphan", document={"sections": []}))
+        db.commit()
+
+    for _ in range(3):
+        assert client.post("/resumes/resume-1/analysis?force=true", headers=auth_headers).status_code == 200
+
+    with TestingSessionLocal() as db:
+        hashes = {row.snapshot_hash for row in db.query(ResumeAnalysis).all()}
+        assert len(hashes) == 1
+        (snapshot_hash,) = hashes
+        assert db.query(ResumeSnapshot).count() == 2
+        # Drop two of the three analyses behind the app's back.
+        (kept_id,) = db.query(ResumeAnalysis.id).first()
+        db.query(ResumeAnalysis).filter(ResumeAnalysis.id != kept_id).delete()
+        db.commit()
+
+    assert asyncio.run(collect_unreferenced_snapshots(async_test_engine, batch_size=1)) == 1
+
+    with TestingSessionLocal() as db:
+        assert db.get(ResumeSnapshot, "orphan") is None
+        assert db.get(ResumeSnapshot, snapshot_hash) is not None
+
+
+def test_delete_resume_cascades_to_analyses_and_detaches_import_jobs(client, auth_headers):
+    from session_logic import ImportJob
+
+    with TestingSessionLocal() as db:
+        db.add(Resume(id="resume-1", user_email="tester@example.com", normalized_json={"sections": []}))
+        db.add(Resume(id="resume-2", user_email="tester@example.com", normalized_json={"sections": []}))
+        db.commit()
+        db.add_all(
+            [
+                ResumeAnalysis(id="analysis-1", resume_id="resume-1", user_email="tester@example.com"),
+                ResumeAnalysis(id="analysis-2", resume_id="resume-2", user_email="tester@example.com"),
+                ImportJob(id="job-1", user_email="tester@example.com", status="done", resume_id="resume-1"),
+            ]
+        )
+        db.commit()
+
+    assert client.delete("/resumes/resume-1", headers=auth_headers).status_code == 200
+    assert client.delete("/resumes/resume-1", headers=auth_headers).status_code == 404
+
+    with TestingSessionLocal() as db:
+        assert [row.id for row in db.query(ResumeAnalysis).all()] == ["analysis-2"]
+        assert db.get(ImportJob, "job-1").resume_id is None
+
+
+def test_purge_orphans_and_compaction_reclaim_space(tmp_path):
+    import asyncio
+    import os
+    from sqlalchemy import func, insert, select, text
+    from database import SqliteSettings
+    from maintenance import compact_database, purge_orphans
+    from session_logic import ImportJob
+
+    # Orphans predate the foreign keys, so seed them without enforcement.
+    engine = create_database_engine(
+        f"sqlite:///{tmp_path / 'maintenance.db'}", sqlite_settings=SqliteSettings(foreign_keys=False)
+    )
+    old = datetime(2020, 1, 1)
+    # Incompressible, so the deleted analyses leave real free pages behind.
+    filler = {"sections": [{"sectionKey": "summary", "items": [{"values": {"text": os.urandom(4000).hex()}}]}]}
+
+    async def run() -> tuple[dict, int, int, int]:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(
+                insert(Resume),
+                [
+                    {"id": "shell", "user_email": "a@example.com", "normalized_json": None, "has_content": False},
+                    {"id": "fresh-shell", "user_email": "a@example.com", "normalized_json": None, "has_content": False},
+                    {"id": "kept", "user_email": "a@example.com", "normalized_json": filler, "has_content": True},
+                ],
+            )
+            await conn.execute(
+                Resume.__table__.update().where(Resume.id.in_(["shell", "kept"])).values(created_at=old)
+            )
+            await conn.execute(
+                insert(ResumeAnalysis),
+                [
+                    {"id": f"orphan-{index}", "resume_id": "gone", "user_email": "a@example.com", "analysis_json": filler}
+                    for index in range(50)
+                ],
+            )
+            await conn.execute(
+                insert(ResumeAnalysis).values(id="live", resume_id="kept", user_email="a@example.com")
+            )
+            await conn.execute(
+                insert(ResumeAnalysis).values(
+                    id="failed", resume_id="kept", user_email="a@example.com", created_at=old
+                )
+            )
+            await conn.execute(
+                insert(ResumeAnalysis).values(
+                    id="completed", resume_id="kept", user_email="a@example.com", created_at=old, error_count=0
+                )
+            )
+            await conn.execute(
+                insert(ImportJob),
+                [
+                    {"id": "old-done", "user_email": "a@example.com", "status": "done", "updated_at": old},
+                    {"id": "old-llm", "user_email": "a@example.com", "status": "llm", "updated_at": old},
+                    {"id": "new-queued", "user_email": "a@example.com", "status": "queued", "updated_at": datetime.utcnow()},
+                    {"id": "new-done", "user_email": "a@example.com", "status": "done", "updated_at": datetime.utcnow()},
+                ],
+            )
+        purged = await purge_orphans(engine, batch_size=7)
+        reclaimed = await compact_database(engine)
+        async with engine.connect() as conn:
+            analyses = (await conn.execute(select(func.count()).select_from(ResumeAnalysis))).scalar_one()
+            auto_vacuum = (await conn.execute(text("PRAGMA auto_vacuum"))).scalar_one()
+            jobs = dict((await conn.execute(select(ImportJob.id, ImportJob.status))).all())
+        await engine.dispose()
+        return purged, reclaimed, analyses, auto_vacuum, jobs
+
+    purged, reclaimed, analyses, auto_vacuum, jobs = asyncio.run(run())
+
+    assert purged == {
+        "orphan_analyses": 50,
+        "failed_import_shells": 1,
+        "failed_analyses": 1,
+        "stalled_import_jobs": 1,
+        "finished_import_jobs": 1,
+        "unreferenced_snapshots": 0,
+        "expired_sessions": 0,
+        "expired_idempotency_keys": 0,
+    }
+    assert analyses == 2
+    # A job stranded by a restart fails, and is kept for its retention period.
+    assert jobs == {"old-llm": "failed", "new-queued": "queued", "new-done": "done"}
+    assert reclaimed > 0
+    # 2 = INCREMENTAL, so later runs can release pages without a full VACUUM.
+    assert auto_vacuum == 2
+
+
+def test_maintenance_window_handles_midnight_wrap():
+    from maintenance import in_maintenance_window
+
+    assert in_maintenance_window(datetime(2026, 1, 1, 3, 0), "02:00-05:00")
+    assert not in_maintenance_window(datetime(2026, 1, 1, 5, 0), "02:00-05:00")
+    assert in_maintenance_window(datetime(2026, 1, 1, 23, 30), "23:00-01:00")
+    assert in_maintenance_window(datetime(2026, 1, 1, 0, 30), "23:00-01:00")
+    assert not in_maintenance_window(datetime(2026, 1, 1, 12, 0), "23:00-01:00")
+
+
+def test_last_seen_at_is_written_at_most_once_per_touch_interval(client, auth_headers):
+    from datetime import timedelta
+
+    stale = datetime.utcnow() - timedelta(minutes=10)
+    with TestingSessionLocal() as db:
+        db.query(UserSession).filter_by(session_token="valid-token").update({"last_seen_at": stale})
+        db.commit()
+
+    with recorded_statements("UPDATE sessions") as updates:
+        for _ in range(5):
+            assert client.get("/resumes", headers=auth_headers).status_code == 200
+
+    assert len(updates) == 1
+    with TestingSessionLocal() as db:
+        assert db.query(UserSession).filter_by(session_token="valid-token").one().last_seen_at > stale
+
+
+def test_expired_sessions_are_rejected_and_purged_in_batches(client, auth_headers):
+    import asyncio
+    from datetime import timedelta
+    from maintenance import purge_expired_sessions
+
+    long_ago = datetime.utcnow() - timedelta(days=365)
+    for index in range(5):
+        insert_session(email=f"idle-{index}@example.com", token=f"idle-token-{index}")
+    with TestingSessionLocal() as db:
+        db.query(UserSession).filter(UserSession.session_token.like("idle-token-%")).update(
+            {"created_at": long_ago, "last_seen_at": long_ago}, synchronize_session=False
+        )
+        db.commit()
+
+    response = client.get("/resumes", headers={"X-Session-Token": "idle-token-0"})
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Session expired"
+
+    assert asyncio.run(purge_expired_sessions(async_test_engine, batch_size=2)) == 5
+    with TestingSessionLocal() as db:
+        assert [row.session_token for row in db.query(UserSession).all()] == ["valid-token"]
+    assert client.get("/resumes", headers=auth_headers).status_code == 200
+
+
+def test_import_retry_with_idempotency_key_replays_first_response(client, auth_headers, monkeypatch):
+    import pdf_import
+    from resume_schema import build_empty_resume_form_values
+
+    monkeypatch.setattr(
+        pdf_import,
+        "extract_text_from_pdf",
+        extracted_text(lambda _bytes: "Alice Smith\nalice@example.com\nExperience: Example Corp - Engineer\n"),
+    )
+
+    async def fake_call_openai(_key, _text):
+        return build_empty_resume_form_values()
+
+    monkeypatch.setattr(pdf_import, "call_openai_for_resume_json", fake_call_openai)
+    headers = {**auth_headers, "Idempotency-Key": "import-1"}
+    upload = {"file": ("resume.pdf", b"%PDF-1.4 idempotent", "application/pdf")}
+
+    first = client.post("/resume/import/pdf", headers=headers, files=upload)
+    retry = client.post("/resume/import/pdf", headers=headers, files=upload)
+    other = client.post(
+        "/resume/import/pdf",
+        headers=headers,
+        files={"file": ("resume.pdf", b"%PDF-1.4 different", "application/pdf")},
+    )
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert other.status_code == 422
+    with TestingSessionLocal() as db:
+        assert db.query(Resume).count() == 1
+
+
+def test_idempotency_key_is_released_after_a_nondeterministic_error(client, auth_headers, monkeypatch):
+    import main
+    from resume_analysis import ResumeAnalysisResult
+    from resume_schema import build_empty_resume_form_values
+
+    outcomes = [ValueError("LLM output did not match analysis schema"), None]
+
+    async def flaky_analysis(_key, _snapshot):
+        outcome = outcomes.pop(0)
+        if outcome is not None:
+            raise outcome
+        return ResumeAnalysisResult(
+            designation="", overall_summary="", recruiter_feedback="", strengths=[], risks=[], sections=[]
+        )
+
+    monkeypatch.setattr(main, "analyze_resume_snapshot", flaky_analysis)
+    headers = {**auth_headers, "Idempotency-Key": "analysis-1"}
+    missing = client.post("/resumes/resume-1/analysis", headers=headers)
+    with TestingSessionLocal() as db:
+        db.add(Resume(id="resume-1", user_email="tester@example.com", normalized_json=build_empty_resume_form_values()))
+        db.commit()
+
+    failed = client.post("/resumes/resume-1/analysis", headers=headers)
+    retried = client.post("/resumes/resume-1/analysis", headers=headers)
+
+    assert missing.status_code == 404
+    assert failed.status_code == 422
+    assert "Idempotent-Replayed" not in failed.headers
+    assert retried.status_code == 200
+    assert "Idempotent-Replayed" not in retried.headers
+    assert client.post("/resumes/resume-1/analysis", headers=headers).headers["Idempotent-Replayed"] == "true"
+
+
+def test_concurrent_analysis_retries_share_one_llm_call(client, auth_headers, monkeypatch):
+    import asyncio
+    import main
+    from resume_analysis import ResumeAnalysisResult
+    from resume_schema import build_empty_resume_form_values
+
+    calls = 0
+
+    async def slow_analysis(_key, _snapshot):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.2)
+        return ResumeAnalysisResult(
+            designation="", overall_summary="", recruiter_feedback="", strengths=[], risks=[], sections=[]
+        )
+
+    monkeypatch.setattr(main, "analyze_resume_snapshot", slow_analysis)
+    with TestingSessionLocal() as db:
+        db.add(Resume(id="resume-1", user_email="tester@example.com", normalized_json=build_empty_resume_form_values()))
+        db.commit()
+
+    async def send_retries() -> list[httpx.Response]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+            return await asyncio.gather(
+                *(
+                    async_client.post(
+                        "/resumes/resume-1/analysis?force=true",
+                        headers={**auth_headers, "Idempotency-Key": "analysis-1"},
+                    )
+                    for _ in range(3)
+                )
+            )
+
+    responses = asyncio.run(send_retries())
+
+    assert calls == 1
+    assert [response.status_code for response in responses] == [200, 200, 200]
+    assert len({response.json()["analysis_id"] for response in responses}) == 1
+    assert sum(response.headers.get("Idempotent-Replayed") == "true" for response in responses) == 2
+    with TestingSessionLocal() as db:
+        assert db.query(ResumeAnalysis).count() == 1
+
+
+def _patchable_resume() -> dict:
+    from resume_schema import build_empty_resume_form_values, build_empty_values_for_section
+
+    document = build_empty_resume_form_values()
+    personal = build_empty_values_for_section("personal-information")
+    personal.update({"first-name": "Alice", "last-name": "Smith"})
+    document["sections"][0]["items"] = [{"id": "personal-1", "values": personal}]
+    document["sections"][2]["items"] = [
+        {"id": f"job-{index}", "values": {**build_empty_values_for_section("work-experience"), "company": f"Co {index}"}}
+        for index in range(3)
+    ]
+    return document
+
+
+def test_patch_resume_applies_item_operations_and_returns_touched_sections(
+    client, auth_headers, monkeypatch
+):
+    import resume_models
+    from resume_schema import RESUME_SCHEMA_VERSION
+
+    with TestingSessionLocal() as db:
+        db.add(Resume(id="resume-1", user_email="tester@example.com", normalized_json=_patchable_resume()))
+        db.commit()
+
+    def full_validation(*_args, **_kwargs):
+        raise AssertionError("PATCH must not validate the whole document")
+
+    monkeypatch.setattr(resume_models.ResumeFormValues, "model_validate", full_validation)
+    response = client.patch(
+        "/resumes/resume-1",
+        headers=auth_headers,
+        json={
+            "operations": [
+                {"op": "replace", "sectionKey": "personal-information", "itemId": "personal-1", "values": {"github": "alice"}},
+                {"op": "delete", "sectionKey": "work-experience", "itemId": "job-0"},
+                {"op": "move", "sectionKey": "work-experience", "itemId": "job-2", "index": 0},
+                {"op": "insert", "sectionKey": "work-experience", "item": {"id": "job-new", "values": {"company": "New Co"}}},
+            ]
+        },
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [section["sectionKey"] for section in body["sections"]] == ["personal-information", "work-experience"]
+    personal, experience = body["sections"]
+    assert personal["items"][0]["values"]["github"] == "https://github.com/alice"
+    assert personal["items"][0]["values"]["first-name"] == "Alice"
+    assert [item["id"] for item in experience["items"]] == ["job-2", "job-1", "job-new"]
+    assert experience["items"][2]["values"] == {
+        "company": "New Co", "position": "", "start-date": "", "end-date": "", "description": ""
+    }
+
+    with TestingSessionLocal() as db:
+        stored = db.get(Resume, "resume-1")
+        assert stored.schema_version == RESUME_SCHEMA_VERSION
+        assert stored.normalized_json["sections"][2] == experience
+        assert stored.normalized_json["sections"][1] == _patchable_resume()["sections"][1]
+
+
+def test_patch_resume_rejects_invalid_operations_without_storing_anything(client, auth_headers):
+    with TestingSessionLocal() as db:
+        db.add(Resume(id="resume-1", user_email="tester@example.com", normalized_json=_patchable_resume()))
+        db.commit()
+
+    cases = [
+        {"op": "delete", "sectionKey": "work-experience", "itemId": "missing"},
+        {"op": "insert", "sectionKey": "personal-information", "item": {"values": {}}},
+        {"op": "insert", "sectionKey": "education", "item": {"id": "job-2", "values": {}}},
+        {"op": "move", "sectionKey": "work-experience", "itemId": "job-0", "index": 3},
+        {"op": "replace", "sectionKey": "hobbies", "itemId": "x", "values": {}},
+        # Nested values and unknown field keys are rejected, not 500s or silently dropped.
+        {"op": "replace", "sectionKey": "personal-information", "itemId": "personal-1", "values": {"first-name": {"a": 1}}},
+        {"op": "replace", "sectionKey": "personal-information", "itemId": "personal-1", "values": {"nickname": "Al"}},
+        {"op": "insert", "sectionKey": "work-experience", "item": {"values": {"company": ["Co"]}}},
+        {"op": "insert", "sectionKey": "work-experience", "item": {"values": {"salary": "1"}}},
+    ]
+    for operation in cases:
+        response = client.patch(
+            "/resumes/resume-1",
+            headers=auth_headers,
+            json={"operations": [{"op": "delete", "sectionKey": "work-experience", "itemId": "job-1"}, operation]},
+        )
+        assert response.status_code == 422, operation
+
+    with TestingSessionLocal() as db:
+        assert db.get(Resume, "resume-1").normalized_json == _patchable_resume()
+
+
+def test_single_pass_validation_matches_upgrade_then_validate():
+    from resume_models import ResumeFormValues, upgrade_resume_form_values, validate_resume_form_values
+
+    document = {
+        "sections": [
+            {"sectionKey": "languages", "items": [{"id": "lang", "values": {"language": "French", "extra": "x"}}]},
+            {
+                "sectionKey": "personal-information",
+                "items": [
+                    {"id": "", "values": {"first-name": "Alice", "github": "@alice", "linkedin": "not a url", "zip-code": 12345}},
+                    {"id": "second", "values": {"first-name": "Dropped"}},
+                ],
+            },
+            {"sectionKey": "portfolio", "items": [{"id": "lang", "values": {"url": "(example.com/work)", "title": True}}]},
+            {"sectionKey": "unknown", "items": []},
+        ]
+    }
+
+    single = validate_resume_form_values(document).model_dump()
+    two_pass = ResumeFormValues.model_validate(upgrade_resume_form_values(document)).model_dump()
+
+    def values_only(document: dict) -> list:
+        # Ids assigned to the id-less and duplicate items are random.
+        return [(s["sectionKey"], [item["values"] for item in s["items"]]) for s in document["sections"]]
+
+    assert values_only(single) == values_only(two_pass)
+    personal = single["sections"][0]["items"][0]["values"]
+    assert personal["github"] == "https://github.com/alice"
+    assert personal["linkedin"] == ""
+    assert personal["zip-code"] == "12345"
+
+    with pytest.raises(ValueError):
+        validate_resume_form_values(
+            {"sections": [{"sectionKey": "skills", "items": [{"values": {"skill": {"nested": 1}}}]}]}
+        )
+
+
+def test_get_and_save_resume_serialize_stored_json_without_revalidating(client, auth_headers, monkeypatch):
+    import json
+    import resume_models
+    from resume_schema import RESUME_SCHEMA_VERSION
+
+    document = _patchable_resume()
+    document["sections"][0]["items"][0]["values"]["city"] = "Zürich"
+    with TestingSessionLocal() as db:
+        db.add(
+            Resume(
+                id="resume-1",
+                user_email="tester@example.com",
+                normalized_json=document,
+                schema_version=RESUME_SCHEMA_VERSION,
+            )
+        )
+        db.commit()
+
+    def fail_validation(*_args, **_kwargs):
+        raise AssertionError("stored resumes must not be re-validated on read")
+
+    monkeypatch.setattr(resume_models, "_validate_section", fail_validation)
+    response = client.get("/resumes/resume-1", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert json.loads(response.content) == {"resume_id": "resume-1", **document}
+    monkeypatch.undo()
+
+    saved = client.put("/resumes/resume-1", headers=auth_headers, json=document)
+    assert saved.status_code == 200
+    assert saved.json() == {"resume_id": "resume-1", **document}
+
+
+def test_conditional_gets_return_304_without_loading_documents(client, auth_headers, monkeypatch):
+    import main
+    from resume_schema import RESUME_SCHEMA_VERSION
+
+    async def fake_analysis(_key, _snapshot):
+        from resume_analysis import ResumeAnalysisResult
+
+        return ResumeAnalysisResult(
+            designation="", overall_summary="", recruiter_feedback="", strengths=[], risks=[], sections=[]
+        )
+
+    monkeypatch.setattr(main, "analyze_resume_snapshot", fake_analysis)
+    document = _patchable_resume()
+    with TestingSessionLocal() as db:
+        db.add(
+            Resume(
+                id="resume-1",
+                user_email="tester@example.com",
+                normalized_json=document,
+                schema_version=RESUME_SCHEMA_VERSION,
+            )
+        )
+        db.commit()
+    assert client.post("/resumes/resume-1/analysis", headers=auth_headers).status_code == 200
+
+    for path in ["/resume/schema", "/resumes", "/resumes/resume-1", "/resumes/resume-1/analysis/latest"]:
+        first = client.get(path, headers=auth_headers)
+        etag = first.headers["etag"]
+        with recorded_statements("normalized_json") as documents, recorded_statements(
+            "analysis_json"
+        ) as analyses:
+            revalidated = client.get(path, headers={**auth_headers, "If-None-Match": f"W/{etag}"})
+        assert revalidated.status_code == 304, path
+        assert revalidated.headers["etag"] == etag
+        assert revalidated.content == b""
+        assert documents == [] and analyses == []
+
+    resume_etag = client.get("/resumes/resume-1", headers=auth_headers).headers["etag"]
+    list_etag = client.get("/resumes", headers=auth_headers).headers["etag"]
+    document["sections"][0]["items"][0]["values"]["city"] = "Berlin"
+    saved = client.put("/resumes/resume-1", headers=auth_headers, json=document)
+    assert saved.headers["etag"] != resume_etag
+
+    changed = client.get("/resumes/resume-1", headers={**auth_headers, "If-None-Match": resume_etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] == saved.headers["etag"]
+    assert changed.json()["sections"][0]["items"][0]["values"]["city"] == "Berlin"
+    assert client.get("/resumes", headers={**auth_headers, "If-None-Match": list_etag}).status_code == 200
+
+
+def build_multipage_pdf(pages: list[list[str]]) -> bytes:
+    from io import BytesIO
+    from pypdf import PdfReader, PdfWriter
+
+    writer = PdfWriter()
+    for lines in pages:
+        writer.add_page(PdfReader(BytesIO(build_text_pdf(lines))).pages[0])
+    out = BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def test_pdf_extraction_caps_pages_fans_out_ranges_and_stops_at_target(monkeypatch):
+    import asyncio
+
+    import pdf_import
+
+    pdf_bytes = build_multipage_pdf([[f"Page {index} of the resume"] for index in range(7)])
+    ranges = []
+    extract_range = pdf_import.extract_pdf_page_range
+
+    def recording_extract_range(pdf_bytes, start, stop, *args):
+        ranges.append((start, stop))
+        return extract_range(pdf_bytes, start, stop, *args)
+
+    monkeypatch.setattr(pdf_import, "extract_pdf_page_range", recording_extract_range)
+    monkeypatch.setattr(pdf_import, "pdf_extraction_stats", pdf_import.PdfExtractionStats())
+    monkeypatch.setattr(pdf_import, "PDF_PAGES_PER_JOB", 2)
+    monkeypatch.setattr(pdf_import, "PDF_MAX_PAGES", 5)
+
+    text = asyncio.run(pdf_import.extract_text_from_pdf(pdf_bytes))
+
+    assert sorted(ranges) == [(0, 2), (2, 4), (4, 5)]
+    assert text.split("\n\n") == [f"Page {index} of the resume" for index in range(5)]
+    assert pdf_import.pdf_extraction_stats.stats()["pages"] == 5
+
+    ranges.clear()
+    monkeypatch.setattr(pdf_import, "PDF_TARGET_TEXT_CHARS", 10)
+    text = asyncio.run(pdf_import.extract_text_from_pdf(pdf_bytes))
+
+    assert ranges == [(0, 2)]
+    assert text == "Page 0 of the resume"
+
+
+def test_pdf_page_over_time_budget_is_skipped(monkeypatch):
+    import time
+
+    from pypdf import PageObject
+
+    import pdf_import
+
+    pdf_bytes = build_multipage_pdf([["Alice Smith"], ["Pathological page"], ["Example Corp"]])
+    original = PageObject.extract_text
+
+    def slow_on_second_page(self, *args, **kwargs):
+        text = original(self, *args, **kwargs)
+        if "Pathological" in text:
+            time.sleep(5)
+        return text
+
+    monkeypatch.setattr(PageObject, "extract_text", slow_on_second_page)
+    started = time.monotonic()
+    result = pdf_import.extract_pdf_page_range(pdf_bytes, 0, 10, 0.2, 10_000)
+
+    assert time.monotonic() - started < 3
+    assert result.page_count == 3
+    assert [(page.index, page.text, page.skipped) for page in result.pages] == [
+        (0, "Alice Smith", None),
+        (1, "", "timeout"),
+        (2, "Example Corp", None),
+    ]
+
+
+def test_migrations_match_models(tmp_path, monkeypatch):
+    from alembic import command
+    from alembic.config import Config
+
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    config = Config()
+    config.set_main_option("script_location", str(Path(__file__).resolve().parents[1] / "migrations"))
+    config.set_main_option("sqlalchemy.url", f"sqlite:///{tmp_path / 'migrated.db'}")
+
+    command.upgrade(config, "head")
+    # Raises AutogenerateDiffsDetected if the models drifted from the migrations.
+    command.check(config)
+
+
+def test_migrations_store_json_null_documents_as_sql_null(tmp_path, monkeypatch):
+    import sqlite3
+
+    from alembic import command
+    from alembic.config import Config
+
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    path = tmp_path / "migrated.db"
+    config = Config()
+    config.set_main_option("script_location", str(Path(__file__).resolve().parents[1] / "migrations"))
+    config.set_main_option("sqlalchemy.url", f"sqlite:///{path}")
+
+    def insert_shell(resume_id: str, stored: object) -> None:
+        with sqlite3.connect(path) as conn:
+            conn.execute(
+                "INSERT INTO resumes (id, user_email, normalized_json, created_at) "
+                "VALUES (?, 'tester@example.com', ?, '2026-01-01 00:00:00')",
+                (resume_id, stored),
+            )
+
+    # A failed-import shell as the JSON type stored it, and one a database
+    # compressed before the compression migration handled JSON null.
+    command.upgrade(config, "c9f5a2d7e4b8")
+    insert_shell("baseline-shell", "null")
+    command.upgrade(config, "a2d6f9b4e8c1")
+    insert_shell("compressed-shell", b"null")
+    command.upgrade(config, "head")
+
+    with sqlite3.connect(path) as conn:
+        stored = dict(conn.execute("SELECT id, normalized_json FROM resumes"))
+    assert stored == {"baseline-shell": None, "compressed-shell": None}
+
+
+def test_first_get_of_unhashed_resume_stores_its_hash_and_etag(client, auth_headers):
+    from sqlalchemy import insert
+
+    document = _patchable_resume()
+    other = _patchable_resume()
+    other["sections"][0]["items"][0]["values"]["first-name"] = "Bob"
+    with test_engine.begin() as conn:
+        # Canonical documents stored before schema versions and hashes existed.
+        conn.execute(
+            insert(Resume),
+            [
+                {"id": "resume-1", "user_email": "tester@example.com", "normalized_json": document, "has_content": True},
+                {"id": "resume-2", "user_email": "tester@example.com", "normalized_json": other, "has_content": True},
+            ],
+        )
+
+    first = client.get("/resumes/resume-1", headers=auth_headers)
+    second = client.get("/resumes/resume-2", headers=auth_headers)
+
+    assert first.status_code == second.status_code == 200
+    assert first.headers["etag"] != second.headers["etag"]
+    with TestingSessionLocal() as db:
+        assert db.get(Resume, "resume-1").content_hash is not None
+    with recorded_statements("UPDATE resumes") as updates:
+        revalidated = client.get("/resumes/resume-1", headers={**auth_headers, "If-None-Match": first.headers["etag"]})
+    assert revalidated.status_code == 304
+    assert updates == []
+
+
+def test_pdf_ranges_on_one_worker_share_one_parse(monkeypatch):
+    import pypdf
+
+    import pdf_import
+
+    pdf_bytes = build_multipage_pdf([[f"Page {index}"] for index in range(4)])
+    opened = []
+    reader_class = pypdf.PdfReader
+
+    def counting_reader(*args, **kwargs):
+        opened.append(args)
+        return reader_class(*args, **kwargs)
+
+    monkeypatch.setattr(pypdf, "PdfReader", counting_reader)
+    first = pdf_import.extract_pdf_page_range(pdf_bytes, 0, 2, 0, 10_000)
+    second = pdf_import.extract_pdf_page_range(pdf_bytes, 2, 4, 0, 10_000)
+
+    assert [page.text for page in first.pages + second.pages] == [f"Page {index}" for index in range(4)]
+    assert len(opened) == 1
@@ -71,10 +71,27 @@ export function useImportResumePdfMutation() {
   });
 }
 
+// The listing is paginated; the library shows every resume, so follow
+// `next_cursor` until the last page.
+async function fetchAllResumes(token?: string): Promise<ResumeListResponse> {
+  const resumes: ResumeListResponse["resumes"] = [];
+  let cursor: string | null | undefined;
+  do {
+    const query = new URLSearchParams({ limit: "200" });
+    if (cursor) {
+      query.set("cursor", cursor);
+    }
+    const page = await apiRequest<ResumeListResponse>(`/resumes?${query}`, { token });
+    resumes.push(...page.resumes);
+    cursor = page.next_cursor;
+  } while (cursor);
+  return { resumes };
+}
+
 export function useResumesQuery(token?: string) {
   return useQuery({
     queryKey: ["resumes", token],
-    queryFn: () => apiRequest<ResumeListResponse>("/resumes", { token }),
+    queryFn: () => fetchAllResumes(token),
     enabled: Boolean(token),
     retry: false,
   });
@@ -32,6 +32,7 @@ export type ResumeListItem = {
 
 export type ResumeListResponse = {
   resumes: ResumeListItem[];
+  next_cursor?: string | null;
 };
 
 export type ResumeDeleteResponse = {
@@ -1,12 +1,19 @@
 import { beforeEach, describe, expect, it, vi } from "vitest";
 import { renderHook, waitFor } from "@testing-library/react";
 
-import type { CreateSessionResponse, HealthResponse, LogoutResponse, UserResponse } from "../api/types";
+import type {
+  CreateSessionResponse,
+  HealthResponse,
+  LogoutResponse,
+  ResumeListItem,
+  UserResponse,
+} from "../api/types";
 import { apiRequest } from "../api/client";
 import {
   useCreateSessionMutation,
   useLogoutMutation,
   useProtectedStatusQuery,
+  useResumesQuery,
   useUserQuery,
 } from "../api/hooks";
 import { createQueryClient, createQueryWrapper } from "./test-utils";
@@ -95,4 +102,27 @@ describe("api hooks", () => {
     });
     expect(result.current.data).toEqual(response);
   });
+
+  it("follows next_cursor until every resume is listed", async () => {
+    const resume = (id: string): ResumeListItem => ({
+      resume_id: id,
+      created_at: "2026-01-01T00:00:00",
+      has_content: true,
+      label: id,
+    });
+    apiRequestMock
+      .mockResolvedValueOnce({ resumes: [resume("a"), resume("b")], next_cursor: "cursor-1" })
+      .mockResolvedValueOnce({ resumes: [resume("c")], next_cursor: null });
+
+    const client = createQueryClient();
+    const wrapper = createQueryWrapper(client);
+    const { result } = renderHook(() => useResumesQuery("token-abc"), { wrapper });
+
+    await waitFor(() => expect(result.current.isSuccess).toBe(true));
+    expect(apiRequestMock).toHaveBeenNthCalledWith(1, "/resumes?limit=200", { token: "token-abc" });
+    expect(apiRequestMock).toHaveBeenNthCalledWith(2, "/resumes?limit=200&cursor=cursor-1", {
+      token: "token-abc",
+    });
+    expect(result.current.data).toEqual({ resumes: [resume("a"), resume("b"), resume("c")] });
+  });
 });